@@ -3,22 +3,39 @@ ARP 2600 Modular Synthesizer - Python Backend
 Generates synthesizer sounds using NumPy/SciPy
 
 Features:
-- 3 VCOs (Oscillators)
+- 3 VCOs (band-limited PolyBLEP oscillators)
 - VCF (Filter) with multiple modes
 - VCA (Amplifier)
 - ADSR envelope
 - LFO modulation
+- Envelope/LFO modulation of VCF cutoff and VCO pitch (block-wise)
 - Preset patches
+- Audio buffers in the DSP dtype (float32 by default, see dsp_dtype.py);
+  envelopes and LFOs stay float64, as they also drive pitch
 """
 
 import numpy as np
 from scipy import signal
 import json
 
+import oscillators
+import wav_io
+from dsp_cache import butter
+from dsp_dtype import silence
+from filters import time_varying_biquad
+from stage_timing import stage
+
 
 class ARP2600:
     """ARP 2600 Semi-Modular Synthesizer"""
     
+    # Filter coefficients are updated once per block of this many samples
+    MODULATION_BLOCK = 64
+    
+    # Cutoff sweep of a full-scale envelope / LFO, in octaves
+    ENV_OCTAVES = 4
+    LFO_OCTAVES = 2
+    
     def __init__(self, sample_rate=44100):
         self.sample_rate = sample_rate
         
@@ -65,27 +82,85 @@ class ARP2600:
             'release': 0.5
         }
         
-        # LFO
+        # LFO (amount modulates VCF cutoff)
         self.lfo = {
             'waveform': 'sine',
             'rate': 5,
             'amount': 0
         }
+        
+        # VCO pitch modulation, in semitones
+        self.pitch_mod = {
+            'env_amount': 0,
+            'lfo_amount': 0
+        }
     
     def generate_oscillator(self, frequency, duration, waveform='sawtooth'):
-        """Generate oscillator waveform"""
-        t = np.linspace(0, duration, int(self.sample_rate * duration), False)
-        
-        if waveform == 'sawtooth':
-            return signal.sawtooth(2 * np.pi * frequency * t)
-        elif waveform == 'square':
-            return signal.square(2 * np.pi * frequency * t)
-        elif waveform == 'triangle':
-            return signal.sawtooth(2 * np.pi * frequency * t, 0.5)
-        elif waveform == 'sine':
-            return np.sin(2 * np.pi * frequency * t)
+        """Generate band-limited oscillator waveform"""
+        phase = np.arange(int(self.sample_rate * duration)) * (frequency / self.sample_rate)
+        return oscillators.oscillator(phase, waveform, dt=frequency / self.sample_rate)
+    
+    def oscillator_from_phase(self, phase, waveform='sawtooth', dt=None):
+        """Generate band-limited oscillator waveform from a phase in cycles (any shape)"""
+        return oscillators.oscillator(phase, waveform, dt=dt)
+    
+    def vco_ratio(self, vco):
+        """Frequency ratio of a VCO from its octave and fine (cents) settings"""
+        return (2 ** vco['octave']) * (2 ** (vco.get('fine', 0) / 1200))
+    
+    def modulation(self, length):
+        """Return the (ADSR envelope, LFO) modulation sources for a note"""
+        envelope = self.apply_envelope(
+            length,
+            self.envelope['attack'],
+            self.envelope['decay'],
+            self.envelope['sustain'],
+            self.envelope['release']
+        )
+        
+        if self.lfo['amount'] or self.pitch_mod['lfo_amount']:
+            lfo_phase = np.arange(length) * (self.lfo['rate'] / self.sample_rate)
+            lfo = self.oscillator_from_phase(lfo_phase, self.lfo['waveform'])
+        else:
+            lfo = np.zeros(length)
+        
+        return envelope, lfo
+    
+    def phase_time(self, envelope, lfo):
+        """
+        Oscillator time base in seconds, warped by pitch modulation
+        
+        frequency * phase_time is the oscillator phase in cycles.
+        """
+        semitones = self.pitch_mod['env_amount'] * envelope + self.pitch_mod['lfo_amount'] * lfo
+        if not np.any(semitones):
+            return np.arange(len(envelope)) / self.sample_rate
+        
+        ratio = np.power(2.0, semitones / 12)
+        return (np.cumsum(ratio) - ratio) / self.sample_rate
+    
+    def cutoff_curve(self, envelope, lfo):
+        """Per-sample VCF cutoff from the envelope and LFO amounts"""
+        octaves = (self.vcf['env_amount'] / 100) * self.ENV_OCTAVES * envelope
+        if self.lfo['amount']:
+            octaves = octaves + self.lfo['amount'] * self.LFO_OCTAVES * lfo
+        return self.vcf['cutoff'] * np.power(2.0, octaves)
+    
+    def apply_modulated_filter(self, audio, cutoff, filter_type='lowpass', resonance=5):
+        """
+        Apply the VCF with a time-varying cutoff
+        
+        Coefficients are updated every MODULATION_BLOCK samples. audio may
+        be 2-D (voices x samples) sharing one cutoff curve.
+        """
+        if filter_type == 'bandpass':
+            # Same bandwidth as the fixed 0.8-1.2 x cutoff band of apply_filter
+            q = 2.5 + resonance * 0.1
         else:
-            return signal.sawtooth(2 * np.pi * frequency * t)
+            q = 0.707 + resonance * 0.1
+        btype = filter_type if filter_type in ('highpass', 'bandpass') else 'lowpass'
+        
+        return time_varying_biquad(audio, cutoff, q, self.sample_rate, btype, block_size=self.MODULATION_BLOCK)
     
     def apply_filter(self, audio, filter_type='lowpass', cutoff=2000, resonance=5):
         """Apply filter to audio"""
@@ -94,16 +169,17 @@ class ARP2600:
         
         # Create filter
         if filter_type == 'lowpass':
-            b, a = signal.butter(2, normalized_cutoff, btype='low')
+            b, a = butter(2, normalized_cutoff, btype='low')
         elif filter_type == 'highpass':
-            b, a = signal.butter(2, normalized_cutoff, btype='high')
+            b, a = butter(2, normalized_cutoff, btype='high')
         elif filter_type == 'bandpass':
-            b, a = signal.butter(2, [normalized_cutoff * 0.8, normalized_cutoff * 1.2], btype='band')
+            b, a = butter(2, [normalized_cutoff * 0.8, normalized_cutoff * 1.2], btype='band')
         else:
-            b, a = signal.butter(2, normalized_cutoff, btype='low')
+            b, a = butter(2, normalized_cutoff, btype='low')
         
         # Apply filter
-        filtered = signal.lfilter(b, a, audio)
+        with stage('filtering'):
+            filtered = signal.lfilter(b, a, audio)
         
         # Add resonance (simplified - mix in filtered signal with gain)
         if resonance > 0:
@@ -165,73 +241,50 @@ class ARP2600:
         
         return modulated
     
+    @stage('synthesis')
     def synthesize_note(self, frequency, duration=1.0, velocity=1.0):
         """Synthesize note with current settings"""
+        length = int(self.sample_rate * duration)
+        envelope, lfo = self.modulation(length)
+        phase_time = self.phase_time(envelope, lfo)
+        pitch_modulated = self.pitch_mod['env_amount'] or self.pitch_mod['lfo_amount']
+        
         # Mix oscillators
-        audio_mix = np.zeros(int(self.sample_rate * duration))
+        audio_mix = silence(length)
         active_oscs = 0
-        
-        # VCO 1
-        if self.vco1['enabled']:
-            freq1 = frequency * (2 ** self.vco1['octave']) * (2 ** (self.vco1['fine'] / 1200))
-            osc1 = self.generate_oscillator(freq1, duration, self.vco1['waveform'])
-            audio_mix += osc1
-            active_oscs += 1
-        
-        # VCO 2
-        if self.vco2['enabled']:
-            freq2 = frequency * (2 ** self.vco2['octave']) * (2 ** (self.vco2['fine'] / 1200))
-            osc2 = self.generate_oscillator(freq2, duration, self.vco2['waveform'])
-            audio_mix += osc2
-            active_oscs += 1
-        
-        # VCO 3
-        if self.vco3['enabled']:
-            freq3 = frequency * (2 ** self.vco3['octave']) * (2 ** (self.vco3['fine'] / 1200))
-            osc3 = self.generate_oscillator(freq3, duration, self.vco3['waveform'])
-            audio_mix += osc3
-            active_oscs += 1
+        for vco in (self.vco1, self.vco2, self.vco3):
+            if vco['enabled']:
+                vco_frequency = frequency * self.vco_ratio(vco)
+                # Unmodulated VCOs have a constant phase increment
+                dt = None if pitch_modulated else vco_frequency / self.sample_rate
+                audio_mix += self.oscillator_from_phase(vco_frequency * phase_time, vco['waveform'], dt)
+                active_oscs += 1
         
         # Normalize mix
         if active_oscs > 0:
-            audio_mix = audio_mix / active_oscs
+            audio_mix /= active_oscs
         
-        # Apply filter
-        audio_filtered = self.apply_filter(
+        # Apply filter, cutoff driven by envelope and LFO
+        audio_filtered = self.apply_modulated_filter(
             audio_mix,
+            self.cutoff_curve(envelope, lfo),
             self.vcf['type'],
-            self.vcf['cutoff'],
             self.vcf['resonance']
         )
         
-        # Apply LFO (if enabled)
-        if self.lfo['amount'] > 0:
-            audio_filtered = self.apply_lfo(
-                audio_filtered,
-                self.lfo['rate'],
-                self.lfo['amount'],
-                'cutoff',
-                self.vcf['cutoff']
-            )
-        
         # Apply ADSR envelope
-        envelope = self.apply_envelope(
-            len(audio_filtered),
-            self.envelope['attack'],
-            self.envelope['decay'],
-            self.envelope['sustain'],
-            self.envelope['release']
-        )
-        
-        audio_final = audio_filtered * envelope
+        audio_final = audio_filtered
+        audio_final *= envelope
         
         # Apply VCA level and velocity
-        audio_final = audio_final * self.vca['level'] * velocity
+        audio_final *= self.vca['level']
+        audio_final *= velocity
         
         # Normalize
-        max_val = np.max(np.abs(audio_final))
+        max_val = np.max(np.abs(audio_final)) if length else 0
         if max_val > 0:
-            audio_final = audio_final / max_val * 0.9
+            audio_final /= max_val
+            audio_final *= 0.9
         
         return audio_final
     
@@ -251,7 +304,8 @@ class ARP2600:
                 'vco3': {'enabled': False},
                 'vcf': {'type': 'lowpass', 'cutoff': 3000, 'resonance': 15},
                 'envelope': {'attack': 0.05, 'decay': 0.3, 'sustain': 0.7, 'release': 0.5},
-                'lfo': {'rate': 6, 'amount': 0.3}
+                'lfo': {'rate': 6, 'amount': 0.3},
+                'pitch_mod': {'lfo_amount': 0.1}
             },
             'pad': {
                 'vco1': {'waveform': 'sawtooth', 'octave': 0, 'enabled': True},
@@ -291,6 +345,8 @@ class ARP2600:
                 self.envelope.update(preset['envelope'])
             if 'lfo' in preset:
                 self.lfo.update(preset['lfo'])
+            if 'pitch_mod' in preset:
+                self.pitch_mod.update(preset['pitch_mod'])
             
             return True
         
@@ -299,13 +355,8 @@ class ARP2600:
     def export_wav(self, audio, filename):
         """Export audio to WAV file"""
         try:
-            from scipy.io import wavfile
-            
-            # Convert to 16-bit PCM
-            audio_int16 = np.int16(audio * 32767)
-            
-            # Write WAV file
-            wavfile.write(filename, self.sample_rate, audio_int16)
+            # Clip, convert to 16-bit PCM and write in one pass
+            wav_io.write_wav(filename, audio, self.sample_rate)
             return True
         except Exception as e:
             print(f"Error exporting WAV: {e}")
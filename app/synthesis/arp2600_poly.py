@@ -0,0 +1,141 @@
+"""
+ARP 2600 Polyphonic Engine - Python Backend
+Renders note lists (chords, pads, overlapping lines) with the ARP 2600 voice
+
+Features:
+- Note list input: frequency, start, duration, velocity
+- Voice allocation with oldest-note stealing above max_voices
+- Voices of equal length rendered as one 2-D (voice x sample) pass:
+  oscillators, modulated filter and envelope all vectorised across voices
+- Overlap-add into a single output buffer (DSP dtype, see dsp_dtype.py)
+"""
+
+import numpy as np
+
+from arp2600 import ARP2600
+from dsp_dtype import silence
+
+# Fade applied where a stolen voice is cut off (seconds)
+STEAL_FADE = 0.005
+
+
+class ARP2600Poly(ARP2600):
+    """Polyphonic ARP 2600 sharing the patch settings of ARP2600"""
+
+    def __init__(self, sample_rate=44100, max_voices=8):
+        super().__init__(sample_rate=sample_rate)
+        self.max_voices = max_voices
+
+    def allocate_voices(self, notes):
+        """
+        Assign notes to voices, stealing the oldest sounding note when full
+
+        notes is a list of dicts with 'frequency', 'start' and 'duration'
+        in seconds and an optional 'velocity'. Returns one dict per note,
+        in start order, with sample positions and the sample at which a
+        stolen note is cut off (None if it plays out).
+        """
+        voices = []
+        sounding = []
+        for note in sorted(notes, key=lambda n: n['start']):
+            start = int(round(note['start'] * self.sample_rate))
+            voice = {
+                'frequency': note['frequency'],
+                'start': start,
+                'length': int(self.sample_rate * note['duration']),
+                'velocity': note.get('velocity', 1.0),
+                'cut': None
+            }
+
+            # Free voices whose notes have ended
+            sounding = [v for v in sounding if v['start'] + v['length'] > start]
+            if len(sounding) >= self.max_voices:
+                oldest = min(sounding, key=lambda v: v['start'])
+                oldest['cut'] = start - oldest['start']
+                sounding.remove(oldest)
+
+            sounding.append(voice)
+            voices.append(voice)
+        return voices
+
+    def _render_voices(self, voices, length):
+        """Render voices of one length as a (voices x length) matrix"""
+        # Nothing after a stolen voice's fade-out needs rendering
+        fade = max(1, int(STEAL_FADE * self.sample_rate))
+        span = max(length if v['cut'] is None else min(length, v['cut'] + fade) for v in voices)
+        frequencies = np.array([v['frequency'] for v in voices], dtype=float)
+
+        # Same-length voices share one envelope, LFO and cutoff curve
+        envelope, lfo = self.modulation(length)
+        envelope, lfo = envelope[:span], lfo[:span]
+        phase_time = self.phase_time(envelope, lfo)
+
+        audio = silence((len(voices), span))
+        active_oscs = 0
+        for vco in (self.vco1, self.vco2, self.vco3):
+            if vco['enabled']:
+                audio += self.oscillator_from_phase(np.outer(frequencies * self.vco_ratio(vco), phase_time),
+                                                    vco['waveform'])
+                active_oscs += 1
+        if active_oscs > 0:
+            audio /= active_oscs
+
+        audio = self.apply_modulated_filter(
+            audio,
+            self.cutoff_curve(envelope, lfo),
+            self.vcf['type'],
+            self.vcf['resonance']
+        )
+        audio *= envelope
+
+        # Stolen voices fade out quickly at the cut point
+        for row, voice in enumerate(voices):
+            cut = voice['cut']
+            if cut is not None and cut < span:
+                ramp = np.linspace(1, 0, fade)[:span - cut]
+                audio[row, cut:cut + len(ramp)] *= ramp
+                audio[row, cut + len(ramp):] = 0
+
+        # Each voice peaks at its velocity, so velocities stay meaningful in the mix
+        peaks = np.max(np.abs(audio), axis=1)
+        gains = np.array([v['velocity'] for v in voices]) * self.vca['level']
+        gains = np.divide(gains, peaks, out=np.zeros_like(peaks), where=peaks > 0)
+        audio *= gains[:, None]
+        return audio
+
+    def render(self, notes, total_duration=None):
+        """
+        Render a note list to one mono buffer, peak-normalized to 0.9
+
+        total_duration (seconds) fixes the output length; by default the
+        buffer ends with the last note.
+        """
+        voices = self.allocate_voices(notes)
+        if total_duration is not None:
+            total = int(self.sample_rate * total_duration)
+        else:
+            total = max((v['start'] + v['length'] for v in voices), default=0)
+        output = silence(total)
+
+        by_length = {}
+        for voice in voices:
+            by_length.setdefault(voice['length'], []).append(voice)
+
+        for length, group in by_length.items():
+            if length <= 0:
+                continue
+            rendered = self._render_voices(group, length)
+            for voice, audio in zip(group, rendered):
+                start = voice['start']
+                if start >= total:
+                    continue
+                end = min(start + len(audio), total)
+                output[start:end] += audio[:end - start]
+
+        # Normalize
+        max_val = np.max(np.abs(output)) if total else 0
+        if max_val > 0:
+            output /= max_val
+            output *= 0.9
+
+        return output
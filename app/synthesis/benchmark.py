@@ -0,0 +1,228 @@
+"""
+Synthesis Micro-Benchmarks - Python Backend
+Times hot render paths of the synth classes
+
+Usage:
+    python benchmark.py            # run all benchmarks
+    python benchmark.py tb303      # run one benchmark
+"""
+
+import sys
+import time
+
+import numpy as np
+from scipy import signal
+
+import oscillators
+import reverb
+from arp2600 import ARP2600
+from arp2600_poly import ARP2600Poly
+from tb303 import TB303
+from tr808 import TR808
+
+ACID_LINE = [
+    {'active': True, 'note': 'C3', 'accent': True, 'slide': False, 'gate': False},
+    {'active': False, 'note': 'C3', 'accent': False, 'slide': False, 'gate': False},
+    {'active': True, 'note': 'D#3', 'accent': False, 'slide': True, 'gate': False},
+    {'active': True, 'note': 'C3', 'accent': False, 'slide': False, 'gate': False},
+    {'active': True, 'note': 'C3', 'accent': False, 'slide': False, 'gate': False},
+    {'active': False, 'note': 'C3', 'accent': False, 'slide': False, 'gate': False},
+    {'active': True, 'note': 'G3', 'accent': True, 'slide': False, 'gate': True},
+    {'active': True, 'note': 'C3', 'accent': False, 'slide': False, 'gate': False},
+    {'active': True, 'note': 'C3', 'accent': False, 'slide': False, 'gate': False},
+    {'active': False, 'note': 'C3', 'accent': False, 'slide': False, 'gate': False},
+    {'active': True, 'note': 'D#3', 'accent': False, 'slide': True, 'gate': False},
+    {'active': True, 'note': 'C3', 'accent': False, 'slide': False, 'gate': False},
+    {'active': True, 'note': 'C3', 'accent': True, 'slide': False, 'gate': False},
+    {'active': False, 'note': 'C3', 'accent': False, 'slide': False, 'gate': False},
+    {'active': True, 'note': 'D3', 'accent': False, 'slide': False, 'gate': False},
+    {'active': True, 'note': 'C3', 'accent': False, 'slide': False, 'gate': False},
+]
+
+
+def timeit(func, repeat=20):
+    """Return the best wall time of func over repeat runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench_tb303():
+    """TB303.render_pattern without, with a cold, and with a warm note memo"""
+    synth = TB303(sample_rate=44100)
+    pattern_seconds = len(synth.render_pattern(ACID_LINE, bpm=130)) / synth.sample_rate
+    step_duration = 60.0 / 130 / 4
+
+    def no_memo():
+        # What render_pattern cost before memoization: every active step rendered
+        for step in ACID_LINE:
+            if step['active']:
+                synth._render_note(step['note'], step['accent'], step['slide'], step['gate'], step_duration)
+
+    def cold():
+        synth.clear_note_cache()
+        synth.render_pattern(ACID_LINE, bpm=130)
+
+    def warm():
+        synth.render_pattern(ACID_LINE, bpm=130)
+
+    no_memo_ms = timeit(no_memo)
+    cold_ms = timeit(cold)
+    warm_ms = timeit(warm)
+    distinct = len({(s['note'], s['accent'], s['slide'], s['gate']) for s in ACID_LINE if s['active']})
+
+    print(f"🎛️  TB303.render_pattern ({len(ACID_LINE)} steps, {distinct} distinct notes, {pattern_seconds:.2f}s audio)")
+    for label, ms in (('No memo', no_memo_ms), ('Cold memo', cold_ms), ('Warm memo', warm_ms)):
+        print(f"   {label + ':':11s}{ms:8.2f} ms  ({pattern_seconds * 1000 / ms:8.1f}x real time)")
+    print(f"   Speedup:   {no_memo_ms / warm_ms:8.1f}x (warm vs no memo)")
+
+
+def _legacy_noise(drums, duration, filter_freq, volume, start_offset=0):
+    """TR808._synth_noise before batching: one time base, filter and buffer per burst"""
+    total_duration = duration + start_offset
+    t = np.linspace(0, total_duration, int(drums.sample_rate * total_duration), False)
+    noise = np.random.uniform(-1, 1, len(t))
+    cutoff = min(filter_freq / (drums.sample_rate / 2), 0.99)
+    b, a = signal.butter(2, cutoff, btype='high')
+    audio = signal.lfilter(b, a, noise)
+    audio *= np.exp(-5 * t / total_duration)
+    max_val = np.max(np.abs(audio))
+    if max_val > 0:
+        audio = audio / max_val * volume * drums.master_volume
+    return audio
+
+
+def _legacy_clap(drums, bursts, filter_freq):
+    """TR808.generate_clap before batching: bursts summed in a Python loop"""
+    claps = [_legacy_noise(drums, decay, filter_freq, vol, start_offset=offset) for decay, vol, offset in bursts]
+    audio = np.zeros(max(len(c) for c in claps))
+    for clap in claps:
+        audio[:len(clap)] += clap
+    return audio / len(claps)
+
+
+def _legacy_metallic(drums, frequencies, duration, volume):
+    """TR808._synth_metallic before batching: one signal.square call per partial"""
+    t = np.linspace(0, duration, int(drums.sample_rate * duration), False)
+    audio = np.zeros(len(t))
+    for freq in frequencies:
+        audio += signal.square(2 * np.pi * freq * t)
+    audio = audio / len(frequencies)
+    audio *= np.exp(-2 * t / duration)
+    max_val = np.max(np.abs(audio))
+    if max_val > 0:
+        audio = audio / max_val * volume * drums.master_volume
+    return audio
+
+
+def bench_tr808():
+    """Per-hit latency of the TR808 clap and cymbal voices, loop vs batched"""
+    drums = TR808(sample_rate=44100)
+    reverb_bursts = [(0.1 + (i * 0.02), 0.5 - (i * 0.08), offset) for i, offset in enumerate([0, 0.03, 0.06, 0.1, 0.15])]
+    cases = [
+        ('clap classic', lambda: _legacy_clap(drums, [(0.1, 0.5, 0), (0.1, 0.5, 0.03), (0.1, 0.5, 0.06)], 2000),
+         lambda: drums.generate_clap('classic')),
+        ('clap reverb', lambda: _legacy_clap(drums, reverb_bursts, 2000),
+         lambda: drums.generate_clap('reverb')),
+        ('ride classic', lambda: _legacy_metallic(drums, [4000, 5000, 6000], 0.3, 0.4),
+         lambda: drums.generate_ride('classic')),
+        ('crash classic', lambda: _legacy_metallic(drums, [3000, 4000, 5000, 6000], 1.0, 0.5),
+         lambda: drums.generate_crash('classic')),
+    ]
+
+    print("🥁 TR808 per-hit latency (loop -> batched)")
+    for label, before, after in cases:
+        before_ms = timeit(before)
+        after_ms = timeit(after)
+        print(f"   {label + ':':15s}{before_ms:7.2f} ms -> {after_ms:6.2f} ms  ({before_ms / after_ms:4.1f}x)")
+
+
+def bench_arp2600():
+    """A 4-note pad chord and a 32-note arpeggio: one render per note vs the poly engine"""
+    cases = [
+        ('pad chord', 'pad', [{'frequency': f, 'start': 0.0, 'duration': 2.0} for f in (261.6, 329.6, 392.0, 493.9)]),
+        ('pluck arp', 'pluck', [{'frequency': 220 * 2 ** ((i % 12) / 12), 'start': i * 0.1, 'duration': 0.4}
+                                for i in range(32)]),
+    ]
+
+    print("🎹 ARP2600 note lists (per-note renders -> poly engine)")
+    for label, preset, notes in cases:
+        mono = ARP2600(sample_rate=44100)
+        mono.load_preset(preset)
+        poly = ARP2600Poly(sample_rate=44100)
+        poly.load_preset(preset)
+
+        def per_note():
+            total = int(mono.sample_rate * max(n['start'] + n['duration'] for n in notes))
+            mix = np.zeros(total)
+            for note in notes:
+                audio = mono.synthesize_note(note['frequency'], duration=note['duration'])
+                start = int(round(note['start'] * mono.sample_rate))
+                mix[start:start + len(audio)] += audio[:total - start]
+
+        before_ms = timeit(per_note, repeat=5)
+        after_ms = timeit(lambda: poly.render(notes), repeat=5)
+        print(f"   {label + ':':15s}{before_ms:7.2f} ms -> {after_ms:6.2f} ms  ({before_ms / after_ms:4.1f}x)")
+
+
+def _alias_db(audio, frequency, sample_rate):
+    """Power outside the harmonics of frequency relative to the harmonics, in dB"""
+    spectrum = np.abs(np.fft.rfft(audio * np.hanning(len(audio)))) ** 2
+    bins = np.fft.rfftfreq(len(audio), 1 / sample_rate)
+    harmonic = np.abs(bins / frequency - np.round(bins / frequency)) * frequency < 20
+    return 10 * np.log10(spectrum[~harmonic].sum() / spectrum[harmonic].sum())
+
+
+def bench_oscillators():
+    """Aliasing and cost of naive scipy waveforms vs the PolyBLEP oscillators"""
+    sample_rate = 44100
+    print("〰️  Oscillators, 1 s at 44.1 kHz (alias power re harmonics, render time)")
+    for frequency in (220.0, 1760.0, 3520.0):
+        phase = np.arange(sample_rate) * (frequency / sample_rate)
+        dt = frequency / sample_rate
+        for label, naive, blep in (
+            ('saw', lambda: signal.sawtooth(2 * np.pi * phase), lambda: oscillators.sawtooth(phase, dt)),
+            ('square', lambda: signal.square(2 * np.pi * phase), lambda: oscillators.square(phase, dt)),
+        ):
+            naive_db = _alias_db(naive(), frequency, sample_rate)
+            blep_db = _alias_db(blep(), frequency, sample_rate)
+            print(f"   {label:6s} {frequency:6.0f} Hz: naive {naive_db:6.1f} dB {timeit(naive, 5):5.2f} ms"
+                  f" -> PolyBLEP {blep_db:6.1f} dB {timeit(blep, 5):5.2f} ms")
+
+
+def bench_reverb():
+    """Convolution reverb cost vs tail length, against direct scipy FFT convolution"""
+    sample_rate = 44100
+    audio = np.random.default_rng(0).standard_normal(sample_rate)
+    print("🏛️  Reverb on 1 s of audio (scipy fftconvolve -> partitioned convolution)")
+    for decay in (0.5, 1.0, 2.0, 4.0):
+        ir = reverb.room(decay, sample_rate)
+        ir.convolve(audio)  # warm the spectrum cache
+        before_ms = timeit(lambda: signal.fftconvolve(audio, ir.samples), repeat=5)
+        after_ms = timeit(lambda: ir.convolve(audio), repeat=5)
+        print(f"   {decay:3.1f} s tail: {before_ms:6.2f} ms -> {after_ms:6.2f} ms")
+
+
+BENCHMARKS = {
+    'tb303': bench_tb303,
+    'tr808': bench_tr808,
+    'arp2600': bench_arp2600,
+    'oscillators': bench_oscillators,
+    'reverb': bench_reverb,
+}
+
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}' (available: {', '.join(BENCHMARKS)})")
+            sys.exit(1)
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main()
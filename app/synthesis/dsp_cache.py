@@ -0,0 +1,61 @@
+"""
+DSP Coefficient Cache - Python Backend
+Memoized filter design shared by all synth classes
+
+Features:
+- Drop-in replacement for scipy.signal.butter (ba or sos output)
+- Cutoffs quantised to 4 significant digits so near-identical requests share an entry
+- Bounded LRU eviction
+- Callers get their own copies, so the cached designs cannot be corrupted
+"""
+
+from functools import lru_cache
+
+from scipy import signal
+
+CACHE_SIZE = 512
+CUTOFF_DIGITS = 4
+
+
+def _quantise(value):
+    return float(f"{value:.{CUTOFF_DIGITS}g}")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _design(order, cutoff, btype, fs, output):
+    coefficients = signal.butter(order, list(cutoff) if len(cutoff) > 1 else cutoff[0],
+                                 btype=btype, fs=fs, output=output)
+    for array in (coefficients,) if output == 'sos' else coefficients:
+        array.flags.writeable = False
+    return coefficients
+
+
+def butter(order, cutoff, btype='low', fs=None, output='ba'):
+    """
+    Butterworth filter design, memoized
+
+    Same arguments as scipy.signal.butter; cutoff may be a scalar or a
+    [low, high] pair. Returns (b, a) or an sos array.
+    """
+    if output not in ('ba', 'sos'):
+        raise ValueError(f"Unsupported output '{output}' (expected 'ba' or 'sos')")
+    if hasattr(cutoff, '__len__'):
+        cutoff = tuple(_quantise(c) for c in cutoff)
+    else:
+        cutoff = (_quantise(cutoff),)
+    coefficients = _design(int(order), cutoff, btype, None if fs is None else float(fs), output)
+    # Copying a few coefficients is far cheaper than designing the filter,
+    # and some SciPy routines (sosfilt) reject read-only buffers
+    if output == 'sos':
+        return coefficients.copy()
+    return tuple(array.copy() for array in coefficients)
+
+
+def cache_info():
+    """Hit/miss counters of the coefficient cache"""
+    return _design.cache_info()
+
+
+def clear_cache():
+    """Drop all cached designs"""
+    _design.cache_clear()
@@ -0,0 +1,116 @@
+"""
+DSP Sample Format Policy - Python Backend
+Working dtype for rendered audio and the final int16 quantisation
+
+Features:
+- float32 signal buffers by default (AUDIO_DSP_DTYPE=float64 to switch)
+- Per-thread override, so one render can be repeated in float64 to check
+  that the float32 output is equivalent
+- Single in-place quantisation step into a caller-provided int16 buffer
+
+Time bases and oscillator phases should stay float64: a float32 phase of
+a few thousand radians is only accurate to ~1e-3 rad. Compute them in
+float64 and write the waveform into a buffer of the policy dtype (ufuncs
+with out=), then keep working in place.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+DTYPES = ('float32', 'float64')
+
+
+def _validate(dtype):
+    dtype = np.dtype(dtype)
+    if dtype.name not in DTYPES:
+        raise ValueError(f"Unsupported DSP dtype '{dtype.name}' (expected one of {', '.join(DTYPES)})")
+    return dtype
+
+
+DEFAULT_DTYPE = _validate(os.environ.get('AUDIO_DSP_DTYPE', 'float32'))
+
+_policy = threading.local()
+
+
+def dsp_dtype():
+    """dtype for signal buffers in the current thread"""
+    return getattr(_policy, 'dtype', DEFAULT_DTYPE)
+
+
+@contextmanager
+def dtype_policy(dtype):
+    """Render with another dtype in this thread, e.g. float64 as a reference"""
+    previous = dsp_dtype()
+    _policy.dtype = _validate(dtype)
+    try:
+        yield _policy.dtype
+    finally:
+        _policy.dtype = previous
+
+
+def silence(samples):
+    """Zeroed signal buffer of the policy dtype"""
+    return np.zeros(samples, dtype=dsp_dtype())
+
+
+def as_dsp(audio):
+    """audio as the policy dtype (no copy if it already is)"""
+    return np.asarray(audio, dtype=dsp_dtype())
+
+
+def exp_decay(t, rate):
+    """exp(-rate * t) in the policy dtype, computed in one buffer"""
+    envelope = np.multiply(t, -rate, dtype=dsp_dtype())
+    return np.exp(envelope, out=envelope)
+
+
+def filter_coefficients(coefficients):
+    """
+    Filter coefficients in the policy dtype
+
+    scipy filters run in the common type of signal and coefficients, so
+    float64 coefficients would silently promote a float32 signal.
+    """
+    return np.asarray(coefficients, dtype=dsp_dtype())
+
+
+def quantize_int16(audio, gain=1.0, out=None):
+    """
+    Scale by gain, clip to full scale and truncate into int16
+
+    audio (float, values nominally in [-1, 1]) is used as scratch space
+    and overwritten. out is filled and returned; one is allocated if not
+    given. Equivalent to (np.clip(audio, -1, 1) * 32767 * gain).astype(np.int16).
+    """
+    if out is None:
+        out = np.empty(audio.shape, dtype=np.int16)
+    scale = 32767 * gain
+    limit = min(abs(scale), 32767)
+    np.multiply(audio, scale, out=audio)
+    np.clip(audio, -limit, limit, out=audio)
+    np.copyto(out, audio, casting='unsafe')
+    return out
+
+
+def compare_dtypes(render, reference='float64', candidate=None):
+    """
+    Run render() under the reference and candidate dtypes
+
+    render returns int16 PCM (array or bytes). Returns the largest sample
+    difference in LSBs; 0 or 1 means the outputs are equivalent. Renders
+    using randomness must be seeded.
+    """
+    candidate = candidate or DEFAULT_DTYPE.name
+    outputs = []
+    for dtype in (reference, candidate):
+        with dtype_policy(dtype):
+            pcm = render()
+        if isinstance(pcm, (bytes, bytearray, memoryview)):
+            pcm = np.frombuffer(pcm, dtype=np.int16)
+        outputs.append(np.asarray(pcm, dtype=np.int32))
+    if outputs[0].shape != outputs[1].shape:
+        raise ValueError(f"Output shapes differ: {outputs[0].shape} vs {outputs[1].shape}")
+    return int(np.max(np.abs(outputs[0] - outputs[1]), initial=0))
@@ -0,0 +1,222 @@
+"""
+Time-Varying Filters - Python Backend
+Resonant biquad filters whose cutoff follows an envelope
+
+Coefficients (RBJ audio-EQ cookbook) are computed for all blocks in one
+vectorised pass and updated once per block of samples, with the filter
+state carried across blocks. That is cheap enough to run envelopes and
+LFOs on every note instead of falling back to a fixed cutoff.
+
+StreamingFilter covers the fixed-cutoff case: a causal SOS filter whose
+state is carried from block to block, so renders of any length can be
+filtered in bounded memory.
+"""
+
+import numpy as np
+from scipy import signal
+
+from dsp_cache import butter
+from stage_timing import stage
+
+DEFAULT_BLOCK_SIZE = 64
+STREAM_BLOCK_SIZE = 8192
+
+
+def biquad_coefficients(cutoff, q, sample_rate, btype='lowpass'):
+    """
+    Compute biquad coefficients for arrays of cutoff/Q values
+
+    Returns (b, a) arrays of shape (n, 3), normalised so a[:, 0] == 1.
+    """
+    cutoff = np.atleast_1d(np.asarray(cutoff, dtype=np.float64))
+    q = np.broadcast_to(np.asarray(q, dtype=np.float64), cutoff.shape)
+
+    # Keep the bilinear transform well away from DC and Nyquist
+    cutoff = np.clip(cutoff, 10.0, 0.45 * sample_rate)
+
+    w0 = 2 * np.pi * cutoff / sample_rate
+    cos_w0 = np.cos(w0)
+    alpha = np.sin(w0) / (2 * q)
+
+    if btype == 'lowpass':
+        b0 = (1 - cos_w0) / 2
+        b = np.stack([b0, 1 - cos_w0, b0], axis=-1)
+    elif btype == 'highpass':
+        b0 = (1 + cos_w0) / 2
+        b = np.stack([b0, -(1 + cos_w0), b0], axis=-1)
+    elif btype == 'bandpass':
+        b = np.stack([alpha, np.zeros_like(alpha), -alpha], axis=-1)
+    else:
+        raise ValueError(f"Unknown filter type '{btype}'")
+
+    a = np.stack([1 + alpha, -2 * cos_w0, 1 - alpha], axis=-1)
+    return b / a[:, :1], a / a[:, :1]
+
+
+def _filter_blocks(blocks, b, a, zi):
+    """
+    Biquad-filter blocks of equal length, each with its own coefficients
+
+    blocks has shape (..., n_blocks, block_size); b and a are
+    (n_blocks, 3) with a[:, 0] == 1; zi is the (..., 2) transposed
+    direct form II state before the first block. Equivalent to one
+    lfilter call per block with the state carried over, without a
+    Python loop over blocks:
+
+    - Every block goes through its 1 / A(z) from rest, all blocks at
+      once, alongside a unit impulse whose response g gives the block's
+      response to a start state (s1, s2): s1 * g[n] + s2 * g[n - 1].
+    - Block k maps its start state s to M[k] @ s + e[k], e being its
+      end state from rest. A prefix scan over those affine maps gives
+      every block's real start state.
+
+    Returns (output, final state).
+    """
+    n_blocks, block_size = blocks.shape[-2:]
+    lead = blocks.shape[:-2]
+    b0, b1, b2 = b.T
+    c1, c2 = -a[:, 1], -a[:, 2]  # Feedback taps: w[n] = x[n] + c1 * w[n - 1] + c2 * w[n - 2]
+
+    # Sample-major, an impulse after the audio rows, two zero samples of
+    # history in front and one sample past the block for the end state
+    x = np.moveaxis(blocks.reshape((-1, n_blocks, block_size)), -1, 0)
+    w = np.zeros((block_size + 3, x.shape[1] + 1, n_blocks))
+    w[2:-1, :-1] = x
+    w[2, -1] = 1.0
+    for i in range(2, block_size + 3):
+        w[i] += c1 * w[i - 1] + c2 * w[i - 2]
+    g = w[1:, -1]  # g[n + 1] holds g(n), with g(-1) = 0
+    w = w[:, :-1]
+    y = b0 * w[2:] + b1 * w[1:-1] + b2 * w[:-2]  # Output from rest, block_size + 1 samples
+
+    e0 = y[-1].copy()
+    e1 = b2 * x[-1] + c2 * y[-2]
+    m00, m01 = g[-1].copy(), g[-2].copy()
+    m10, m11 = c2 * g[-2], c2 * g[-3]
+
+    # Scan so that block k holds the map of blocks 0..k
+    shift = 1
+    while shift < n_blocks:
+        q00, q01, q10, q11 = m00[shift:], m01[shift:], m10[shift:], m11[shift:]
+        p00, p01, p10, p11 = m00[:-shift], m01[:-shift], m10[:-shift], m11[:-shift]
+        f0, f1 = e0[:, :-shift], e1[:, :-shift]
+        d0, d1 = q00 * f0 + q01 * f1, q10 * f0 + q11 * f1
+        n00, n01 = q00 * p00 + q01 * p10, q00 * p01 + q01 * p11
+        n10, n11 = q10 * p00 + q11 * p10, q10 * p01 + q11 * p11
+        e0[:, shift:] += d0
+        e1[:, shift:] += d1
+        m00[shift:], m01[shift:], m10[shift:], m11[shift:] = n00, n01, n10, n11
+        shift *= 2
+
+    zi = np.asarray(zi, dtype=np.float64).reshape((-1, 2))
+    z0, z1 = zi[:, :1], zi[:, 1:]
+    s0 = np.concatenate([z0, (m00 * z0 + m01 * z1 + e0)[:, :-1]], axis=1)
+    s1 = np.concatenate([z1, (m10 * z0 + m11 * z1 + e1)[:, :-1]], axis=1)
+    final = np.stack([m00[-1] * z0[:, 0] + m01[-1] * z1[:, 0] + e0[:, -1],
+                      m10[-1] * z0[:, 0] + m11[-1] * z1[:, 0] + e1[:, -1]], axis=-1)
+
+    y = y[:-1] + s0 * g[1:-1, None] + s1 * g[:-2, None]
+    output = np.moveaxis(y, 0, -1).reshape(lead + (n_blocks, block_size))
+    return output, final.reshape(lead + (2,))
+
+
+@stage('filtering')
+def time_varying_biquad(audio, cutoff, q=0.707, sample_rate=44100, btype='lowpass',
+                        block_size=DEFAULT_BLOCK_SIZE, zi=None):
+    """
+    Filter audio with a cutoff (and optionally Q) that changes over time
+
+    cutoff and q may be scalars or per-sample arrays the length of audio;
+    they are sampled once per block. audio may be 2-D (channels or voices
+    x samples), in which case every row is filtered with the same cutoff
+    curve. Pass zi (shape (..., 2)) to continue from a previous call; the
+    final state is returned alongside the output when zi is given.
+    """
+    audio = np.asarray(audio)
+    n = audio.shape[-1]
+    n_blocks = max(1, -(-n // block_size))
+    block_starts = np.arange(n_blocks) * block_size
+
+    cutoff = np.asarray(cutoff, dtype=np.float64)
+    block_cutoff = cutoff[np.minimum(block_starts, n - 1)] if cutoff.ndim else np.full(n_blocks, float(cutoff))
+    q = np.asarray(q, dtype=np.float64)
+    block_q = q[np.minimum(block_starts, n - 1)] if q.ndim else q
+
+    b, a = biquad_coefficients(block_cutoff, block_q, sample_rate, btype)
+
+    output = np.empty(audio.shape, dtype=np.result_type(audio, np.float32))
+    state = np.zeros(audio.shape[:-1] + (2,)) if zi is None else np.asarray(zi, dtype=np.float64)
+
+    # Whole blocks are filtered together (see _filter_blocks); a shorter
+    # last block continues from their final state
+    full_blocks = n // block_size
+    split = full_blocks * block_size
+    if full_blocks:
+        blocks = audio[..., :split].reshape(audio.shape[:-1] + (full_blocks, block_size))
+        filtered, state = _filter_blocks(blocks, b[:full_blocks], a[:full_blocks], state)
+        output[..., :split] = filtered.reshape(audio.shape[:-1] + (split,))
+    if split < n:
+        output[..., split:], state = signal.lfilter(b[-1], a[-1], audio[..., split:], zi=state)
+
+    if zi is not None:
+        return output, state
+    return output
+
+
+class StreamingFilter:
+    """
+    Causal SOS filter with carried state
+
+    Feed consecutive blocks to process() (or a whole buffer to filter())
+    and the output is identical to filtering the concatenated signal in
+    one sosfilt call. float32 input is filtered in float32.
+    """
+
+    def __init__(self, sos):
+        self.sos = np.atleast_2d(np.asarray(sos, dtype=np.float64))
+        self._sos_by_dtype = {}
+        self.zi = None
+
+    @classmethod
+    def butterworth(cls, order, cutoff, btype='low', sample_rate=44100):
+        """Butterworth filter; cutoff in Hz (a [low, high] pair for bandpass)"""
+        return cls(butter(order, cutoff, btype=btype, fs=sample_rate, output='sos'))
+
+    def reset(self):
+        """Forget the state, e.g. before an unrelated signal"""
+        self.zi = None
+
+    def _coefficients(self, dtype):
+        sos = self._sos_by_dtype.get(dtype)
+        if sos is None:
+            sos = self._sos_by_dtype[dtype] = self.sos.astype(dtype)
+        return sos
+
+    def process(self, block):
+        """Filter the next block (last axis is time) and return it"""
+        block = np.asarray(block)
+        dtype = np.result_type(block, np.float32)
+        if self.zi is None:
+            self.zi = np.zeros((len(self.sos),) + block.shape[:-1] + (2,), dtype=dtype)
+        with stage('filtering'):
+            output, self.zi = signal.sosfilt(self._coefficients(dtype), block, zi=self.zi)
+        return output
+
+    def stream(self, blocks):
+        """Filter an iterable of blocks lazily"""
+        for block in blocks:
+            yield self.process(block)
+
+    def filter(self, audio, block_size=STREAM_BLOCK_SIZE, out=None):
+        """
+        Filter a whole buffer block by block, continuing from the current state
+
+        out may be audio itself to filter in place; scratch memory is
+        bounded by block_size.
+        """
+        audio = np.asarray(audio)
+        if out is None:
+            out = np.empty(audio.shape, dtype=np.result_type(audio, np.float32))
+        for start in range(0, audio.shape[-1], block_size):
+            out[..., start:start + block_size] = self.process(audio[..., start:start + block_size])
+        return out
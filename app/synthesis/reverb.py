@@ -0,0 +1,165 @@
+"""
+Convolution Reverb - Python Backend
+FFT overlap-add convolution against generated or loaded impulse responses
+
+Features:
+- Generated room impulse responses (early reflections + damped noise tail)
+- Impulse responses loaded from WAV files
+- Impulse responses and their spectra cached per process
+- Uniformly partitioned overlap-add convolution with a bounded FFT size
+
+Cost grows about linearly with the tail: every IR partition adds one
+spectral multiply-add per input block, and the output (input + tail) gets
+longer. On 1 s of audio a 4 s tail costs 2-3.5x a 0.5 s one.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from scipy import fft, signal
+
+from stage_timing import stage
+
+# Early reflections (seconds, gain), as in the tap-delay reverb this replaces
+EARLY_REFLECTIONS = ((0.023, 0.5), (0.037, 0.3), (0.051, 0.2), (0.071, 0.1))
+
+
+class ImpulseResponse:
+    """An impulse response split into partitions with cached FFT spectra"""
+
+    # Partition length bounds (samples); FFT blocks are twice the partition
+    MIN_PARTITION = 4096
+    MAX_PARTITION = 32768
+
+    def __init__(self, samples, sample_rate=44100):
+        self.samples = np.array(samples, dtype=np.float64)
+        self.samples.flags.writeable = False
+        self.sample_rate = sample_rate
+        self._spectra = {}
+
+    def __len__(self):
+        return len(self.samples)
+
+    def partition_size(self, length):
+        """Power-of-two partition for a signal of `length` samples
+
+        Scales with the shorter of signal and IR, which keeps the
+        spectral multiply-adds (blocks x partitions) low for long tails.
+        """
+        target = min(length, len(self.samples)) // 8
+        partition = self.MIN_PARTITION
+        while partition < target and partition < self.MAX_PARTITION:
+            partition *= 2
+        return partition
+
+    def spectra(self, partition):
+        """rfft of every IR partition, zero-padded to 2 * partition (cached)"""
+        spectra = self._spectra.get(partition)
+        if spectra is None:
+            count = max(1, -(-len(self.samples) // partition))
+            parts = np.zeros((count, partition))
+            parts.reshape(-1)[:len(self.samples)] = self.samples
+            spectra = fft.rfft(parts, 2 * partition, axis=1)
+            spectra.flags.writeable = False
+            self._spectra[partition] = spectra
+        return spectra
+
+    def convolve(self, audio, partition=None):
+        """
+        Full linear convolution of audio with the IR (len(audio) + len(IR) - 1 samples)
+
+        Uniformly partitioned overlap-add: input and IR are cut into
+        blocks of the same length, so the FFT size does not grow with the
+        tail; each extra IR partition adds a multiply-add per input block
+        and a block of output, so cost is linear in the tail.
+        """
+        audio = np.asarray(audio, dtype=np.float64)
+        n, m = len(audio), len(self.samples)
+        if n == 0 or m == 0:
+            return np.zeros(max(n + m - 1, 0))
+        partition = partition or self.partition_size(n)
+
+        spectra = self.spectra(partition)
+        n_blocks = -(-n // partition)
+        blocks = np.zeros((n_blocks, partition))
+        blocks.reshape(-1)[:n] = audio
+        inputs = fft.rfft(blocks, 2 * partition, axis=1)
+
+        # Output block j collects input block j - p through IR partition p
+        mixed = np.zeros((n_blocks + len(spectra) - 1, partition + 1), dtype=complex)
+        for p, spectrum in enumerate(spectra):
+            mixed[p:p + n_blocks] += inputs * spectrum
+        filtered = fft.irfft(mixed, 2 * partition, axis=1)
+
+        # Overlap-add: the second half of each block lands on the next one
+        output = np.zeros((len(filtered) + 1) * partition)
+        output[:-partition] += filtered[:, :partition].reshape(-1)
+        output[partition:] += filtered[:, partition:].reshape(-1)
+
+        return output[:n + m - 1]
+
+
+@lru_cache(maxsize=32)
+def _room(decay, sample_rate, seed):
+    length = max(1, int(decay * sample_rate))
+    t = np.arange(length) / sample_rate
+    rng = np.random.default_rng(seed)
+
+    # Diffuse tail: noise decaying 60 dB over `decay` seconds, losing
+    # high frequencies as it fades (crossfade towards lowpassed noise)
+    noise = rng.standard_normal(length)
+    b, a = signal.butter(1, min(3000 / (sample_rate / 2), 0.99))
+    dark = signal.lfilter(b, a, noise)
+    brightness = np.exp(-3 * t / decay)
+    tail = (noise * brightness + dark * (1 - brightness)) * np.exp(-6.91 * t / decay)
+
+    # Early reflections on top of a softly rising tail
+    tail *= np.minimum(1.0, t / 0.02)
+    for delay, gain in EARLY_REFLECTIONS:
+        index = int(delay * sample_rate)
+        if index < length:
+            tail[index] += gain * 4
+
+    # Unit energy, so the wet signal sits at about the dry level
+    tail /= np.sqrt(np.sum(tail ** 2)) or 1.0
+    return ImpulseResponse(tail, sample_rate)
+
+
+def room(decay=1.0, sample_rate=44100, seed=0):
+    """Generated room impulse response with a decay (RT60) in seconds (cached)"""
+    return _room(round(float(decay), 2), int(sample_rate), seed)
+
+
+@lru_cache(maxsize=16)
+def load_ir(path, sample_rate=44100):
+    """Load an impulse response from a WAV file, mixed to mono and resampled to sample_rate (cached)"""
+    from scipy.io import wavfile
+
+    file_rate, data = wavfile.read(path)
+    if np.issubdtype(data.dtype, np.integer):
+        data = data / float(np.iinfo(data.dtype).max)
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if file_rate != sample_rate:
+        data = signal.resample_poly(data, sample_rate, file_rate)
+
+    data /= np.sqrt(np.sum(data ** 2)) or 1.0
+    return ImpulseResponse(data, sample_rate)
+
+
+@stage('reverb')
+def apply_reverb(audio, decay=1.0, mix=0.3, sample_rate=44100, ir=None):
+    """
+    Add convolution reverb to audio
+
+    Returns dry + mix * wet, including the reverb tail (len(audio) +
+    len(IR) - 1 samples). ir overrides the generated room.
+    """
+    if ir is None:
+        ir = room(decay, sample_rate)
+    audio = np.asarray(audio, dtype=np.float64)
+    output = ir.convolve(audio)
+    output *= mix
+    output[:len(audio)] += audio
+    return output
@@ -3,20 +3,47 @@ TB-303 Acid Bass Synthesizer - Python Backend
 Generates WAV files from TB-303 patterns using NumPy/SciPy
 
 Features:
-- Classic sawtooth/square oscillator
+- Classic sawtooth/square oscillator (band-limited, PolyBLEP)
 - Resonant lowpass filter with envelope modulation
 - Accent, slide, and gate controls
 - 16-step sequencer rendering to audio
+- Buffers in the DSP dtype (float32 by default, see dsp_dtype.py); the
+  resonant filter still runs its recursion in float64
 """
 
 import numpy as np
-from scipy import signal
 import json
 
+import oscillators
+import wav_io
+from dsp_dtype import as_dsp, dsp_dtype, silence
+from filters import time_varying_biquad
+from stage_timing import stage
+
 
 class TB303:
     """TB-303 Acid Bass Synthesizer"""
     
+    # Oscillator waveforms (anything else renders as sawtooth)
+    WAVEFORMS = ('sawtooth', 'square', 'sine')
+    
+    # Peak level of rendered patterns (reached by an accented note)
+    OUTPUT_PEAK = 0.9
+    
+    # Rendered notes kept per instance before the memo table is reset
+    NOTE_CACHE_SIZE = 256
+    
+    # Glide time constant for slides (seconds to reach the target pitch)
+    SLIDE_TIME = 0.06
+    
+    # Accent gain changes inside a slide group are ramped over this time
+    ACCENT_RAMP = 0.005
+    
+    # Step whose peak sets the patch level: an accented note is the loudest
+    # thing a patch plays, so it lands on volume/100 and others sit below it
+    LEVEL_REFERENCE = ('C3', True, False, False)
+    LEVEL_REFERENCE_DURATION = 0.25
+    
     def __init__(self, sample_rate=44100):
         self.sample_rate = sample_rate
         
@@ -44,46 +71,58 @@ class TB303:
             'G#3': 207.65, 'A3': 220.00, 'A#3': 233.08, 'B3': 246.94,
             'C4': 261.63
         }
+        
+        # Memo of rendered notes: ((note, accent, slide, gate), ...), duration, dtype -> audio
+        self._note_cache = {}
+        self._note_cache_params = dict(self.params)
+        
+        # Output gain for the current params (see _patch_gain)
+        self._level = None
+        self._level_params = None
+        
+        # Shared time base, grown on demand instead of rebuilt per note
+        self._time = np.zeros(0)
     
     def set_param(self, param, value):
         """Set synthesizer parameter"""
         if param in self.params:
             self.params[param] = float(value)
+            self.clear_note_cache()
             return True
         return False
     
+    def clear_note_cache(self):
+        """Drop memoized note renders (called whenever params change)"""
+        self._note_cache.clear()
+        self._note_cache_params = dict(self.params)
+    
     def generate_oscillator(self, frequency, duration, waveform='sawtooth'):
-        """Generate oscillator waveform"""
-        t = np.linspace(0, duration, int(self.sample_rate * duration), False)
-        
-        if waveform == 'sawtooth':
-            return signal.sawtooth(2 * np.pi * frequency * t)
-        elif waveform == 'square':
-            return signal.square(2 * np.pi * frequency * t)
-        elif waveform == 'sine':
-            return np.sin(2 * np.pi * frequency * t)
-        else:
-            return signal.sawtooth(2 * np.pi * frequency * t)
+        """Generate band-limited oscillator waveform"""
+        phase = np.arange(int(self.sample_rate * duration)) * (frequency / self.sample_rate)
+        return self.oscillator_from_phase(phase, waveform)
+    
+    def oscillator_from_phase(self, phase, waveform='sawtooth'):
+        """Generate band-limited oscillator waveform from a running phase (in cycles)"""
+        if waveform not in self.WAVEFORMS:
+            waveform = 'sawtooth'
+        return oscillators.oscillator(phase, waveform)
+    
+    def _time_base(self, length):
+        """Time in seconds for the first length samples (shared, read-only)"""
+        if len(self._time) < length:
+            self._time = np.arange(length) / self.sample_rate
+            self._time.flags.writeable = False
+        return self._time[:length]
     
     def apply_filter(self, audio, cutoff_envelope, resonance):
-        """Apply resonant lowpass filter with envelope"""
-        output = np.zeros_like(audio)
-        
-        # Simple lowpass filter with envelope modulation
-        for i, cutoff in enumerate(cutoff_envelope):
-            # Normalize cutoff to Nyquist frequency
-            normalized_cutoff = min(cutoff / (self.sample_rate / 2), 0.99)
-            
-            # Create filter coefficients
-            b, a = signal.butter(2, normalized_cutoff, btype='low')
-            
-            # Apply filter to small window
-            window_size = min(1024, len(audio) - i)
-            if window_size > 0:
-                filtered = signal.lfilter(b, a, audio[i:i+window_size])
-                output[i:i+window_size] += filtered * (1.0 / len(cutoff_envelope))
+        """
+        Apply resonant lowpass filter with envelope
         
-        return output
+        Block-wise biquad: coefficients follow cutoff_envelope every
+        64 samples. Resonance 0-100 maps to Q 0.707-12.
+        """
+        q = 0.707 + (resonance / 100) * 11.3
+        return time_varying_biquad(audio, cutoff_envelope, q, self.sample_rate)
     
     def apply_envelope(self, length, attack=0.01, decay=0.3, sustain=0.7, release=0.1):
         """Generate ADSR envelope"""
@@ -98,25 +137,19 @@ class TB303:
             decay_samples = int(length * 0.3)
             release_samples = length - attack_samples - decay_samples
         
-        # Attack
-        attack_env = np.linspace(0, 1, attack_samples)
-        
-        # Decay
-        decay_env = np.linspace(1, sustain, decay_samples)
-        
-        # Sustain
-        sustain_env = np.ones(sustain_samples) * sustain
-        
-        # Release
-        release_env = np.linspace(sustain, 0, release_samples)
-        
-        envelope = np.concatenate([attack_env, decay_env, sustain_env, release_env])
-        
-        # Ensure exact length
-        if len(envelope) < length:
-            envelope = np.pad(envelope, (0, length - len(envelope)), constant_values=0)
-        elif len(envelope) > length:
-            envelope = envelope[:length]
+        # Segments are written straight into one buffer of exactly length
+        # samples (anything past the release stays zero)
+        envelope = silence(length)
+        position = 0
+        for segment in (
+            np.linspace(0, 1, attack_samples),         # Attack
+            np.linspace(1, sustain, decay_samples),    # Decay
+            np.full(sustain_samples, sustain),         # Sustain
+            np.linspace(sustain, 0, release_samples),  # Release
+        ):
+            count = min(len(segment), length - position)
+            envelope[position:position + count] = segment[:count]
+            position += count
         
         return envelope
     
@@ -127,103 +160,228 @@ class TB303:
         
         # Soft clipping with tanh
         gain = 1 + (amount / 100) * 4
-        return np.tanh(audio * gain) / gain
+        clipped = np.multiply(audio, gain)
+        np.tanh(clipped, out=clipped)
+        clipped /= gain
+        return clipped
     
     def synthesize_note(self, note, accent=False, slide=False, gate=False, duration=0.25):
         """Synthesize single 303 note"""
-        # Get frequency
-        frequency = self.note_frequencies.get(note, 130.81)
-        frequency *= np.power(2, self.params['tuning'] / 1200)
+        return self._cached_group(((note, bool(accent), bool(slide), bool(gate)),), duration).copy()
+    
+    def _cached_group(self, group, duration):
+        """
+        Return a memoized render of a legato group (read-only, shared)
         
-        # Generate oscillator
-        audio = self.generate_oscillator(frequency, duration, self.params['waveform'])
+        A 16-step line usually has only a few distinct steps, so pattern
+        renders become mostly buffer copies. Direct edits to self.params
+        are detected by comparing against the snapshot the memo was built
+        with.
+        """
+        if self.params != self._note_cache_params:
+            self.clear_note_cache()
         
-        # Calculate filter envelope
+        key = (group, duration, dsp_dtype().name)
+        audio = self._note_cache.get(key)
+        if audio is None:
+            if len(self._note_cache) >= self.NOTE_CACHE_SIZE:
+                self._note_cache.clear()
+            audio = self._render_group(group, duration)
+            audio.flags.writeable = False
+            self._note_cache[key] = audio
+        return audio
+    
+    def _render_note(self, note, accent, slide, gate, duration):
+        """Render a single 303 note from scratch"""
+        return self._render_group(((note, accent, slide, gate),), duration)
+    
+    @stage('synthesis')
+    def _render_group(self, group, duration, raw=False):
+        """
+        Render a legato group of (note, accent, slide, gate) steps
+        
+        Steps joined by slide share one oscillator phase accumulator and
+        one envelope; the pitch glides exponentially into each slid-to
+        note. A lone step is a group of one. raw=True skips the patch
+        gain (used to measure it).
+        """
+        step_samples = int(self.sample_rate * duration)
+        length = step_samples * len(group)
+        
+        # Get frequencies
+        tuning = np.power(2, self.params['tuning'] / 1200)
+        frequencies = np.array([self.note_frequencies.get(step[0], 130.81) for step in group]) * tuning
+        
+        # Per-sample pitch with glides into slid-to notes
+        pitch = np.repeat(frequencies, step_samples)
+        glide_samples = min(int(self.SLIDE_TIME * self.sample_rate), step_samples)
+        if len(group) > 1 and glide_samples > 0:
+            glide = 1 - np.exp(-5 * self._time_base(glide_samples) * self.sample_rate / glide_samples)
+            log_frequencies = np.log(frequencies)
+            for i in range(1, len(group)):
+                start = i * step_samples
+                pitch[start:start + glide_samples] = np.exp(
+                    log_frequencies[i - 1] + (log_frequencies[i] - log_frequencies[i - 1]) * glide
+                )
+        
+        # Generate oscillator from the running phase (continuous across the group)
+        phase = (np.cumsum(pitch) - pitch) / self.sample_rate
+        audio = as_dsp(self.oscillator_from_phase(phase, self.params['waveform']))
+        
+        # Calculate filter envelope (triggered by the first step of the group)
+        accent = group[0][1]
         base_cutoff = self.params['cutoff']
         env_amount = (self.params['env_mod'] / 100) * (base_cutoff * 2)
-        accent_mult = 1 + (self.params['accent_level'] / 100) if accent else 1
-        peak_cutoff = min(base_cutoff + (env_amount * accent_mult), 8000)
+        accent_mult = 1 + (self.params['accent_level'] / 100)
+        peak_cutoff = min(base_cutoff + (env_amount * (accent_mult if accent else 1)), 8000)
         
-        # Create cutoff envelope
-        decay_samples = int(self.params['decay'] * self.sample_rate)
-        cutoff_envelope = np.linspace(peak_cutoff, base_cutoff, len(audio))
+        # Create cutoff envelope: exponential decay from peak to base cutoff
+        t = self._time_base(length)
+        decay_time = max(self.params['decay'], 0.01)
+        # Accented notes decay faster, as on the original
+        if accent:
+            decay_time *= 0.5
+        cutoff_envelope = base_cutoff + (peak_cutoff - base_cutoff) * np.exp(-t * 4 / decay_time)
         
-        # Apply filter (simplified - use constant cutoff for performance)
-        normalized_cutoff = min(base_cutoff / (self.sample_rate / 2), 0.99)
-        b, a = signal.butter(2, normalized_cutoff, btype='low')
-        audio = signal.lfilter(b, a, audio)
+        # Apply time-varying resonant filter
+        audio = self.apply_filter(audio, cutoff_envelope, self.params['resonance'])
         
-        # Apply amplitude envelope
-        gate_time = 0.25 if gate else 0.1
-        env_length = int(min(gate_time, duration) * self.sample_rate)
+        # Amplitude envelope with the per-step accent folded in; gain changes
+        # between slid steps are ramped so the level never jumps in one sample
         amplitude_env = self.apply_envelope(
-            len(audio),
+            length,
             attack=0.001,
             decay=self.params['decay'],
             sustain=0.7,
             release=0.1
         )
+        step_gains = np.array([accent_mult if step[1] else 1.0 for step in group], dtype=dsp_dtype())
+        if np.any(step_gains != 1.0):
+            gains = np.repeat(step_gains, step_samples)
+            ramp_samples = min(max(int(self.ACCENT_RAMP * self.sample_rate), 1), step_samples)
+            for i in range(1, len(group)):
+                if step_gains[i] != step_gains[i - 1]:
+                    start = i * step_samples
+                    gains[start:start + ramp_samples] = np.linspace(
+                        step_gains[i - 1], step_gains[i], ramp_samples, endpoint=False
+                    )
+            amplitude_env *= gains
         
         audio *= amplitude_env
         
-        # Apply accent
-        if accent:
-            audio *= accent_mult
-        
         # Apply distortion
         if self.params['distortion'] > 0:
             audio = self.apply_distortion(audio, self.params['distortion'])
         
-        # Normalize
-        max_val = np.max(np.abs(audio))
-        if max_val > 0:
-            audio = audio / max_val * (self.params['volume'] / 100)
+        # One gain per patch rather than per note, so accents stay louder
+        # and slid steps keep their relative level
+        if not raw:
+            audio *= self._patch_gain()
         
         return audio
     
+    def _patch_gain(self):
+        """
+        Output gain that puts LEVEL_REFERENCE at volume/100
+        
+        Depends only on params (resonance, distortion, ...), never on the
+        note being rendered; recomputed when params change.
+        """
+        if self._level is None or self._level_params != self.params:
+            reference = self._render_group((self.LEVEL_REFERENCE,), self.LEVEL_REFERENCE_DURATION, raw=True)
+            peak = np.max(np.abs(reference)) if len(reference) else 0.0
+            self._level = (self.params['volume'] / 100) / peak if peak > 0 else 0.0
+            self._level_params = dict(self.params)
+        return self._level
+    
     def render_pattern(self, pattern, bpm=130):
         """Render 16-step pattern to audio"""
+        output = np.empty(self._step_samples(bpm) * len(pattern), dtype=dsp_dtype())
+        for _ in self._render_steps(output, pattern, bpm):
+            pass
+        return output
+    
+    def render_pattern_blocks(self, pattern, bpm=130, block_size=4096):
+        """
+        Render pattern incrementally, yielding fixed-size blocks
+        
+        Blocks are views into one preallocated output buffer and are
+        yielded as soon as the steps covering them are rendered, so
+        playback can start after the first step. The last block may
+        be shorter than block_size.
+        """
+        output = np.empty(self._step_samples(bpm) * len(pattern), dtype=dsp_dtype())
+        emitted = 0
+        for written in self._render_steps(output, pattern, bpm):
+            while written - emitted >= block_size:
+                yield output[emitted:emitted + block_size]
+                emitted += block_size
+        if emitted < len(output):
+            yield output[emitted:]
+    
+    @staticmethod
+    def _step_key(step):
+        """Memo key for one pattern step"""
+        return (
+            step['note'],
+            bool(step.get('accent', False)),
+            bool(step.get('slide', False)),
+            bool(step.get('gate', False))
+        )
+    
+    def _step_samples(self, bpm):
+        """Samples per 16th-note step"""
+        return int((60.0 / bpm) / 4 * self.sample_rate)
+    
+    def _render_steps(self, output, pattern, bpm):
+        """
+        Render steps into output, yielding the number of samples written
+        
+        Notes are rendered at the patch level, where an accented note
+        peaks at volume/100, so a fixed output gain gives the pattern its
+        level without waiting for the whole pattern; a hard limit guards
+        against overs.
+        """
         # Calculate step duration (16th notes)
         step_duration = (60.0 / bpm) / 4
+        step_samples = self._step_samples(bpm)
         
-        # Render each step
-        audio_chunks = []
+        volume = self.params['volume'] / 100
+        gain = self.OUTPUT_PEAK / volume if volume > 0 else 0.0
         
-        for step in pattern:
-            if step['active']:
-                note_audio = self.synthesize_note(
-                    step['note'],
-                    step.get('accent', False),
-                    step.get('slide', False),
-                    step.get('gate', False),
-                    step_duration
-                )
-            else:
+        position = 0
+        index = 0
+        while index < len(pattern):
+            step = pattern[index]
+            if not step['active']:
                 # Silent step
-                note_audio = np.zeros(int(step_duration * self.sample_rate))
+                output[position:position + step_samples] = 0
+                position += step_samples
+                index += 1
+                yield position
+                continue
             
-            audio_chunks.append(note_audio)
-        
-        # Concatenate all steps
-        full_audio = np.concatenate(audio_chunks)
-        
-        # Normalize final output
-        max_val = np.max(np.abs(full_audio))
-        if max_val > 0:
-            full_audio = full_audio / max_val * 0.9
-        
-        return full_audio
+            # A slide ties this step to the next active one
+            group = [self._step_key(step)]
+            while step.get('slide', False) and index + 1 < len(pattern) and pattern[index + 1]['active']:
+                index += 1
+                step = pattern[index]
+                group.append(self._step_key(step))
+            index += 1
+            
+            group_audio = self._cached_group(tuple(group), step_duration)
+            segment = output[position:position + len(group_audio)]
+            np.multiply(group_audio, gain, out=segment)
+            np.clip(segment, -1.0, 1.0, out=segment)
+            
+            position += len(group_audio)
+            yield position
     
     def export_wav(self, audio, filename):
         """Export audio to WAV file"""
         try:
-            from scipy.io import wavfile
-            
-            # Convert to 16-bit PCM
-            audio_int16 = np.int16(audio * 32767)
-            
-            # Write WAV file
-            wavfile.write(filename, self.sample_rate, audio_int16)
+            # Clip, convert to 16-bit PCM and write in one pass
+            wav_io.write_wav(filename, audio, self.sample_rate)
             return True
         except Exception as e:
             print(f"Error exporting WAV: {e}")
@@ -238,6 +396,7 @@ class TB303:
         
         if 'params' in data:
             self.params.update(data['params'])
+            self.clear_note_cache()
         
         return data.get('pattern', [])
 
@@ -5,6 +5,8 @@ Generates drum sounds using NumPy/SciPy synthesis
 Features:
 - 6 drum voices: Kick, Hat, Clap, Perc, Ride, Crash
 - Multiple variations per voice
+- Seedable noise for reproducible renders
+- Buffers in the DSP dtype (float32 by default, see dsp_dtype.py)
 - WAV file export
 """
 
@@ -12,14 +14,39 @@ import numpy as np
 from scipy import signal
 import json
 
+import wav_io
+from dsp_cache import butter
+from dsp_dtype import as_dsp, dsp_dtype, exp_decay, filter_coefficients, silence
+from stage_timing import stage
+
 
 class TR808:
     """TR-808 Drum Machine Synthesizer"""
     
-    def __init__(self, sample_rate=44100):
+    # Named variations per voice (the generator's first entry is its default)
+    VARIATIONS = {
+        'kick': ['classic', 'deep', 'punchy', 'sub', 'acid', 'minimal',
+                 'rumble', 'tribal', 'distorted', 'fm'],
+        'hat': ['classic', 'tight', 'open', 'crispy'],
+        'clap': ['classic', 'tight', 'reverb'],
+        'perc': ['conga', 'tom', 'cowbell', 'wood'],
+        'ride': ['classic', 'bell', 'ping'],
+        'crash': ['classic', 'splash', 'china']
+    }
+    
+    def __init__(self, sample_rate=44100, seed=None):
         self.sample_rate = sample_rate
         self.master_volume = 0.7
+        self.rng = np.random.default_rng(seed)
+    
+    def generate(self, voice, variation=None):
+        """Generate any voice by name ('kick', 'hat', ...)"""
+        if voice not in self.VARIATIONS:
+            raise ValueError(f"Unknown voice '{voice}' (expected one of {', '.join(self.VARIATIONS)})")
+        generator = getattr(self, f'generate_{voice}')
+        return generator(variation) if variation else generator()
     
+    @stage('synthesis')
     def generate_kick(self, variation='classic'):
         """Generate kick drum sound"""
         variations = {
@@ -48,25 +75,21 @@ class TR808:
         phase = np.cumsum(2 * np.pi * freq_envelope / self.sample_rate)
         
         # Generate waveform
-        if waveform == 'sine':
-            audio = np.sin(phase)
-        elif waveform == 'triangle':
-            audio = signal.sawtooth(phase, 0.5)
+        if waveform == 'triangle':
+            audio = as_dsp(signal.sawtooth(phase, 0.5))
         else:
-            audio = np.sin(phase)
+            audio = np.sin(phase, out=silence(len(t)))
         
         # Amplitude envelope
-        envelope = np.exp(-3 * t / duration)
-        audio *= envelope
+        audio *= exp_decay(t, 3 / duration)
         
         # Distortion
         if distort:
-            audio = np.tanh(audio * 2)
+            audio *= 2
+            np.tanh(audio, out=audio)
         
         # Normalize and apply volume
-        audio = audio / np.max(np.abs(audio)) * volume * self.master_volume
-        
-        return audio
+        return self._normalize(audio, volume)
     
     def _synth_kick_filtered(self, start_freq, end_freq, duration, volume, filter_freq, resonance):
         """Kick with filter sweep (acid kick)"""
@@ -74,8 +97,9 @@ class TR808:
         
         # Apply lowpass filter with sweep
         cutoff = min(filter_freq / (self.sample_rate / 2), 0.99)
-        b, a = signal.butter(2, cutoff, btype='low')
-        audio = signal.lfilter(b, a, audio)
+        b, a = butter(2, cutoff, btype='low')
+        with stage('filtering'):
+            audio = signal.lfilter(filter_coefficients(b), filter_coefficients(a), audio)
         
         return audio
     
@@ -89,17 +113,15 @@ class TR808:
         # Carrier with FM
         carrier_freq_sweep = np.linspace(carrier_freq, carrier_freq * 0.3, len(t))
         phase = np.cumsum(2 * np.pi * carrier_freq_sweep / self.sample_rate)
-        audio = np.sin(phase + mod * 100)
+        audio = np.sin(phase + mod * 100, out=silence(len(t)))
         
         # Envelope
-        envelope = np.exp(-3 * t / duration)
-        audio *= envelope
+        audio *= exp_decay(t, 3 / duration)
         
         # Normalize
-        audio = audio / np.max(np.abs(audio)) * volume * self.master_volume
-        
-        return audio
+        return self._normalize(audio, volume)
     
+    @stage('synthesis')
     def generate_hat(self, variation='classic'):
         """Generate hi-hat sound"""
         variations = {
@@ -113,46 +135,24 @@ class TR808:
             return variations[variation]()
         return variations['classic']()
     
+    @stage('synthesis')
     def generate_clap(self, variation='classic'):
         """Generate clap sound"""
+        # Bursts as (decay, volume, start_offset); all share one highpass
         if variation == 'classic':
             # Multiple short bursts
-            claps = [
-                self._synth_noise(0.1, 2000, 0.5, start_offset=0),
-                self._synth_noise(0.1, 2000, 0.5, start_offset=0.03),
-                self._synth_noise(0.1, 2000, 0.5, start_offset=0.06)
-            ]
-            max_len = max(len(c) for c in claps)
-            audio = np.zeros(max_len)
-            for clap in claps:
-                audio[:len(clap)] += clap
-            return audio / 3
+            return self._synth_noise_bursts([(0.1, 0.5, 0), (0.1, 0.5, 0.03), (0.1, 0.5, 0.06)], 2000)
         elif variation == 'tight':
-            claps = [
-                self._synth_noise(0.08, 3000, 0.45, start_offset=0),
-                self._synth_noise(0.08, 3000, 0.45, start_offset=0.02)
-            ]
-            max_len = max(len(c) for c in claps)
-            audio = np.zeros(max_len)
-            for clap in claps:
-                audio[:len(clap)] += clap
-            return audio / 2
+            return self._synth_noise_bursts([(0.08, 0.45, 0), (0.08, 0.45, 0.02)], 3000)
         elif variation == 'reverb':
             # Multiple decaying bursts
-            claps = []
             offsets = [0, 0.03, 0.06, 0.1, 0.15]
-            for i, offset in enumerate(offsets):
-                decay = 0.1 + (i * 0.02)
-                vol = 0.5 - (i * 0.08)
-                claps.append(self._synth_noise(decay, 2000, vol, start_offset=offset))
-            max_len = max(len(c) for c in claps)
-            audio = np.zeros(max_len)
-            for clap in claps:
-                audio[:len(clap)] += clap
-            return audio / len(claps)
+            bursts = [(0.1 + (i * 0.02), 0.5 - (i * 0.08), offset) for i, offset in enumerate(offsets)]
+            return self._synth_noise_bursts(bursts, 2000)
         else:
             return self._synth_noise(0.05, 4000, 0.6)
     
+    @stage('synthesis')
     def generate_perc(self, variation='conga'):
         """Generate percussion sound"""
         variations = {
@@ -166,6 +166,7 @@ class TR808:
             return variations[variation]()
         return variations['conga']()
     
+    @stage('synthesis')
     def generate_ride(self, variation='classic'):
         """Generate ride cymbal"""
         variations = {
@@ -178,6 +179,7 @@ class TR808:
             return variations[variation]()
         return variations['classic']()
     
+    @stage('synthesis')
     def generate_crash(self, variation='classic'):
         """Generate crash cymbal"""
         variations = {
@@ -192,27 +194,44 @@ class TR808:
     
     def _synth_noise(self, duration, filter_freq, volume, start_offset=0):
         """Generate filtered noise burst"""
-        total_duration = duration + start_offset
-        t = np.linspace(0, total_duration, int(self.sample_rate * total_duration), False)
-        
-        # White noise
-        noise = np.random.uniform(-1, 1, len(t))
-        
-        # Highpass filter
+        return self._synth_noise_bursts([(duration, volume, start_offset)], filter_freq)
+    
+    def _synth_noise_bursts(self, bursts, filter_freq):
+        """
+        Generate several filtered noise bursts and mix them
+        
+        bursts is a list of (duration, volume, start_offset); each burst
+        lasts duration + start_offset. All bursts are rendered as rows of
+        one noise matrix with a single highpass pass along the time axis,
+        then averaged.
+        """
+        durations, volumes, offsets = (np.array(column, dtype=float) for column in zip(*bursts))
+        total_durations = durations + offsets
+        lengths = np.maximum((self.sample_rate * total_durations).astype(int), 1)
+        max_length = int(lengths.max())
+        samples = np.arange(max_length)
+        
+        # White noise, one row per burst
+        noise = as_dsp(self.rng.uniform(-1, 1, (len(bursts), max_length)))
+        
+        # Highpass filter (causal, so samples past a row's length never leak back)
         cutoff = min(filter_freq / (self.sample_rate / 2), 0.99)
-        b, a = signal.butter(2, cutoff, btype='high')
-        audio = signal.lfilter(b, a, noise)
-        
-        # Envelope
-        envelope = np.exp(-5 * t / total_duration)
+        b, a = butter(2, cutoff, btype='high')
+        with stage('filtering'):
+            audio = signal.lfilter(filter_coefficients(b), filter_coefficients(a), noise, axis=1)
+        
+        # Envelope exp(-5 * t / total_duration), zeroed past the end of each burst
+        envelope = np.multiply((-5.0 / lengths)[:, None], samples, dtype=dsp_dtype())
+        envelope[samples >= lengths[:, None]] = -np.inf
+        np.exp(envelope, out=envelope)
         audio *= envelope
         
-        # Normalize
-        max_val = np.max(np.abs(audio))
-        if max_val > 0:
-            audio = audio / max_val * volume * self.master_volume
-        
-        return audio
+        # Normalize each burst, then mix
+        max_vals = np.max(np.abs(audio), axis=1)
+        gains = np.divide(volumes * self.master_volume, max_vals, out=np.zeros_like(max_vals), where=max_vals > 0)
+        mix = gains @ audio
+        mix /= len(bursts)
+        return mix
     
     def _synth_tonal(self, frequency, duration, volume):
         """Generate tonal percussion (toms, congas)"""
@@ -223,50 +242,48 @@ class TR808:
         phase = np.cumsum(2 * np.pi * freq_sweep / self.sample_rate)
         
         # Sine wave
-        audio = np.sin(phase)
+        audio = np.sin(phase, out=silence(len(t)))
         
         # Envelope
-        envelope = np.exp(-3 * t / duration)
-        audio *= envelope
+        audio *= exp_decay(t, 3 / duration)
         
         # Normalize
-        audio = audio / np.max(np.abs(audio)) * volume * self.master_volume
-        
-        return audio
+        return self._normalize(audio, volume)
     
     def _synth_metallic(self, frequencies, duration, volume):
         """Generate metallic sound (cymbals)"""
         t = np.linspace(0, duration, int(self.sample_rate * duration), False)
         
-        # Combine multiple frequencies (square waves for metallic timbre)
-        audio = np.zeros(len(t))
-        for freq in frequencies:
-            audio += signal.square(2 * np.pi * freq * t)
+        # Combine multiple frequencies (square waves for metallic timbre),
+        # one row per partial: +1 for the first half of each cycle, -1 after
+        cycles = np.outer(frequencies, t) % 1.0
+        audio = as_dsp(np.count_nonzero(cycles < 0.5, axis=0))
+        audio *= 2
+        audio -= len(frequencies)
         
         # Normalize components
-        audio = audio / len(frequencies)
+        audio /= len(frequencies)
         
         # Envelope
-        envelope = np.exp(-2 * t / duration)
-        audio *= envelope
+        audio *= exp_decay(t, 2 / duration)
         
         # Normalize
-        max_val = np.max(np.abs(audio))
+        return self._normalize(audio, volume)
+    
+    def _normalize(self, audio, volume):
+        """Scale audio in place so its peak is volume * master_volume (silence stays silent)"""
+        max_val = np.max(np.abs(audio)) if len(audio) else 0
         if max_val > 0:
-            audio = audio / max_val * volume * self.master_volume
-        
+            audio /= max_val
+            audio *= volume
+            audio *= self.master_volume
         return audio
     
     def export_wav(self, audio, filename):
         """Export audio to WAV file"""
         try:
-            from scipy.io import wavfile
-            
-            # Convert to 16-bit PCM
-            audio_int16 = np.int16(audio * 32767)
-            
-            # Write WAV file
-            wavfile.write(filename, self.sample_rate, audio_int16)
+            # Clip, convert to 16-bit PCM and write in one pass
+            wav_io.write_wav(filename, audio, self.sample_rate)
             return True
         except Exception as e:
             print(f"Error exporting WAV: {e}")
@@ -0,0 +1,160 @@
+"""
+TR-808 Sample Bank - Python Backend
+Every TR-808 variation rendered once and stored memory-mapped on disk
+
+Features:
+- All voices/variations in one contiguous float32 .npy file
+- JSON index of (offset, length) per variation
+- Memory-mapped read-only, so worker processes share one copy in the page cache
+- Zero-copy lookups (slices of the mapped array)
+- Rebuilt automatically when the sample rate, seed or the source of tr808.py
+  (or a project module it imports, e.g. dsp_cache) changes
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from tr808 import TR808
+
+BANK_FORMAT = 1
+DEFAULT_SEED = 808
+
+
+def _project_modules(module):
+    """module plus the synthesis modules it imports, directly or indirectly"""
+    directory = os.path.dirname(os.path.abspath(module.__file__))
+    found = {}
+    pending = [module]
+    while pending:
+        current = pending.pop()
+        if current.__name__ in found:
+            continue
+        found[current.__name__] = current
+        for value in vars(current).values():
+            imported = value if isinstance(value, type(sys)) else sys.modules.get(getattr(value, '__module__', None))
+            filename = getattr(imported, '__file__', None)
+            if filename and os.path.dirname(os.path.abspath(filename)) == directory:
+                pending.append(imported)
+    return [found[name] for name in sorted(found)]
+
+
+def _source_hash():
+    """Hash of the synthesis code the bank was rendered with (tr808 and what it imports)"""
+    import tr808
+    digest = hashlib.sha256()
+    for module in _project_modules(tr808):
+        digest.update(f"{module.__name__}\n".encode())
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _atomic_write(path, write):
+    """Write via a temp file in the same directory, then rename into place"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class TR808Bank:
+    """Precomputed, memory-mapped TR-808 samples"""
+
+    def __init__(self, samples, index, version):
+        self.samples = samples
+        self.index = index
+        self.version = version
+
+    @staticmethod
+    def version_key(sample_rate, seed=DEFAULT_SEED):
+        """Identifies bank contents; a mismatch forces a rebuild"""
+        return f"v{BANK_FORMAT}-{sample_rate}-{seed}-{_source_hash()}"
+
+    @classmethod
+    def render(cls, sample_rate=44100, seed=DEFAULT_SEED):
+        """Render every variation into one contiguous in-memory bank"""
+        drums = TR808(sample_rate=sample_rate, seed=seed)
+        rendered = []
+        index = {}
+        offset = 0
+        for voice, variations in TR808.VARIATIONS.items():
+            index[voice] = {}
+            for variation in variations:
+                audio = np.asarray(drums.generate(voice, variation), dtype=np.float32)
+                rendered.append(audio)
+                index[voice][variation] = [offset, len(audio)]
+                offset += len(audio)
+
+        samples = np.concatenate(rendered)
+        samples.flags.writeable = False
+        return cls(samples, index, cls.version_key(sample_rate, seed))
+
+    def save(self, directory):
+        """Write samples and index to directory (atomically)"""
+        os.makedirs(directory, exist_ok=True)
+        samples_path, index_path = self.paths(directory, self.version)
+        _atomic_write(samples_path, lambda f: np.save(f, self.samples))
+
+        # Index last: a readable index implies complete samples
+        index = {'version': self.version, 'voices': self.index}
+        _atomic_write(index_path, lambda f: f.write(json.dumps(index).encode()))
+
+    @staticmethod
+    def paths(directory, version):
+        """Sample and index file paths for a bank version"""
+        base = os.path.join(directory, f'tr808-{version}')
+        return base + '.npy', base + '.json'
+
+    @classmethod
+    def load(cls, directory, sample_rate=44100, seed=DEFAULT_SEED):
+        """Map a saved bank, or return None if it is missing or stale"""
+        version = cls.version_key(sample_rate, seed)
+        samples_path, index_path = cls.paths(directory, version)
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+            if index.get('version') != version:
+                return None
+            samples = np.load(samples_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        return cls(samples, index['voices'], version)
+
+    @classmethod
+    def open(cls, directory, sample_rate=44100, seed=DEFAULT_SEED):
+        """Load the bank from directory, rendering and saving it first if needed"""
+        bank = cls.load(directory, sample_rate, seed)
+        if bank is None:
+            cls.render(sample_rate, seed).save(directory)
+            bank = cls.load(directory, sample_rate, seed)
+        return bank
+
+    def get(self, voice, variation):
+        """Return a read-only view of one sample, or None if it is not in the bank"""
+        entry = self.index.get(voice, {}).get(variation)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self.samples[offset:offset + length]
+
+    def stats(self):
+        """Size summary for health/metrics output"""
+        return {
+            'version': self.version,
+            'samples': int(len(self.samples)),
+            'bytes': int(self.samples.nbytes),
+            'variations': sum(len(v) for v in self.index.values()),
+            'mapped': isinstance(self.samples, np.memmap)
+        }
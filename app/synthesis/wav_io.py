@@ -0,0 +1,190 @@
+"""
+WAV Encoder - Python Backend
+Writes RIFF/WAVE files without the wave module round trip
+
+Features:
+- Canonical 44-byte header packed with one precompiled struct
+- 16-bit and 24-bit PCM and 32-bit float samples, any channel count
+  (1-D arrays are mono, 2-D arrays are frames x channels)
+- Float input clipped and quantised straight into the destination
+  buffer in fixed-size blocks; the caller's array is never modified
+- int16 input for 16-bit files and float32 input for float files is
+  written as a memoryview of the array itself
+- Targets: a new bytearray (encode_wav), or a path, file object or
+  socket (write_wav)
+"""
+
+import os
+import struct
+
+import numpy as np
+
+from dsp_dtype import dsp_dtype
+from stage_timing import stage
+
+HEADER_SIZE = 44
+BLOCK_FRAMES = 16384
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+
+# sample format -> (format tag, bits per sample)
+SAMPLE_FORMATS = {
+    'pcm16': (WAVE_FORMAT_PCM, 16),
+    'pcm24': (WAVE_FORMAT_PCM, 24),
+    'float32': (WAVE_FORMAT_IEEE_FLOAT, 32),
+}
+
+_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+_FULL_SCALE = {'pcm16': 32767, 'pcm24': 8388607}
+
+
+def _format(sample_format):
+    try:
+        return SAMPLE_FORMATS[sample_format]
+    except KeyError:
+        raise ValueError(f"Unknown sample format '{sample_format}' "
+                         f"(expected one of {', '.join(SAMPLE_FORMATS)})") from None
+
+
+def _shape(samples):
+    """(frames, channels) of a mono or frames x channels array"""
+    if samples.ndim == 1:
+        return len(samples), 1
+    if samples.ndim == 2:
+        return samples.shape
+    raise ValueError(f"Expected a 1-D or 2-D sample array, got {samples.ndim}-D")
+
+
+def wav_header(frames, sample_rate, channels=1, sample_format='pcm16'):
+    """44-byte RIFF/WAVE header for frames x channels samples"""
+    format_tag, bits = _format(sample_format)
+    block_align = channels * bits // 8
+    data_size = frames * block_align
+    return _HEADER.pack(
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, format_tag, channels, sample_rate, sample_rate * block_align, block_align, bits,
+        b'data', data_size
+    )
+
+
+def _direct_view(samples, sample_format, gain):
+    """The array's own bytes, if they already are the encoded samples"""
+    if gain != 1.0 or not samples.flags.c_contiguous:
+        return None
+    expected = {'pcm16': np.dtype('<i2'), 'float32': np.dtype('<f4')}.get(sample_format)
+    if expected is not None and samples.dtype == expected:
+        return memoryview(samples).cast('B')
+    return None
+
+
+def _encode_block(block, sample_format, gain, scratch, out):
+    """Encode one block of interleaved samples into the byte buffer out"""
+    n = len(block)
+    if sample_format == 'float32':
+        target = np.frombuffer(out, dtype='<f4', count=n)
+        if np.issubdtype(block.dtype, np.integer):
+            scale = gain / (np.iinfo(block.dtype).max + 1)
+            np.multiply(block, scale, out=target, casting='unsafe')
+        else:
+            np.multiply(block, gain, out=target, casting='same_kind')
+        return
+
+    full_scale = _FULL_SCALE[sample_format]
+    if np.issubdtype(block.dtype, np.integer):
+        # Integer PCM is rescaled to the target width
+        scale = gain * (full_scale + 1) / (np.iinfo(block.dtype).max + 1)
+        limit = full_scale
+    else:
+        # As quantize_int16: clip to [-1, 1] before the gain (never past full scale)
+        scale = gain * full_scale
+        limit = min(abs(scale), full_scale)
+    work = scratch[:n]
+    np.multiply(block, scale, out=work, casting='unsafe')
+    np.clip(work, -limit, limit, out=work)
+
+    if sample_format == 'pcm16':
+        np.copyto(np.frombuffer(out, dtype='<i2', count=n), work, casting='unsafe')
+    else:
+        # 24-bit: the low three bytes of each little-endian int32
+        wide = np.empty(n, dtype='<i4')
+        np.copyto(wide, work, casting='unsafe')
+        target = np.frombuffer(out, dtype=np.uint8, count=3 * n).reshape(n, 3)
+        target[:] = wide.view(np.uint8).reshape(n, 4)[:, :3]
+
+
+def _encode_blocks(samples, sample_format, gain, out=None):
+    """
+    Yield the encoded sample data as memoryviews
+
+    With out (a writable buffer of the full data size) every block is
+    encoded into it in place; otherwise one block-sized buffer is reused,
+    so each view is only valid until the next one is requested.
+    """
+    direct = _direct_view(samples, sample_format, gain)
+    if direct is not None:
+        if out is not None:
+            out[:] = direct
+        yield direct
+        return
+
+    bytes_per_sample = SAMPLE_FORMATS[sample_format][1] // 8
+    flat = samples.reshape(-1)
+    block_samples = BLOCK_FRAMES * _shape(samples)[1]
+    scratch = np.empty(min(block_samples, len(flat)), dtype=dsp_dtype())
+    block_buffer = None if out is not None else bytearray(len(scratch) * bytes_per_sample)
+
+    for start in range(0, len(flat), block_samples):
+        block = flat[start:start + block_samples]
+        size = len(block) * bytes_per_sample
+        if out is not None:
+            target = out[start * bytes_per_sample:start * bytes_per_sample + size]
+        else:
+            target = memoryview(block_buffer)[:size]
+        _encode_block(block, sample_format, gain, scratch, target)
+        yield target
+
+
+@stage('encode')
+def encode_wav(samples, sample_rate, sample_format='pcm16', gain=1.0):
+    """
+    Encode samples as a complete WAV file in one new bytearray
+
+    Float samples are nominally in [-1, 1]: they are scaled by gain and
+    clipped to full scale (float32 output is not clipped). Integer
+    samples are rescaled to the target width.
+    """
+    samples = np.asarray(samples)
+    frames, channels = _shape(samples)
+    data_size = frames * channels * SAMPLE_FORMATS[sample_format][1] // 8
+
+    encoded = bytearray(HEADER_SIZE + data_size)
+    encoded[:HEADER_SIZE] = wav_header(frames, sample_rate, channels, sample_format)
+    for _ in _encode_blocks(samples, sample_format, gain, memoryview(encoded)[HEADER_SIZE:]):
+        pass
+    return encoded
+
+
+@stage('encode')
+def write_wav(target, samples, sample_rate, sample_format='pcm16', gain=1.0):
+    """
+    Write samples as a WAV file to a path, file object or socket
+
+    Samples are encoded block by block and written as they are produced,
+    so no full-size copy is made. Returns the number of bytes written.
+    """
+    samples = np.asarray(samples)
+    frames, channels = _shape(samples)
+    header = wav_header(frames, sample_rate, channels, sample_format)
+
+    if isinstance(target, (str, bytes, os.PathLike)):
+        with open(target, 'wb') as f:
+            return write_wav(f, samples, sample_rate, sample_format, gain)
+
+    send = target.sendall if hasattr(target, 'sendall') else target.write
+    send(header)
+    written = len(header)
+    for view in _encode_blocks(samples, sample_format, gain):
+        send(view)
+        written += len(view)
+    return written
@@ -3,15 +3,38 @@ HAOS.fm Audio Engine - Python Synthesis Backend
 Replaces WebView bridge with reliable FastAPI backend
 """
 
-from fastapi import FastAPI, WebSocket, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 import numpy as np
 from scipy import signal
+import asyncio
 import base64
-import io
-import wave
-from typing import Optional
+import json
+import os
+import struct
+import sys
+from typing import List, Literal, Optional
+
+SYNTHESIS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'synthesis')
+if SYNTHESIS_DIR not in sys.path:
+    sys.path.insert(0, SYNTHESIS_DIR)
+
+import pattern_renderer  # noqa: E402
+import audio_formats  # noqa: E402
+import oscillators  # noqa: E402
+from dsp_cache import butter  # noqa: E402
+from dsp_dtype import as_dsp, exp_decay, filter_coefficients, silence  # noqa: E402
+from reverb import apply_reverb as convolution_reverb  # noqa: E402
+import stage_timing  # noqa: E402
+from stage_timing import stage  # noqa: E402
+from wav_io import HEADER_SIZE, encode_wav  # noqa: E402
+from metrics import (CONTENT_TYPE as METRICS_CONTENT_TYPE, STAGE_BUCKETS, MetricsMiddleware,  # noqa: E402
+                     MetricsRegistry, resident_memory_bytes)
+from render_cache import RenderCache, canonical_key, params_to_dict  # noqa: E402
+from render_executor import ExecutorSaturated, RenderExecutor, RenderTimeout  # noqa: E402
+from voice_stream import VoiceStream  # noqa: E402
 
 app = FastAPI(title="HAOS.fm Audio Engine", version="1.0.0")
 
@@ -27,6 +50,56 @@ app.add_middleware(
 # Global constants
 SAMPLE_RATE = 44100
 
+# Binary response settings
+WAV_HEADER_SIZE = HEADER_SIZE  # Canonical RIFF/WAVE header written by wav_io
+STREAM_CHUNK_SIZE = 16384  # Bytes per streamed chunk
+
+# Accept header media types mapped to response encodings
+WAV_MEDIA_TYPES = ('audio/wav', 'audio/x-wav', 'audio/wave', 'audio/*')
+PCM_MEDIA_TYPES = ('audio/l16', 'application/octet-stream')
+
+# Convolution reverb decay (RT60) bounds in seconds; requests are clamped
+REVERB_DECAY_RANGE = (0.1, 6.0)
+
+# Upper bound on voices rendered by one /api/audio/batch request
+MAX_BATCH_VOICES = 64
+
+# Limits for /api/render/pattern
+MAX_PATTERN_BARS = 64
+PATTERN_BPM_RANGE = (40.0, 300.0)
+
+# Rendered WAV cache shared by all endpoints
+RENDER_CACHE_MAX_BYTES = int(os.environ.get('AUDIO_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+render_cache = RenderCache(max_bytes=RENDER_CACHE_MAX_BYTES)
+
+# DSP executor: keeps renders off the event loop with bounded queueing
+render_executor = RenderExecutor(
+    kind=os.environ.get('AUDIO_EXECUTOR', 'thread'),
+    max_workers=int(os.environ.get('AUDIO_EXECUTOR_WORKERS', 0)) or None,
+    max_queue=int(os.environ.get('AUDIO_EXECUTOR_QUEUE', 64)),
+    timeout=float(os.environ.get('AUDIO_RENDER_TIMEOUT', 10.0)),
+)
+
+# Prometheus metrics served on /metrics
+metrics = MetricsRegistry()
+http_requests = metrics.counter(
+    'haos_http_requests_total', 'HTTP requests by endpoint and status', ('method', 'endpoint', 'status'))
+http_latency = metrics.histogram(
+    'haos_http_request_duration_seconds', 'HTTP request latency until the last body chunk', ('method', 'endpoint'))
+stage_latency = metrics.histogram(
+    'haos_render_stage_seconds', 'Time per render stage, excluding nested stages', ('stage',), STAGE_BUCKETS)
+metrics.gauge('haos_executor_queue_depth', 'Renders waiting for a worker', lambda: render_executor.queue_depth)
+metrics.gauge('haos_executor_in_flight', 'Renders running or queued', lambda: render_executor.stats()['in_flight'])
+metrics.counter_callback('haos_executor_rejected_total', 'Renders rejected with 429', lambda: render_executor.rejected)
+metrics.counter_callback('haos_executor_timeouts_total', 'Renders that timed out with 503', lambda: render_executor.timeouts)
+metrics.gauge('haos_render_cache_hit_ratio', 'Render cache hits / lookups', lambda: render_cache.stats()['hit_ratio'])
+metrics.counter_callback('haos_render_cache_hits_total', 'Render cache hits', lambda: render_cache.stats()['hits'])
+metrics.counter_callback('haos_render_cache_misses_total', 'Render cache misses', lambda: render_cache.stats()['misses'])
+metrics.gauge('haos_render_cache_bytes', 'Bytes held by the render cache', lambda: render_cache.stats()['bytes'])
+metrics.gauge('process_resident_memory_bytes', 'Resident memory of the server process', resident_memory_bytes)
+stage_timing.add_observer(lambda name, seconds: stage_latency.observe(seconds, stage=name))
+app.add_middleware(MetricsMiddleware, requests=http_requests, latency=http_latency)
+
 # Parameter models
 class KickParams(BaseModel):
     frequency: float = 150.0
@@ -39,21 +112,31 @@ class SnareParams(BaseModel):
     noise_amount: float = 0.7
     decay: float = 0.15
     velocity: float = 1.0
+    seed: Optional[int] = None  # Set for reproducible, cacheable noise
 
 class HiHatParams(BaseModel):
     noise_freq: float = 8000.0
     decay: float = 0.05
     velocity: float = 0.8
+    open: bool = False
+    seed: Optional[int] = None  # Set for reproducible, cacheable noise
 
 class ClapParams(BaseModel):
     decay: float = 0.1
     velocity: float = 1.0
+    seed: Optional[int] = None  # Set for reproducible, cacheable noise
 
 class SynthParams(BaseModel):
     frequency: float = 440.0
-    duration: float = 0.5
+    duration: float = 0.5  # Note length including release (at least attack + decay + release)
     velocity: float = 0.8
-    waveform: str = 'sine'
+    waveform: Literal['sine', 'sawtooth', 'square', 'triangle'] = 'sine'
+    detune: float = 0.02  # Oscillator 2 offset as a fraction of frequency
+    attack: float = 0.01
+    decay: float = 0.1
+    sustain: float = 0.7
+    release: float = 0.2
+    filter_cutoff: float = 2000.0
 
 class ChordParams(BaseModel):
     root_frequency: float = 261.63  # Middle C
@@ -61,12 +144,16 @@ class ChordParams(BaseModel):
     duration: float = 1.0
     velocity: float = 0.8
     instrument: str = 'piano'  # piano, organ, synth
+    reverb: float = 0.0  # Reverb wet mix (0 = dry)
+    reverb_decay: float = 1.2  # Reverb decay time in seconds
 
 class BrassParams(BaseModel):
     frequency: float = 440.0
     duration: float = 0.5
     velocity: float = 0.8
     instrument: str = 'trumpet'  # trumpet, horn, trombone
+    reverb: float = 0.0  # Reverb wet mix (0 = dry)
+    reverb_decay: float = 1.2  # Reverb decay time in seconds
 
 class StringParams(BaseModel):
     frequency: float = 440.0
@@ -75,6 +162,55 @@ class StringParams(BaseModel):
     vibrato_rate: float = 5.0
     vibrato_depth: float = 0.01
     instrument: str = 'violin'  # violin, viola, cello
+    reverb: float = 0.0  # Reverb wet mix (0 = dry)
+    reverb_decay: float = 1.2  # Reverb decay time in seconds
+
+# Batch request
+class BatchVoice(BaseModel):
+    voice: str  # kick, snare, hihat, clap, synth, chord, brass, strings
+    params: dict = {}
+    id: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    voices: List[BatchVoice]
+
+# Pattern render request
+class TB303Step(BaseModel):
+    active: bool = True
+    note: str = 'C3'
+    accent: bool = False
+    slide: bool = False
+    gate: bool = False
+
+class TB303Track(BaseModel):
+    pattern: List[TB303Step]
+    params: dict = {}  # TB303.params overrides (cutoff, resonance, env_mod, ...), checked by validate_pattern
+    level: float = 1.0
+
+class DrumLane(BaseModel):
+    voice: str  # kick, hat, clap, perc, ride, crash
+    variation: Optional[str] = None  # Default: the voice's first variation (classic, or conga for perc)
+    steps: List[float]  # Velocity per step, 0 = rest; loops over its length
+    level: float = 1.0
+
+class ARP2600Note(BaseModel):
+    step: int = Field(ge=0)  # Absolute step position
+    frequency: float = 440.0
+    length: int = Field(1, ge=1)  # In steps
+    velocity: float = Field(1.0, ge=0.0, le=1.0)
+
+class ARP2600Track(BaseModel):
+    preset: Optional[str] = None  # bass, lead, pad, pluck, brass
+    notes: List[ARP2600Note] = []
+    level: float = 1.0
+
+class PatternRequest(BaseModel):
+    bpm: float = 130.0
+    bars: int = 1
+    steps_per_bar: int = 16
+    tb303: Optional[TB303Track] = None
+    drums: List[DrumLane] = []
+    arp2600: Optional[ARP2600Track] = None
 
 # ARP 2600 Parameters
 class ARP2600Params(BaseModel):
@@ -109,6 +245,7 @@ class Synthesizer:
     """DSP synthesis engine using NumPy/SciPy"""
     
     @staticmethod
+    @stage('synthesis')
     def generate_kick(params: KickParams) -> bytes:
         """
         Generate TR-808 style kick drum
@@ -129,146 +266,144 @@ class Synthesizer:
         
         # Generate sine wave with pitch modulation
         phase = np.cumsum(2 * np.pi * pitch_env / SAMPLE_RATE)
-        audio = np.sin(phase)
+        audio = np.sin(phase, out=silence(samples))
         
         # Amplitude envelope: exponential decay
-        amp_env = np.exp(-5 * t / duration)
-        audio *= amp_env * params.velocity
-        
-        # Normalize and convert to int16
-        audio = np.clip(audio, -1.0, 1.0)
-        audio_int16 = (audio * 32767).astype(np.int16)
+        audio *= exp_decay(t, 5 / duration)
+        audio *= params.velocity
         
-        return Synthesizer._to_wav_bytes(audio_int16)
+        # Clip and convert to int16
+        return Synthesizer._to_wav_bytes(audio)
     
     @staticmethod
-    def generate_snare(velocity: float = 1.0) -> bytes:
+    @stage('synthesis')
+    def generate_snare(velocity: float = 1.0, seed: Optional[int] = None) -> bytes:
         """
         Generate TR-808 style snare drum
         
         Features:
         - Dual oscillators (180Hz + 330Hz)
-        - White noise burst
+        - White noise burst (reproducible when seed is given)
         - Fast decay
         """
+        rng = np.random.default_rng(seed)
         duration = 0.15
         samples = int(SAMPLE_RATE * duration)
         t = np.linspace(0, duration, samples, False)
         
         # Tonal component: two sine waves
-        tone1 = np.sin(2 * np.pi * 180 * t)
-        tone2 = np.sin(2 * np.pi * 330 * t)
-        tonal = (tone1 + tone2) * 0.3
+        audio = np.sin(2 * np.pi * 180 * t, out=silence(samples))
+        audio += np.sin(2 * np.pi * 330 * t)
+        audio *= 0.3
         
         # Noise component
-        noise = np.random.uniform(-1, 1, samples) * 0.7
-        
-        # Mix
-        audio = tonal + noise
+        noise = rng.uniform(-1, 1, samples)
+        noise *= 0.7
+        audio += noise
         
         # Amplitude envelope
-        amp_env = np.exp(-15 * t / duration)
-        audio *= amp_env * velocity
+        audio *= exp_decay(t, 15 / duration)
+        audio *= velocity
         
-        # Normalize
-        audio = np.clip(audio, -1.0, 1.0)
-        audio_int16 = (audio * 32767).astype(np.int16)
-        
-        return Synthesizer._to_wav_bytes(audio_int16)
+        # Clip and convert to int16
+        return Synthesizer._to_wav_bytes(audio)
     
     @staticmethod
-    def generate_hihat(velocity: float = 1.0, open: bool = False) -> bytes:
+    @stage('synthesis')
+    def generate_hihat(velocity: float = 1.0, open: bool = False, seed: Optional[int] = None) -> bytes:
         """
         Generate TR-808 style hi-hat
         
         Features:
         - Six square wave oscillators (high frequencies)
         - Short decay (closed) or longer (open)
-        - Bandpass filtered noise
+        - Bandpass filtered noise (reproducible when seed is given)
         """
+        rng = np.random.default_rng(seed)
         duration = 0.3 if open else 0.05
         samples = int(SAMPLE_RATE * duration)
         t = np.linspace(0, duration, samples, False)
         
         # High-frequency oscillators
         freqs = [3140, 3400, 3700, 4100, 4400, 4700]
-        audio = np.zeros(samples)
+        audio = silence(samples)
         for freq in freqs:
             audio += signal.square(2 * np.pi * freq * t) / len(freqs)
         
         # Add filtered noise
-        noise = np.random.uniform(-1, 1, samples)
-        sos = signal.butter(4, [7000, 12000], 'bandpass', fs=SAMPLE_RATE, output='sos')
-        filtered_noise = signal.sosfilt(sos, noise)
-        audio = audio * 0.3 + filtered_noise * 0.7
+        noise = as_dsp(rng.uniform(-1, 1, samples))
+        sos = filter_coefficients(butter(4, [7000, 12000], 'bandpass', fs=SAMPLE_RATE, output='sos'))
+        with stage('filtering'):
+            filtered_noise = signal.sosfilt(sos, noise)
+        audio *= 0.3
+        filtered_noise *= 0.7
+        audio += filtered_noise
         
         # Amplitude envelope
         decay_rate = 8 if open else 25
-        amp_env = np.exp(-decay_rate * t / duration)
-        audio *= amp_env * velocity
-        
-        # Normalize
-        audio = np.clip(audio, -1.0, 1.0)
-        audio_int16 = (audio * 32767).astype(np.int16)
+        audio *= exp_decay(t, decay_rate / duration)
+        audio *= velocity
         
-        return Synthesizer._to_wav_bytes(audio_int16)
+        # Clip and convert to int16
+        return Synthesizer._to_wav_bytes(audio)
     
     @staticmethod
-    def generate_clap(velocity: float = 1.0) -> bytes:
+    @stage('synthesis')
+    def generate_clap(velocity: float = 1.0, seed: Optional[int] = None) -> bytes:
         """
         Generate TR-808 style hand clap
         
         Features:
-        - Filtered noise burst
+        - Filtered noise burst (reproducible when seed is given)
         - Multiple attacks (flamming effect)
         - 1kHz bandpass filter
         """
+        rng = np.random.default_rng(seed)
         duration = 0.1
         samples = int(SAMPLE_RATE * duration)
         
         # Generate noise
-        noise = np.random.uniform(-1, 1, samples)
+        noise = as_dsp(rng.uniform(-1, 1, samples))
         
         # Bandpass filter around 1kHz
-        sos = signal.butter(4, [800, 1200], 'bandpass', fs=SAMPLE_RATE, output='sos')
-        audio = signal.sosfilt(sos, noise)
+        sos = filter_coefficients(butter(4, [800, 1200], 'bandpass', fs=SAMPLE_RATE, output='sos'))
+        with stage('filtering'):
+            audio = signal.sosfilt(sos, noise)
         
         # Create flamming effect with multiple envelopes
         t = np.linspace(0, duration, samples, False)
-        env1 = np.exp(-40 * t / duration)
-        env2 = np.exp(-40 * np.maximum(0, t - 0.01) / duration) * 0.7
-        env3 = np.exp(-40 * np.maximum(0, t - 0.02) / duration) * 0.5
-        
-        combined_env = np.maximum(env1, np.maximum(env2, env3))
-        audio *= combined_env * velocity
-        
-        # Normalize
-        audio = np.clip(audio, -1.0, 1.0)
-        audio_int16 = (audio * 32767).astype(np.int16)
-        
-        return Synthesizer._to_wav_bytes(audio_int16)
+        combined_env = exp_decay(t, 40 / duration)
+        for delay, level in ((0.01, 0.7), (0.02, 0.5)):
+            env = exp_decay(np.maximum(0, t - delay), 40 / duration)
+            env *= level
+            np.maximum(combined_env, env, out=combined_env)
+        audio *= combined_env
+        audio *= velocity
+        
+        # Clip and convert to int16
+        return Synthesizer._to_wav_bytes(audio)
     
     @staticmethod
+    @stage('synthesis')
     def generate_arp2600(params: SynthParams) -> bytes:
         """
         Generate ARP 2600 style synthesizer sound
         
         Features:
-        - Dual sawtooth oscillators with detune
-        - ADSR envelope
+        - Dual oscillators (params.waveform) with detune
+        - ADSR envelope, sustain held until duration - release
         - Lowpass filter with resonance
         """
-        duration = params.attack + params.decay + params.release
+        duration = max(params.duration, params.attack + params.decay + params.release)
         samples = int(SAMPLE_RATE * duration)
-        t = np.linspace(0, duration, samples, False)
         
-        # Dual sawtooth oscillators with detune
+        # Dual oscillators with detune
         osc1_freq = params.frequency
         osc2_freq = params.frequency * (1.0 + params.detune)
         
-        osc1 = Synthesizer._sawtooth(osc1_freq, samples)
-        osc2 = Synthesizer._sawtooth(osc2_freq, samples)
-        audio = (osc1 + osc2) * 0.5
+        audio = Synthesizer._oscillator(params.waveform, osc1_freq, samples)
+        audio += Synthesizer._oscillator(params.waveform, osc2_freq, samples)
+        audio *= 0.5
         
         # ADSR envelope
         envelope = Synthesizer._adsr_envelope(
@@ -278,30 +413,29 @@ class Synthesizer:
             params.sustain,
             int(params.release * SAMPLE_RATE)
         )
-        audio *= envelope * params.velocity
+        audio *= envelope
+        audio *= params.velocity
         
         # Lowpass filter
         nyquist = SAMPLE_RATE / 2
         cutoff_norm = min(params.filter_cutoff / nyquist, 0.99)
-        sos = signal.butter(4, cutoff_norm, 'lowpass', output='sos')
-        audio = signal.sosfilt(sos, audio)
-        
-        # Normalize
-        audio = np.clip(audio, -1.0, 1.0)
-        audio_int16 = (audio * 32767).astype(np.int16)
+        sos = filter_coefficients(butter(4, cutoff_norm, 'lowpass', output='sos'))
+        with stage('filtering'):
+            audio = signal.sosfilt(sos, audio)
         
-        return Synthesizer._to_wav_bytes(audio_int16)
+        # Clip and convert to int16
+        return Synthesizer._to_wav_bytes(audio)
     
     @staticmethod
-    def _sawtooth(frequency: float, samples: int) -> np.ndarray:
-        """Generate sawtooth wave"""
-        t = np.arange(samples) / SAMPLE_RATE
-        return signal.sawtooth(2 * np.pi * frequency * t)
+    def _oscillator(waveform: str, frequency: float, samples: int) -> np.ndarray:
+        """Generate a band-limited sine, sawtooth, square or triangle wave"""
+        dt = frequency / SAMPLE_RATE
+        return as_dsp(oscillators.oscillator(np.arange(samples) * dt, waveform, dt=dt))
     
     @staticmethod
     def _adsr_envelope(samples: int, attack: int, decay: int, sustain: float, release: int) -> np.ndarray:
         """Generate ADSR envelope"""
-        envelope = np.zeros(samples)
+        envelope = silence(samples)
         
         # Attack
         attack_end = min(attack, samples)
@@ -326,6 +460,7 @@ class Synthesizer:
         return envelope
     
     @staticmethod
+    @stage('synthesis')
     def generate_chord(params: ChordParams) -> bytes:
         """
         Generate polyphonic chord
@@ -352,7 +487,7 @@ class Synthesizer:
         t = np.linspace(0, duration, samples, False)
         
         # Initialize audio buffer
-        audio = np.zeros(samples)
+        audio = silence(samples)
         
         # Generate each note in the chord
         for interval in intervals:
@@ -373,12 +508,12 @@ class Synthesizer:
             audio += note_audio
         
         # Normalize to prevent clipping
-        audio = audio / len(intervals)
+        audio /= len(intervals)
         
         # Apply envelope (ADSR)
         attack_samples = int(0.01 * SAMPLE_RATE)
         release_samples = int(0.1 * SAMPLE_RATE)
-        envelope = np.ones(samples)
+        envelope = np.ones(samples, dtype=audio.dtype)
         
         # Attack
         if attack_samples > 0:
@@ -389,30 +524,31 @@ class Synthesizer:
             release_start = samples - release_samples
             envelope[release_start:] = np.linspace(1, 0, release_samples)
         
-        audio *= envelope * params.velocity
-        
-        # Final normalization and conversion
-        audio = np.clip(audio, -1.0, 1.0)
-        audio_int16 = (audio * 32767 * 0.8).astype(np.int16)  # 0.8 to prevent clipping
+        audio *= envelope
+        audio *= params.velocity
+        audio = Synthesizer._apply_reverb(audio, params.reverb, params.reverb_decay)
         
-        return Synthesizer._to_wav_bytes(audio_int16)
+        # Final clipping and conversion (0.8 to prevent clipping)
+        return Synthesizer._to_wav_bytes(audio, 0.8)
     
     @staticmethod
     def _piano_tone(frequency: float, samples: int, velocity: float) -> np.ndarray:
         """Generate piano-like tone with rich harmonics"""
         t = np.arange(samples) / SAMPLE_RATE
-        audio = np.zeros(samples)
+        audio = silence(samples)
+        partial = silence(samples)
         
         # Add multiple harmonics with decreasing amplitude
         harmonics = [1.0, 0.5, 0.25, 0.125, 0.0625]
         for i, amp in enumerate(harmonics):
             harmonic_freq = frequency * (i + 1)
             if harmonic_freq < SAMPLE_RATE / 2:  # Nyquist limit
-                audio += amp * np.sin(2 * np.pi * harmonic_freq * t)
+                np.sin(2 * np.pi * harmonic_freq * t, out=partial)
+                partial *= amp
+                audio += partial
         
         # Piano envelope: fast attack, slow decay
-        envelope = np.exp(-2 * t)
-        audio *= envelope
+        audio *= exp_decay(t, 2)
         
         return audio
     
@@ -420,7 +556,7 @@ class Synthesizer:
     def _organ_tone(frequency: float, samples: int, velocity: float) -> np.ndarray:
         """Generate organ-like tone with drawbar harmonics"""
         t = np.arange(samples) / SAMPLE_RATE
-        audio = np.zeros(samples)
+        audio = silence(samples)
         
         # Organ drawbar settings (Hammond B3 style)
         # 16', 5 1/3', 8', 4', 2 2/3', 2', 1 3/5', 1 1/3'
@@ -432,10 +568,13 @@ class Synthesizer:
             (4.0, 0.4),   # 2nd octave
         ]
         
+        partial = silence(samples)
         for harmonic_mult, amp in drawbars:
             harmonic_freq = frequency * harmonic_mult
             if harmonic_freq < SAMPLE_RATE / 2:
-                audio += amp * np.sin(2 * np.pi * harmonic_freq * t)
+                np.sin(2 * np.pi * harmonic_freq * t, out=partial)
+                partial *= amp
+                audio += partial
         
         # Organ: sustain envelope (no decay)
         return audio
@@ -446,15 +585,16 @@ class Synthesizer:
         t = np.arange(samples) / SAMPLE_RATE
         
         # Sawtooth wave
-        audio = signal.sawtooth(2 * np.pi * frequency * t)
+        audio = as_dsp(signal.sawtooth(2 * np.pi * frequency * t))
         
         # Simple lowpass filter (moving average)
         window_size = 5
-        audio = np.convolve(audio, np.ones(window_size)/window_size, mode='same')
+        audio = np.convolve(audio, np.full(window_size, 1 / window_size, dtype=audio.dtype), mode='same')
         
         return audio
     
     @staticmethod
+    @stage('synthesis')
     def generate_brass(params: BrassParams) -> bytes:
         """
         Generate brass instrument sound (trumpet, horn, trombone)
@@ -528,15 +668,19 @@ class Synthesizer:
             sustain = 0.7
             release = 0.15
         
+        # Add slight frequency modulation for brass vibrato
+        vibrato_rate = 5.0  # 5 Hz vibrato
+        vibrato_depth = 0.005  # 0.5% pitch variation
+        vibrato_t = (1.0 + vibrato_depth * np.sin(2 * np.pi * vibrato_rate * t)) * t
+        
         # Generate harmonic series
-        audio = np.zeros(samples)
+        audio = silence(samples)
+        partial = silence(samples)
         for harmonic_num, amplitude in harmonics:
             harmonic_freq = frequency * harmonic_num
-            # Add slight frequency modulation for brass vibrato
-            vibrato_rate = 5.0  # 5 Hz vibrato
-            vibrato_depth = 0.005  # 0.5% pitch variation
-            vibrato = 1.0 + vibrato_depth * np.sin(2 * np.pi * vibrato_rate * t)
-            audio += amplitude * np.sin(2 * np.pi * harmonic_freq * vibrato * t)
+            np.sin(2 * np.pi * harmonic_freq * vibrato_t, out=partial)
+            partial *= amplitude
+            audio += partial
         
         # ADSR envelope (brass has distinct attack)
         attack_samples = int(attack * SAMPLE_RATE)
@@ -553,22 +697,21 @@ class Synthesizer:
             np.ones(sustain_samples) * sustain,
             # Release: Fade out
             np.linspace(sustain, 0, release_samples)
-        ])
+        ], dtype=audio.dtype)
         
         # Ensure envelope matches audio length
         if len(envelope) != len(audio):
             envelope = np.resize(envelope, len(audio))
         
-        audio *= envelope * velocity
-        
-        # Final normalization and conversion
-        audio = np.clip(audio, -1.0, 1.0)
-        audio_int16 = (audio * 32767 * 0.8).astype(np.int16)  # 0.8 to prevent clipping
+        audio *= envelope
+        audio *= velocity
+        audio = Synthesizer._apply_reverb(audio, params.reverb, params.reverb_decay)
         
-        # Convert to WAV
-        return Synthesizer._to_wav_bytes(audio_int16)
+        # Final clipping and conversion to WAV (0.8 to prevent clipping)
+        return Synthesizer._to_wav_bytes(audio, 0.8)
     
     @staticmethod
+    @stage('synthesis')
     def generate_strings(params: StringParams) -> bytes:
         """
         Generate string instrument sound (violin, viola, cello)
@@ -650,13 +793,16 @@ class Synthesizer:
         vibrato = 1.0 + vibrato_depth * np.sin(2 * np.pi * vibrato_rate * t)
         
         # Generate harmonic series with sawtooth character
-        audio = np.zeros(samples)
+        vibrato_t = vibrato * t
+        audio = silence(samples)
+        partial = silence(samples)
         for harmonic_num, amplitude in harmonics:
             harmonic_freq = frequency * harmonic_num
             if harmonic_freq < SAMPLE_RATE / 2:  # Nyquist limit
                 # Apply vibrato to each harmonic
-                phase = 2 * np.pi * harmonic_freq * vibrato * t
-                audio += amplitude * np.sin(phase)
+                np.sin(2 * np.pi * harmonic_freq * vibrato_t, out=partial)
+                partial *= amplitude
+                audio += partial
         
         # ADSR envelope
         attack_samples = int(attack * SAMPLE_RATE)
@@ -673,37 +819,245 @@ class Synthesizer:
             np.ones(sustain_samples) * sustain,
             # Release: Smooth fade
             np.power(np.linspace(1, 0, release_samples), 2)
-        ])
+        ], dtype=audio.dtype)
         
         # Ensure envelope matches audio length
         if len(envelope) != len(audio):
             envelope = np.resize(envelope, len(audio))
         
-        audio *= envelope * velocity
+        audio *= envelope
+        audio *= velocity
         
         # Add slight bow noise (high-frequency content)
         if samples > 0:
-            bow_noise = np.random.randn(samples) * 0.02 * velocity
-            bow_noise = signal.sosfilt(signal.butter(4, 2000, 'hp', fs=SAMPLE_RATE, output='sos'), bow_noise)
-            audio += bow_noise * envelope
-        
-        # Final normalization and conversion
-        audio = np.clip(audio, -1.0, 1.0)
-        audio_int16 = (audio * 32767 * 0.8).astype(np.int16)
-        
-        # Convert to WAV
-        return Synthesizer._to_wav_bytes(audio_int16)
+            bow_noise = as_dsp(np.random.randn(samples))
+            bow_noise *= 0.02 * velocity
+            sos = filter_coefficients(butter(4, 2000, 'hp', fs=SAMPLE_RATE, output='sos'))
+            with stage('filtering'):
+                bow_noise = signal.sosfilt(sos, bow_noise)
+            bow_noise *= envelope
+            audio += bow_noise
+        
+        audio = Synthesizer._apply_reverb(audio, params.reverb, params.reverb_decay)
+        
+        # Final clipping and conversion to WAV (0.8 to prevent clipping)
+        return Synthesizer._to_wav_bytes(audio, 0.8)
+    
+    @staticmethod
+    def _apply_reverb(audio: np.ndarray, mix: float, decay: float) -> np.ndarray:
+        """Add convolution reverb (and its tail); scaled back down if the mix would clip"""
+        mix = min(max(mix, 0.0), 1.0)
+        if mix == 0 or len(audio) == 0:
+            return audio
+        decay = min(max(decay, REVERB_DECAY_RANGE[0]), REVERB_DECAY_RANGE[1])
+        
+        peak = np.max(np.abs(audio))
+        audio = convolution_reverb(audio, decay, mix, SAMPLE_RATE).astype(audio.dtype, copy=False)
+        wet_peak = np.max(np.abs(audio))
+        if wet_peak > max(peak, 1.0):
+            audio *= max(peak, 1.0) / wet_peak
+        return audio
     
     @staticmethod
-    def _to_wav_bytes(audio_int16: np.ndarray) -> bytes:
-        """Convert audio array to WAV bytes"""
-        buffer = io.BytesIO()
-        with wave.open(buffer, 'wb') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(SAMPLE_RATE)
-            wav_file.writeframes(audio_int16.tobytes())
-        return buffer.getvalue()
+    def _to_wav_bytes(audio: np.ndarray, gain: float = 1.0) -> bytearray:
+        """Clip, quantize and encode audio as 16-bit mono WAV in one buffer"""
+        return encode_wav(audio, SAMPLE_RATE, gain=gain)
+
+
+# Response helpers
+
+def negotiate_audio_format(request: Request) -> str:
+    """
+    Pick the response encoding from the Accept header
+
+    Returns:
+    - 'wav': raw audio/wav body
+    - 'pcm': raw 16-bit little-endian mono PCM (audio/L16 or application/octet-stream)
+    - 'json': base64 encoded WAV wrapped in JSON (default, backwards compatible)
+    """
+    accept = request.headers.get('accept', '').lower()
+    for media_range in accept.split(','):
+        media_type = media_range.split(';')[0].strip()
+        if media_type in WAV_MEDIA_TYPES:
+            return 'wav'
+        if media_type in PCM_MEDIA_TYPES:
+            return 'pcm'
+    return 'json'
+
+
+# Voice registry
+
+def _render_snare(params: SnareParams) -> bytes:
+    return Synthesizer.generate_snare(params.velocity, params.seed)
+
+
+def _render_hihat(params: HiHatParams) -> bytes:
+    return Synthesizer.generate_hihat(params.velocity, params.open, params.seed)
+
+
+def _render_clap(params: ClapParams) -> bytes:
+    return Synthesizer.generate_clap(params.velocity, params.seed)
+
+
+# name -> (params model, render function, deterministic without a seed)
+VOICES = {
+    'kick': (KickParams, Synthesizer.generate_kick, True),
+    'snare': (SnareParams, _render_snare, False),
+    'hihat': (HiHatParams, _render_hihat, False),
+    'clap': (ClapParams, _render_clap, False),
+    'synth': (SynthParams, Synthesizer.generate_arp2600, True),
+    'chord': (ChordParams, Synthesizer.generate_chord, True),
+    'brass': (BrassParams, Synthesizer.generate_brass, True),
+    'strings': (StringParams, Synthesizer.generate_strings, True),
+}
+
+
+def _render_pattern_wav(spec: dict) -> bytes:
+    """Render a pattern spec to 16-bit WAV bytes (runs on the executor)"""
+    mix = pattern_renderer.render_pattern(spec, SAMPLE_RATE)
+    return Synthesizer._to_wav_bytes(mix)
+
+
+def _encode_audio(audio_bytes: bytes, encoding: str) -> bytes:
+    """Re-encode a rendered WAV as FLAC or Opus (runs on the executor)"""
+    return audio_formats.encode(audio_bytes, encoding, SAMPLE_RATE)
+
+
+def check_encoding(encoding: str) -> None:
+    """Reject unknown (422) or unavailable (501) output formats"""
+    if encoding not in audio_formats.FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {', '.join(audio_formats.FORMATS)}")
+    if not audio_formats.is_available(encoding):
+        raise HTTPException(status_code=501, detail=f"format '{encoding}' is not available on this server")
+
+
+async def run_render(fn, *args):
+    """
+    Run a render function on the DSP executor
+
+    Maps executor backpressure to HTTP errors:
+    - 429 when the render queue is full
+    - 503 when the render times out
+    """
+    try:
+        return await render_executor.run(fn, *args)
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except RenderTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+def is_cacheable(voice: str, params: BaseModel) -> bool:
+    """Whether a voice render is reproducible (noise voices need a seed)"""
+    deterministic = VOICES[voice][2]
+    return deterministic or getattr(params, 'seed', None) is not None
+
+
+async def cached_render(key: Optional[str], fn, arg, encoding: str = 'wav') -> bytes:
+    """
+    Render (fn(arg) -> WAV bytes) and encode through the shared cache
+
+    Encoded results are cached next to the WAV they were made from, so
+    a FLAC or Opus hit skips both the render and the encode. key=None
+    bypasses the cache. Cache lookups happen on the event loop; only
+    misses are sent to the executor.
+    """
+    if key is None:
+        audio_bytes = await run_render(fn, arg)
+        if encoding == 'wav':
+            return audio_bytes
+        return await run_render(_encode_audio, audio_bytes, encoding)
+    
+    encoded_key = f"{key}|{encoding}"
+    if encoding != 'wav':
+        encoded = render_cache.get(encoded_key)
+        if encoded is not None:
+            return encoded
+    
+    audio_bytes = render_cache.get(key)
+    if audio_bytes is None:
+        audio_bytes = await run_render(fn, arg)
+        render_cache.put(key, audio_bytes)
+    if encoding == 'wav':
+        return audio_bytes
+    
+    encoded = await run_render(_encode_audio, audio_bytes, encoding)
+    render_cache.put(encoded_key, encoded)
+    return encoded
+
+
+async def render_voice(voice: str, params: BaseModel, encoding: str = 'wav') -> bytes:
+    """
+    Render a registered voice to WAV (or FLAC/Opus) bytes through the shared cache
+
+    Noise voices are only cached when a seed makes them reproducible.
+    """
+    key = canonical_key(voice, params) if is_cacheable(voice, params) else None
+    return await cached_render(key, VOICES[voice][1], params, encoding)
+
+
+def _iter_chunks(view: memoryview, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Yield a buffer in fixed-size chunks without copying the whole payload"""
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+
+def _iter_batch(manifest: dict, payloads: List[memoryview]):
+    """Yield a length-prefixed batch body: uint32 manifest size, manifest JSON, payloads"""
+    with stage('serialization'):
+        manifest_bytes = json.dumps(manifest, separators=(',', ':')).encode('utf-8')
+    yield struct.pack('>I', len(manifest_bytes)) + manifest_bytes
+    for view in payloads:
+        yield from _iter_chunks(view)
+
+
+def encode_base64(audio_bytes: bytes) -> str:
+    """Base64 text of an audio payload for JSON responses"""
+    with stage('base64'):
+        return base64.b64encode(audio_bytes).decode('utf-8')
+
+
+def json_response(content: dict) -> JSONResponse:
+    """Serialise a JSON body here, timed as a stage, rather than inside FastAPI"""
+    with stage('serialization'):
+        return JSONResponse(content)
+
+
+def audio_response(request: Request, audio_bytes: bytes, encoding: str = 'wav', **extra):
+    """
+    Build the response for rendered audio according to the Accept header
+
+    JSON clients get the legacy base64 payload plus any extra fields.
+    Binary clients get a StreamingResponse written chunk by chunk straight
+    from the rendered buffer, skipping the base64 encode and JSON copy.
+    FLAC/Opus (encoding) is sent as is; raw PCM only applies to WAV.
+    """
+    audio_format = negotiate_audio_format(request)
+    sample_rate = audio_formats.output_sample_rate(encoding, SAMPLE_RATE)
+
+    if audio_format == 'json':
+        return json_response({
+            "success": True,
+            "audio": encode_base64(audio_bytes),
+            "format": encoding,
+            "sample_rate": sample_rate,
+            **extra
+        })
+
+    view = memoryview(audio_bytes)
+    if encoding != 'wav':
+        media_type = audio_formats.media_type(encoding)
+    elif audio_format == 'pcm':
+        view = view[WAV_HEADER_SIZE:]
+        media_type = f"audio/L16; rate={SAMPLE_RATE}; channels=1"
+    else:
+        media_type = "audio/wav"
+
+    headers = {
+        "Content-Length": str(len(view)),
+        "X-Sample-Rate": str(sample_rate),
+    }
+    return StreamingResponse(_iter_chunks(view), media_type=media_type, headers=headers)
 
 
 # REST API Endpoints
@@ -715,107 +1069,125 @@ async def root():
         "status": "ok",
         "service": "HAOS.fm Audio Engine",
         "version": "1.0.0",
-        "sample_rate": SAMPLE_RATE
+        "sample_rate": SAMPLE_RATE,
+        "cache": render_cache.stats(),
+        "executor": render_executor.stats(),
+        "voice_cache": pattern_renderer.voice_cache.stats(),
+        "tr808_bank": pattern_renderer.drum_bank_stats(),
+        "formats": audio_formats.available_formats()
     }
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus metrics (text exposition format)
+    
+    Request counts and latency per endpoint, time per render stage
+    (synthesis, filtering, reverb, mixing, encode, base64, serialization),
+    executor queue depth, render cache hit ratio and process RSS.
+    """
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.post("/api/audio/play-kick")
-async def play_kick(params: KickParams):
+async def play_kick(params: KickParams, request: Request, encoding: str = Query('wav', alias='format')):
     """
     Generate TR-808 kick drum
-    Returns: base64 encoded WAV audio
+    Returns: base64 encoded WAV audio (JSON), or a streamed audio/wav or
+    raw PCM body when requested via the Accept header; ?format=flac or
+    ?format=opus returns compressed audio instead of WAV
     """
+    check_encoding(encoding)
     try:
-        audio_bytes = Synthesizer.generate_kick(params)
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        return {
-            "success": True,
-            "audio": audio_base64,
-            "format": "wav",
-            "sample_rate": SAMPLE_RATE
-        }
+        audio_bytes = await render_voice('kick', params, encoding)
+        return audio_response(request, audio_bytes, encoding)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/audio/play-snare")
-async def play_snare(velocity: float = 1.0):
+async def play_snare(request: Request, velocity: float = 1.0, seed: Optional[int] = None,
+                     encoding: str = Query('wav', alias='format')):
     """
     Generate TR-808 snare drum
-    Returns: base64 encoded WAV audio
+    Pass seed for reproducible (and cacheable) noise
+    Returns: base64 encoded WAV audio (JSON), or a streamed audio/wav or
+    raw PCM body when requested via the Accept header; ?format=flac or
+    ?format=opus returns compressed audio instead of WAV
     """
+    check_encoding(encoding)
     try:
-        audio_bytes = Synthesizer.generate_snare(velocity)
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        return {
-            "success": True,
-            "audio": audio_base64,
-            "format": "wav",
-            "sample_rate": SAMPLE_RATE
-        }
+        audio_bytes = await render_voice('snare', SnareParams(velocity=velocity, seed=seed), encoding)
+        return audio_response(request, audio_bytes, encoding)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/audio/play-hihat")
-async def play_hihat(velocity: float = 1.0, open: bool = False):
+async def play_hihat(request: Request, velocity: float = 1.0, open: bool = False, seed: Optional[int] = None,
+                     encoding: str = Query('wav', alias='format')):
     """
     Generate TR-808 hi-hat (closed or open)
-    Returns: base64 encoded WAV audio
+    Pass seed for reproducible (and cacheable) noise
+    Returns: base64 encoded WAV audio (JSON), or a streamed audio/wav or
+    raw PCM body when requested via the Accept header; ?format=flac or
+    ?format=opus returns compressed audio instead of WAV
     """
+    check_encoding(encoding)
     try:
-        audio_bytes = Synthesizer.generate_hihat(velocity, open)
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        return {
-            "success": True,
-            "audio": audio_base64,
-            "format": "wav",
-            "sample_rate": SAMPLE_RATE
-        }
+        audio_bytes = await render_voice('hihat', HiHatParams(velocity=velocity, open=open, seed=seed), encoding)
+        return audio_response(request, audio_bytes, encoding)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/audio/play-clap")
-async def play_clap(velocity: float = 1.0):
+async def play_clap(request: Request, velocity: float = 1.0, seed: Optional[int] = None,
+                    encoding: str = Query('wav', alias='format')):
     """
     Generate TR-808 hand clap
-    Returns: base64 encoded WAV audio
+    Pass seed for reproducible (and cacheable) noise
+    Returns: base64 encoded WAV audio (JSON), or a streamed audio/wav or
+    raw PCM body when requested via the Accept header; ?format=flac or
+    ?format=opus returns compressed audio instead of WAV
     """
+    check_encoding(encoding)
     try:
-        audio_bytes = Synthesizer.generate_clap(velocity)
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        return {
-            "success": True,
-            "audio": audio_base64,
-            "format": "wav",
-            "sample_rate": SAMPLE_RATE
-        }
+        audio_bytes = await render_voice('clap', ClapParams(velocity=velocity, seed=seed), encoding)
+        return audio_response(request, audio_bytes, encoding)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/audio/play-synth")
-async def play_synth(params: SynthParams):
+async def play_synth(params: SynthParams, request: Request, encoding: str = Query('wav', alias='format')):
     """
     Generate ARP 2600 style synthesizer sound
-    Returns: base64 encoded WAV audio
+    Returns: base64 encoded WAV audio (JSON), or a streamed audio/wav or
+    raw PCM body when requested via the Accept header; ?format=flac or
+    ?format=opus returns compressed audio instead of WAV
     """
+    check_encoding(encoding)
     try:
-        audio_bytes = Synthesizer.generate_arp2600(params)
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        return {
-            "success": True,
-            "audio": audio_base64,
-            "format": "wav",
-            "sample_rate": SAMPLE_RATE
-        }
+        audio_bytes = await render_voice('synth', params, encoding)
+        return audio_response(request, audio_bytes, encoding)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/audio/play-chord")
-async def play_chord(params: ChordParams):
+async def play_chord(params: ChordParams, request: Request, encoding: str = Query('wav', alias='format')):
     """
     Generate piano/organ/synth chord
     
@@ -824,25 +1196,28 @@ async def play_chord(params: ChordParams):
     - Instruments: piano, organ, synth
     - Root frequency in Hz (e.g., 261.63 for middle C)
     
-    Returns: base64 encoded WAV audio
+    Returns: base64 encoded WAV audio (JSON), or a streamed audio/wav or
+    raw PCM body when requested via the Accept header; ?format=flac or
+    ?format=opus returns compressed audio instead of WAV
     """
+    check_encoding(encoding)
     try:
-        audio_bytes = Synthesizer.generate_chord(params)
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        return {
-            "success": True,
-            "audio": audio_base64,
-            "format": "wav",
-            "sample_rate": SAMPLE_RATE,
-            "chord": f"{params.chord_type} chord at {params.root_frequency:.2f} Hz",
-            "instrument": params.instrument
-        }
+        audio_bytes = await render_voice('chord', params, encoding)
+        return audio_response(
+            request,
+            audio_bytes,
+            encoding,
+            chord=f"{params.chord_type} chord at {params.root_frequency:.2f} Hz",
+            instrument=params.instrument
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/audio/play-brass")
-async def play_brass(params: BrassParams):
+async def play_brass(params: BrassParams, request: Request, encoding: str = Query('wav', alias='format')):
     """
     Generate brass instrument sound (trumpet, horn, trombone)
     
@@ -851,26 +1226,29 @@ async def play_brass(params: BrassParams):
     - Frequency in Hz (e.g., 440 for A4)
     - Duration and velocity control
     
-    Returns: base64 encoded WAV audio
+    Returns: base64 encoded WAV audio (JSON), or a streamed audio/wav or
+    raw PCM body when requested via the Accept header; ?format=flac or
+    ?format=opus returns compressed audio instead of WAV
     """
+    check_encoding(encoding)
     try:
-        audio_bytes = Synthesizer.generate_brass(params)
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        return {
-            "success": True,
-            "audio": audio_base64,
-            "format": "wav",
-            "sample_rate": SAMPLE_RATE,
-            "instrument": params.instrument,
-            "frequency": f"{params.frequency:.2f} Hz",
-            "duration": f"{params.duration:.2f}s"
-        }
+        audio_bytes = await render_voice('brass', params, encoding)
+        return audio_response(
+            request,
+            audio_bytes,
+            encoding,
+            instrument=params.instrument,
+            frequency=f"{params.frequency:.2f} Hz",
+            duration=f"{params.duration:.2f}s"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/audio/play-strings")
-async def play_strings(params: StringParams):
+async def play_strings(params: StringParams, request: Request, encoding: str = Query('wav', alias='format')):
     """
     Generate string instrument sound (violin, viola, cello)
     
@@ -880,25 +1258,280 @@ async def play_strings(params: StringParams):
     - Vibrato control (rate and depth)
     - Duration and velocity control
     
-    Returns: base64 encoded WAV audio
+    Returns: base64 encoded WAV audio (JSON), or a streamed audio/wav or
+    raw PCM body when requested via the Accept header; ?format=flac or
+    ?format=opus returns compressed audio instead of WAV
     """
+    check_encoding(encoding)
     try:
-        audio_bytes = Synthesizer.generate_strings(params)
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        return {
+        audio_bytes = await render_voice('strings', params, encoding)
+        return audio_response(
+            request,
+            audio_bytes,
+            encoding,
+            instrument=getattr(params, 'instrument', 'violin'),
+            frequency=f"{params.frequency:.2f} Hz",
+            duration=f"{params.duration:.2f}s",
+            vibrato=f"{params.vibrato_rate:.1f} Hz @ {params.vibrato_depth*100:.1f}%"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+@app.post("/api/audio/batch")
+async def render_batch(batch: BatchRequest, request: Request, encoding: str = Query('wav', alias='format')):
+    """
+    Render several voices in one request
+    
+    Body: {"voices": [{"voice": "kick", "params": {...}, "id": "pad1"}, ...]}
+    Voices: kick, snare, hihat, clap, synth, chord, brass, strings
+    
+    Voices render concurrently on the DSP executor.
+    
+    Returns: JSON with a base64 WAV per voice, or a length-prefixed binary
+    body when requested via the Accept header:
+    [uint32 big-endian manifest length][manifest JSON][payload][payload]...
+    The manifest lists id, voice, offset and length of every payload,
+    with offsets relative to the end of the manifest. ?format=flac or
+    ?format=opus encodes every voice in that format instead of WAV.
+    """
+    check_encoding(encoding)
+    if not batch.voices:
+        raise HTTPException(status_code=422, detail="voices must not be empty")
+    if len(batch.voices) > MAX_BATCH_VOICES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_VOICES} voices per batch")
+    
+    # Validate everything before rendering anything
+    jobs = []
+    for index, item in enumerate(batch.voices):
+        if item.voice not in VOICES:
+            raise HTTPException(status_code=422, detail=f"voices[{index}]: unknown voice '{item.voice}'")
+        model = VOICES[item.voice][0]
+        try:
+            jobs.append((item.voice, model(**item.params)))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"voices[{index}]: {e}")
+    
+    try:
+        rendered = await asyncio.gather(*(render_voice(voice, params, encoding) for voice, params in jobs))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    audio_format = negotiate_audio_format(request)
+    sample_rate = audio_formats.output_sample_rate(encoding, SAMPLE_RATE)
+    ids = [item.id if item.id is not None else str(index) for index, item in enumerate(batch.voices)]
+    
+    if audio_format == 'json':
+        return json_response({
             "success": True,
-            "audio": audio_base64,
-            "format": "wav",
-            "sample_rate": SAMPLE_RATE,
-            "instrument": getattr(params, 'instrument', 'violin'),
-            "frequency": f"{params.frequency:.2f} Hz",
-            "duration": f"{params.duration:.2f}s",
-            "vibrato": f"{params.vibrato_rate:.1f} Hz @ {params.vibrato_depth*100:.1f}%"
-        }
+            "format": encoding,
+            "sample_rate": sample_rate,
+            "results": [
+                {
+                    "id": voice_id,
+                    "voice": voice,
+                    "audio": encode_base64(audio_bytes)
+                }
+                for voice_id, (voice, _), audio_bytes in zip(ids, jobs, rendered)
+            ]
+        })
+    
+    # Compressed payloads are sent as encoded; raw PCM only applies to WAV
+    if encoding != 'wav':
+        audio_format = encoding
+    payloads = []
+    items = []
+    offset = 0
+    for voice_id, (voice, _), audio_bytes in zip(ids, jobs, rendered):
+        view = memoryview(audio_bytes)
+        if audio_format == 'pcm':
+            view = view[WAV_HEADER_SIZE:]
+        payloads.append(view)
+        items.append({"id": voice_id, "voice": voice, "offset": offset, "length": len(view)})
+        offset += len(view)
+    
+    manifest = {"format": audio_format, "sample_rate": sample_rate, "items": items}
+    return StreamingResponse(
+        _iter_batch(manifest, payloads),
+        media_type="application/octet-stream",
+        headers={"X-Sample-Rate": str(sample_rate)}
+    )
+
+
+@app.post("/api/render/pattern")
+async def render_pattern(pattern: PatternRequest, request: Request, encoding: str = Query('wav', alias='format')):
+    """
+    Render a multi-track step sequence server-side
+    
+    Tracks (all optional):
+    - tb303: acid line {pattern: [{active, note, accent, slide, gate}], params}
+    - drums: TR-808 lanes [{voice, variation, steps: [velocity per step]}]
+    - arp2600: {preset, notes: [{step, frequency, length, velocity}]}
+    
+    Everything is mixed into one mono buffer at the given BPM and bar
+    count. Individual hits and notes are reused from the voice cache.
+    
+    Returns: base64 encoded WAV audio (JSON), or a streamed audio/wav or
+    raw PCM body when requested via the Accept header; ?format=flac or
+    ?format=opus returns compressed audio instead of WAV
+    """
+    check_encoding(encoding)
+    if not PATTERN_BPM_RANGE[0] <= pattern.bpm <= PATTERN_BPM_RANGE[1]:
+        raise HTTPException(status_code=422, detail=f"bpm must be between {PATTERN_BPM_RANGE[0]:g} and {PATTERN_BPM_RANGE[1]:g}")
+    if not 1 <= pattern.bars <= MAX_PATTERN_BARS:
+        raise HTTPException(status_code=422, detail=f"bars must be between 1 and {MAX_PATTERN_BARS}")
+    if not 1 <= pattern.steps_per_bar <= 64:
+        raise HTTPException(status_code=422, detail="steps_per_bar must be between 1 and 64")
+    
+    spec = params_to_dict(pattern)
+    try:
+        pattern_renderer.validate_pattern(spec)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    try:
+        audio_bytes = await cached_render(canonical_key('pattern', spec), _render_pattern_wav, spec, encoding)
+        
+        total_steps = pattern.bars * pattern.steps_per_bar
+        return audio_response(
+            request,
+            audio_bytes,
+            encoding,
+            bpm=pattern.bpm,
+            bars=pattern.bars,
+            duration=f"{total_steps * pattern_renderer.step_seconds(pattern.bpm, pattern.steps_per_bar):.2f}s"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# WebSocket Endpoints
+
+@app.websocket("/ws/audio")
+async def ws_audio(websocket: WebSocket, mode: str = 'ids'):
+    """
+    Real-time voice trigger channel for live pad playing
+    
+    Client messages (JSON text):
+        {"id": 7, "voice": "kick", "params": {"decay": 0.3, "velocity": 0.9}, "t": 12.5}
+    
+    Voices are rendered at unity velocity so every velocity shares one
+    cached sample; velocity becomes a playback gain.
+    
+    mode=ids (default): each sound is sent once, then referenced by id
+        {"type": "sample", "id", "sample_id", "frames", "sample_rate", "t"} + binary frames
+        {"type": "trigger", "id", "sample_id", "gain", "t"}
+    mode=pcm: each trigger gets velocity-scaled PCM
+        {"type": "pcm", "id", "stream_id", "frames", "sample_rate", "t"} + binary frames
+    
+    Binary frames: [uint32 stream id][uint32 frame offset][int16 LE PCM]
+    where stream id is sample_id (ids mode) or a server-assigned
+    stream_id (pcm mode); the client's id is only echoed in JSON.
+    Errors: {"type": "error", "id", "detail"}; malformed messages get an
+    error reply and the connection stays open.
+    """
+    await websocket.accept()
+    try:
+        stream = VoiceStream(mode)
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "id": None, "detail": str(e)})
+        await websocket.close(code=1003)
+        return
+    
+    try:
+        while True:
+            received = await websocket.receive()
+            if received['type'] == 'websocket.disconnect':
+                raise WebSocketDisconnect(received.get('code', 1000))
+            try:
+                message = json.loads(received.get('text') or received.get('bytes') or '')
+            except ValueError:
+                await websocket.send_json({"type": "error", "id": None, "detail": "Message is not valid JSON"})
+                continue
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "id": None, "detail": "Message must be a JSON object"})
+                continue
+            
+            message_id = message.get('id')
+            timestamp = message.get('t')
+            voice = message.get('voice')
+            
+            if voice not in VOICES:
+                await websocket.send_json({"type": "error", "id": message_id, "detail": f"Unknown voice '{voice}'"})
+                continue
+            
+            try:
+                params = VOICES[voice][0](**(message.get('params') or {}))
+                gain = params.velocity
+                params.velocity = 1.0
+                audio_bytes = await render_voice(voice, params)
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "id": message_id, "detail": e.detail})
+                continue
+            except Exception as e:
+                await websocket.send_json({"type": "error", "id": message_id, "detail": str(e)})
+                continue
+            
+            pcm = np.frombuffer(audio_bytes, dtype='<i2', offset=WAV_HEADER_SIZE)
+            
+            if stream.mode == 'ids':
+                # Unseeded noise is unique per hit, so it never reuses an id
+                key = canonical_key(voice, params) if is_cacheable(voice, params) else None
+                sample_id, is_new = stream.sample_id(key)
+                if is_new:
+                    await websocket.send_json({
+                        "type": "sample",
+                        "id": message_id,
+                        "sample_id": sample_id,
+                        "frames": len(pcm),
+                        "sample_rate": SAMPLE_RATE,
+                        "t": timestamp
+                    })
+                    for frame in stream.frames(sample_id, pcm):
+                        await websocket.send_bytes(frame)
+                await websocket.send_json({
+                    "type": "trigger",
+                    "id": message_id,
+                    "sample_id": sample_id,
+                    "gain": gain,
+                    "t": timestamp
+                })
+            else:
+                scaled = stream.scale(pcm, gain)
+                stream_id, _ = stream.sample_id(None)
+                await websocket.send_json({
+                    "type": "pcm",
+                    "id": message_id,
+                    "stream_id": stream_id,
+                    "frames": len(scaled),
+                    "sample_rate": SAMPLE_RATE,
+                    "t": timestamp
+                })
+                for frame in stream.frames(stream_id, scaled):
+                    await websocket.send_bytes(frame)
+    except WebSocketDisconnect:
+        pass
+
+
+@app.on_event("startup")
+def load_drum_bank():
+    """Map (or build) the TR-808 sample bank before the first request"""
+    pattern_renderer.drum_bank(SAMPLE_RATE)
+
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    """Release DSP workers on server shutdown"""
+    render_executor.shutdown()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
@@ -0,0 +1,84 @@
+"""
+HAOS.fm Audio Formats
+Compressed encodings of rendered WAV audio for the API
+
+Renders are always produced as 16-bit mono WAV; clients can ask for:
+- flac: lossless, typically 2-3x smaller
+- opus: Ogg Opus, lossy, typically 10x smaller (resampled to 48 kHz,
+  the rates Opus supports do not include 44.1 kHz)
+
+Both are encoded by soundfile, whose wheels bundle libsndfile with the
+FLAC and Opus codecs. soundfile is optional: without it only WAV is
+offered and the compressed formats report as unavailable.
+"""
+
+import io
+import os
+import sys
+
+import numpy as np
+from scipy import signal
+
+try:
+    import soundfile
+except ImportError:  # WAV only
+    soundfile = None
+
+SYNTHESIS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'synthesis')
+if SYNTHESIS_DIR not in sys.path:
+    sys.path.insert(0, SYNTHESIS_DIR)
+
+from stage_timing import stage  # noqa: E402
+from wav_io import HEADER_SIZE  # noqa: E402
+
+OPUS_SAMPLE_RATE = 48000
+
+# format -> (media type, soundfile container, soundfile subtype)
+FORMATS = {
+    'wav': ('audio/wav', None, None),
+    'flac': ('audio/flac', 'FLAC', 'PCM_16'),
+    'opus': ('audio/ogg; codecs=opus', 'OGG', 'OPUS'),
+}
+
+
+def is_available(audio_format: str) -> bool:
+    """Whether this server can produce audio_format"""
+    if audio_format not in FORMATS:
+        return False
+    container, subtype = FORMATS[audio_format][1:]
+    if container is None:
+        return True
+    return soundfile is not None and subtype in soundfile.available_subtypes(container)
+
+
+def available_formats() -> list:
+    return [name for name in FORMATS if is_available(name)]
+
+
+def media_type(audio_format: str) -> str:
+    return FORMATS[audio_format][0]
+
+
+def output_sample_rate(audio_format: str, sample_rate: int) -> int:
+    """Sample rate of the encoded stream"""
+    return OPUS_SAMPLE_RATE if audio_format == 'opus' else sample_rate
+
+
+@stage('encode')
+def encode(wav_bytes, audio_format: str, sample_rate: int) -> bytes:
+    """Re-encode a 16-bit mono WAV rendered by the engine"""
+    if audio_format == 'wav':
+        return wav_bytes
+    if not is_available(audio_format):
+        raise ValueError(f"Audio format '{audio_format}' is not available")
+
+    _, container, subtype = FORMATS[audio_format]
+    pcm = np.frombuffer(wav_bytes, dtype='<i2', offset=HEADER_SIZE)
+    if audio_format == 'opus' and sample_rate != OPUS_SAMPLE_RATE:
+        pcm = signal.resample_poly(pcm / 32768.0, OPUS_SAMPLE_RATE, sample_rate)
+        np.clip(pcm, -1.0, 1.0, out=pcm)
+
+    buffer = io.BytesIO()
+    soundfile.write(buffer, pcm, output_sample_rate(audio_format, sample_rate),
+                    format=container, subtype=subtype)
+    return buffer.getvalue()
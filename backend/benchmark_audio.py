@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+HAOS.fm Audio Benchmarks
+========================
+Render time and peak memory for every synthesis voice and API endpoint:
+- Synthesizer voices (every entry of the audio engine's voice registry)
+- TR808: every voice x variation
+- TB303.render_pattern with a cold and a warm note memo
+- ARP2600.synthesize_note per preset
+- generate_pro_samples: every sample pack job at 44.1 kHz
+- FastAPI endpoints in-process via TestClient (cold and cached renders)
+
+Each case runs once to warm up, then `repeat` timed runs (best, median
+and mean are kept), then once more under tracemalloc for the peak of
+traced allocations (NumPy buffers included). Results are written as JSON
+so runs can be compared; --compare exits non-zero on a regression, so it
+can gate a deploy.
+
+Usage:
+    python benchmark_audio.py                             # all groups
+    python benchmark_audio.py tr808 tb303 --repeat 20
+    python benchmark_audio.py -k kick                     # cases matching 'kick'
+    python benchmark_audio.py --output bench.json
+    python benchmark_audio.py --compare bench.json        # fail on regressions
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import scipy
+
+SYNTHESIS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'synthesis')
+if SYNTHESIS_DIR not in sys.path:
+    sys.path.insert(0, SYNTHESIS_DIR)
+
+from arp2600 import ARP2600  # noqa: E402
+from benchmark import ACID_LINE  # noqa: E402
+from dsp_dtype import dsp_dtype  # noqa: E402
+from tb303 import TB303  # noqa: E402
+from tr808 import TR808  # noqa: E402
+
+SAMPLE_RATE = 44100
+DEFAULT_REPEAT = 5
+
+# A case is only reported as a regression when it got slower (or grew)
+# by more than --threshold AND by more than these absolute amounts, so
+# sub-millisecond cases do not flap on timer noise
+MIN_REGRESSION_MS = 0.1
+MIN_REGRESSION_KIB = 64
+
+ARP2600_PRESETS = ('bass', 'lead', 'pad', 'pluck', 'brass')
+
+
+def measure(func, repeat=DEFAULT_REPEAT):
+    """Time func over repeat runs (after one warm-up) and trace its peak memory"""
+    func()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+
+    # Traced separately: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best_ms": round(min(times), 4),
+        "median_ms": round(statistics.median(times), 4),
+        "mean_ms": round(statistics.fmean(times), 4),
+        "peak_kib": round(peak / 1024, 1),
+        "runs": repeat,
+    }
+
+
+# ============================================
+# CASES
+# Each group yields (name, zero-argument callable)
+# ============================================
+
+def synthesizer_cases():
+    """Every voice the engine serves, rendered directly (no cache, no executor)"""
+    import audio_engine
+
+    for voice, (model, render, deterministic) in audio_engine.VOICES.items():
+        params = model() if deterministic else model(seed=0)
+        yield voice, lambda render=render, params=params: render(params)
+
+
+def tr808_cases():
+    drums = TR808(sample_rate=SAMPLE_RATE, seed=0)
+    for voice, variations in TR808.VARIATIONS.items():
+        for variation in variations:
+            yield f"{voice}_{variation}", lambda voice=voice, variation=variation: drums.generate(voice, variation)
+
+
+def tb303_cases():
+    synth = TB303(sample_rate=SAMPLE_RATE)
+
+    def cold():
+        synth.clear_note_cache()
+        synth.render_pattern(ACID_LINE, bpm=130)
+
+    yield 'render_pattern_cold', cold
+    yield 'render_pattern_warm', lambda: synth.render_pattern(ACID_LINE, bpm=130)
+
+
+def arp2600_cases():
+    for preset in ARP2600_PRESETS:
+        synth = ARP2600(sample_rate=SAMPLE_RATE)
+        synth.load_preset(preset)
+        yield f"{preset}_note", lambda synth=synth: synth.synthesize_note(220.0, duration=1.0)
+
+
+def pro_samples_cases():
+    import generate_pro_samples
+
+    for _, name, generator, kwargs in generate_pro_samples.JOBS:
+        yield name, lambda generator=generator, kwargs=kwargs: generator(**kwargs, sample_rate=SAMPLE_RATE)
+
+
+PATTERN_REQUEST = {
+    "bpm": 130,
+    "bars": 2,
+    "tb303": {"pattern": ACID_LINE},
+    "drums": [
+        {"voice": "kick", "steps": [1, 0, 0, 0]},
+        {"voice": "hat", "variation": "tight", "steps": [0, 0, 1, 0]},
+        {"voice": "clap", "steps": [0, 0, 0, 0, 1, 0, 0, 0]},
+    ],
+    "arp2600": {"preset": "pad", "notes": [{"step": 0, "frequency": 220.0, "length": 16}]},
+}
+
+BATCH_REQUEST = {"voices": [
+    {"voice": "kick"},
+    {"voice": "snare", "params": {"seed": 1}},
+    {"voice": "hihat", "params": {"seed": 1}},
+    {"voice": "clap", "params": {"seed": 1}},
+    {"voice": "chord"},
+]}
+
+# name -> (method, path, request kwargs, cold: clear the render caches first)
+ENDPOINTS = {
+    'health': ('GET', '/', {}, False),
+    'play_kick': ('POST', '/api/audio/play-kick', {'json': {}}, True),
+    'play_kick_cached': ('POST', '/api/audio/play-kick', {'json': {}}, False),
+    'play_kick_binary': ('POST', '/api/audio/play-kick', {'json': {}, 'headers': {'Accept': 'audio/wav'}}, True),
+    'play_snare': ('POST', '/api/audio/play-snare?seed=1', {}, True),
+    'play_hihat': ('POST', '/api/audio/play-hihat?seed=1&open=true', {}, True),
+    'play_clap': ('POST', '/api/audio/play-clap?seed=1', {}, True),
+    'play_synth': ('POST', '/api/audio/play-synth', {'json': {}}, True),
+    'play_chord': ('POST', '/api/audio/play-chord', {'json': {}}, True),
+    'play_chord_flac': ('POST', '/api/audio/play-chord?format=flac', {'json': {}}, True),
+    'play_brass': ('POST', '/api/audio/play-brass', {'json': {}}, True),
+    'play_strings': ('POST', '/api/audio/play-strings', {'json': {}}, True),
+    'play_strings_reverb': ('POST', '/api/audio/play-strings', {'json': {'reverb': 0.3}}, True),
+    'batch': ('POST', '/api/audio/batch', {'json': BATCH_REQUEST}, True),
+    'batch_binary': ('POST', '/api/audio/batch',
+                     {'json': BATCH_REQUEST, 'headers': {'Accept': 'application/octet-stream'}}, True),
+    'pattern': ('POST', '/api/render/pattern', {'json': PATTERN_REQUEST}, True),
+    'pattern_cached': ('POST', '/api/render/pattern', {'json': PATTERN_REQUEST}, False),
+    'metrics': ('GET', '/metrics', {}, False),
+}
+
+
+def endpoint_cases():
+    """Request latency through the full ASGI stack, in-process"""
+    from fastapi.testclient import TestClient
+
+    import audio_engine
+    import pattern_renderer
+
+    client = TestClient(audio_engine.app)
+    for name, (method, path, kwargs, cold) in ENDPOINTS.items():
+        def call(method=method, path=path, kwargs=kwargs, cold=cold):
+            if cold:
+                audio_engine.render_cache.clear()
+                pattern_renderer.voice_cache.clear()
+            response = client.request(method, path, **kwargs)
+            if response.status_code != 200:
+                raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.text[:200]}")
+        yield name, call
+
+
+GROUPS = {
+    'synthesizer': synthesizer_cases,
+    'tr808': tr808_cases,
+    'tb303': tb303_cases,
+    'arp2600': arp2600_cases,
+    'pro_samples': pro_samples_cases,
+    'endpoints': endpoint_cases,
+}
+
+
+# ============================================
+# RUN / COMPARE
+# ============================================
+
+def environment():
+    """What the numbers depend on, stored next to them"""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "dsp_dtype": dsp_dtype().name,
+    }
+
+
+def run(groups, repeat=DEFAULT_REPEAT, keyword=None):
+    """Run the selected groups; returns {"group/case": result}"""
+    results = {}
+    for group in groups:
+        print(f"\n⏱️  {group}")
+        for name, func in GROUPS[group]():
+            key = f"{group}/{name}"
+            if keyword and keyword not in key:
+                continue
+            try:
+                result = measure(func, repeat)
+            except Exception as e:
+                results[key] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"   {name:32s} ❌ {results[key]['error']}")
+                continue
+            results[key] = result
+            print(f"   {name:32s}{result['best_ms']:9.2f} ms  (median {result['median_ms']:8.2f})"
+                  f"  peak {result['peak_kib']:9.1f} KiB")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print changes against a baseline run; returns the regressed case names"""
+    regressions = []
+    print(f"\n📊 Compared with {baseline['environment']['timestamp']} (threshold {threshold:.0%})")
+    for key, result in results.items():
+        before = baseline['results'].get(key)
+        if before is None or 'error' in before or 'error' in result:
+            continue
+
+        time_ratio = result['best_ms'] / before['best_ms'] if before['best_ms'] else 1.0
+        memory_ratio = result['peak_kib'] / before['peak_kib'] if before['peak_kib'] else 1.0
+        slower = (time_ratio > 1 + threshold
+                  and result['best_ms'] - before['best_ms'] > MIN_REGRESSION_MS)
+        larger = (memory_ratio > 1 + threshold
+                  and result['peak_kib'] - before['peak_kib'] > MIN_REGRESSION_KIB)
+        if slower or larger:
+            regressions.append(key)
+        marker = '⚠️ ' if slower or larger else '  '
+        print(f" {marker}{key:44s} time {time_ratio:6.2f}x  memory {memory_ratio:6.2f}x")
+
+    missing = len(set(baseline['results']) - set(results))
+    if missing:
+        print(f"   {missing} baseline case(s) not run this time")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark HAOS.fm synthesis voices and endpoints")
+    parser.add_argument('groups', nargs='*',
+                        help=f"groups to run (default: all of {', '.join(GROUPS)})")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f"timed runs per case (default: {DEFAULT_REPEAT})")
+    parser.add_argument('-k', dest='keyword',
+                        help="only run cases whose group/name contains this string")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="compare with a previous --output file; exit 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative slowdown or memory growth counted as a regression (default: 0.2)")
+    args = parser.parse_args(argv)
+    for group in args.groups:
+        if group not in GROUPS:
+            parser.error(f"Unknown group '{group}' (available: {', '.join(GROUPS)})")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("🏁 HAOS.fm Audio Benchmarks")
+    print("=" * 50)
+
+    report = {
+        "environment": environment(),
+        "repeat": args.repeat,
+        "results": run(args.groups or list(GROUPS), args.repeat, args.keyword),
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report['results'], baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == '__main__':
+    main()
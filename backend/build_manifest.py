@@ -0,0 +1,178 @@
+"""
+HAOS.fm Build Manifest
+Content-addressed bookkeeping for offline sample-pack builds
+
+Each output file is recorded with a build key: a hash of the generator's
+source (plus the source of project functions and classes and the values
+of constants it references), its parameters and the sample rate. A file
+whose key and SHA-256 are unchanged is skipped, so its bytes and mtime
+stay as they are. The manifest also records the SHA-256 and size of every
+output for the mobile bundle.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import types
+from functools import lru_cache
+
+MANIFEST_VERSION = 1
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _is_project_code(value):
+    """True for a function or class defined in a file of this project"""
+    if not isinstance(value, (types.FunctionType, type)):
+        return False
+    try:
+        filename = inspect.getsourcefile(value) or ''
+    except TypeError:  # Built-in classes have no source file
+        return False
+    return os.path.abspath(filename).startswith(PROJECT_ROOT + os.sep)
+
+
+def _class_functions(cls):
+    """Functions defined in a class body (methods, static and class methods, properties)"""
+    functions = []
+    for name, member in sorted(vars(cls).items()):
+        if isinstance(member, (staticmethod, classmethod)):
+            member = member.__func__
+        if isinstance(member, property):
+            functions.extend(f for f in (member.fget, member.fset, member.fdel) if f is not None)
+        elif isinstance(member, types.FunctionType):
+            functions.append(member)
+    return functions
+
+
+def _code_names(code):
+    """Global names used by a code object and the code objects nested in it"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+@lru_cache(maxsize=None)
+def source_fingerprint(func):
+    """
+    Hash a generator together with everything in the project it calls
+
+    Referenced project functions are followed recursively; referenced
+    project classes contribute their source and their methods and base
+    classes are followed in turn (so ImpulseResponse.convolve is hashed
+    for a generator that builds an ImpulseResponse). Referenced module
+    constants (numbers, strings, tuples...) contribute their repr.
+    Library code (NumPy, SciPy) is not hashed.
+    """
+    digest = hashlib.sha256()
+    seen = set()
+    pending = [inspect.unwrap(func)]
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        digest.update(f"{current.__module__}.{current.__qualname__}\n".encode())
+        digest.update(inspect.getsource(current).encode())
+
+        if isinstance(current, type):
+            pending.extend(base for base in current.__bases__ if _is_project_code(base))
+            pending.extend(_class_functions(current))
+            continue
+
+        for name in sorted(_code_names(current.__code__)):
+            value = current.__globals__.get(name)
+            if isinstance(value, (types.FunctionType, type)) or hasattr(value, '__wrapped__'):
+                value = inspect.unwrap(value)
+                if _is_project_code(value):
+                    pending.append(value)
+            elif isinstance(value, (bool, int, float, str, tuple)):
+                digest.update(f"{name}={value!r}\n".encode())
+    return digest.hexdigest()
+
+
+def build_key(func, params, sample_rate):
+    """Key identifying one output: generator code, parameters and sample rate"""
+    payload = json.dumps({
+        'source': source_fingerprint(func),
+        'params': params,
+        'sample_rate': sample_rate,
+    }, sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """Build keys, checksums and sizes of the files in one output directory"""
+
+    def __init__(self, path):
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.entries = {}
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('files', {})
+        except (OSError, ValueError):
+            pass
+
+    def _relpath(self, filename):
+        return os.path.relpath(os.path.abspath(filename), self.root).replace(os.sep, '/')
+
+    def is_current(self, filename, key):
+        """
+        True if filename was built from the same key and is unmodified
+
+        The size is checked first as a cheap reject; the checksum then
+        catches a file edited or replaced in place at the same size
+        (a WAV of the same length always has the same size).
+        """
+        entry = self.entries.get(self._relpath(filename))
+        if entry is None or entry['key'] != key:
+            return False
+        try:
+            if os.path.getsize(filename) != entry['size']:
+                return False
+            return file_sha256(filename) == entry['sha256']
+        except OSError:
+            return False
+
+    def record(self, filename, key):
+        """Store the key, checksum and size of a freshly built file"""
+        self.entries[self._relpath(filename)] = {
+            'key': key,
+            'sha256': file_sha256(filename),
+            'size': os.path.getsize(filename),
+        }
+
+    def total_size(self):
+        return sum(entry['size'] for entry in self.entries.values())
+
+    def save(self):
+        """Write the manifest atomically"""
+        data = {
+            'version': MANIFEST_VERSION,
+            'files': dict(sorted(self.entries.items())),
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.write('\n')
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -1,24 +1,33 @@
 """
 HAOS.fm Drum Sample Generator
 Generates all TR-808/909 style drum sounds as WAV files
+
+Only samples whose generator code or parameters changed since the last
+run are rewritten (see build_manifest.py); pass --force to rebuild all.
 """
 
 import numpy as np
 from scipy import signal
-import wave
+import argparse
 import os
+import sys
+import zlib
+
+SYNTHESIS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'synthesis')
+if SYNTHESIS_DIR not in sys.path:
+    sys.path.insert(0, SYNTHESIS_DIR)
+
+from build_manifest import BuildManifest, build_key  # noqa: E402
+from wav_io import write_wav  # noqa: E402
 
 SAMPLE_RATE = 44100
 OUTPUT_DIR = "../mobile/assets/sounds/drums"
+MANIFEST_NAME = "drum_samples_manifest.json"
 
 def to_wav_bytes(audio_int16, filename):
     """Save audio to WAV file"""
     filepath = os.path.join(OUTPUT_DIR, filename)
-    with wave.open(filepath, 'wb') as wav_file:
-        wav_file.setnchannels(1)
-        wav_file.setsampwidth(2)  # 16-bit
-        wav_file.setframerate(SAMPLE_RATE)
-        wav_file.writeframes(audio_int16.tobytes())
+    write_wav(filepath, audio_int16, SAMPLE_RATE)
     print(f"  ✅ Saved: {filename}")
     return filepath
 
@@ -392,59 +401,69 @@ def generate_shaker(decay=0.15):
 # MAIN
 # ============================================================
 
-def main():
+# (section, file name, generator, generator kwargs)
+SAMPLES = [
+    ("KICKS", "kick_808.wav", generate_kick_808, {}),
+    ("KICKS", "kick_808_punchy.wav", generate_kick_808, {'pitch': 180, 'decay': 0.4}),
+    ("KICKS", "kick_909.wav", generate_kick_909, {}),
+    ("KICKS", "kick_deep.wav", generate_kick_deep, {}),
+    ("SNARES", "snare_808.wav", generate_snare_808, {}),
+    ("SNARES", "snare_909.wav", generate_snare_909, {}),
+    ("SNARES", "snare_clicky.wav", generate_snare_clicky, {}),
+    ("HI-HATS", "hihat_closed.wav", generate_hihat_closed, {}),
+    ("HI-HATS", "hihat_open.wav", generate_hihat_open, {}),
+    ("HI-HATS", "hihat_pedal.wav", generate_hihat_pedal, {}),
+    ("CYMBALS", "ride.wav", generate_ride, {}),
+    ("CYMBALS", "crash.wav", generate_crash, {}),
+    ("CLAPS", "clap.wav", generate_clap, {}),
+    ("CLAPS", "snap.wav", generate_snap, {}),
+    ("TOMS", "tom_low.wav", generate_tom_low, {}),
+    ("TOMS", "tom_mid.wav", generate_tom_mid, {}),
+    ("TOMS", "tom_high.wav", generate_tom_high, {}),
+    ("PERCUSSION", "rimshot.wav", generate_rimshot, {}),
+    ("PERCUSSION", "cowbell.wav", generate_cowbell, {}),
+    ("PERCUSSION", "clave.wav", generate_clave, {}),
+    ("PERCUSSION", "shaker.wav", generate_shaker, {}),
+]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the HAOS.fm drum samples")
+    parser.add_argument('--force', action='store_true', help="rewrite every sample, even if unchanged")
+    args = parser.parse_args(argv)
+    
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     print("🥁 Generating HAOS.fm Drum Samples...")
     print(f"📂 Output: {os.path.abspath(OUTPUT_DIR)}")
-    print()
     
-    # Kicks
-    print("🔈 KICKS:")
-    to_wav_bytes(generate_kick_808(), "kick_808.wav")
-    to_wav_bytes(generate_kick_808(pitch=180, decay=0.4), "kick_808_punchy.wav")
-    to_wav_bytes(generate_kick_909(), "kick_909.wav")
-    to_wav_bytes(generate_kick_deep(), "kick_deep.wav")
-    
-    # Snares
-    print("🔈 SNARES:")
-    to_wav_bytes(generate_snare_808(), "snare_808.wav")
-    to_wav_bytes(generate_snare_909(), "snare_909.wav")
-    to_wav_bytes(generate_snare_clicky(), "snare_clicky.wav")
-    
-    # Hi-hats
-    print("🔈 HI-HATS:")
-    to_wav_bytes(generate_hihat_closed(), "hihat_closed.wav")
-    to_wav_bytes(generate_hihat_open(), "hihat_open.wav")
-    to_wav_bytes(generate_hihat_pedal(), "hihat_pedal.wav")
-    
-    # Cymbals
-    print("🔈 CYMBALS:")
-    to_wav_bytes(generate_ride(), "ride.wav")
-    to_wav_bytes(generate_crash(), "crash.wav")
-    
-    # Claps
-    print("🔈 CLAPS:")
-    to_wav_bytes(generate_clap(), "clap.wav")
-    to_wav_bytes(generate_snap(), "snap.wav")
-    
-    # Toms
-    print("🔈 TOMS:")
-    to_wav_bytes(generate_tom_low(), "tom_low.wav")
-    to_wav_bytes(generate_tom_mid(), "tom_mid.wav")
-    to_wav_bytes(generate_tom_high(), "tom_high.wav")
-    
-    # Percussion
-    print("🔈 PERCUSSION:")
-    to_wav_bytes(generate_rimshot(), "rimshot.wav")
-    to_wav_bytes(generate_cowbell(), "cowbell.wav")
-    to_wav_bytes(generate_clave(), "clave.wav")
-    to_wav_bytes(generate_shaker(), "shaker.wav")
+    manifest = BuildManifest(os.path.join(OUTPUT_DIR, MANIFEST_NAME))
+    section = None
+    built = 0
+    try:
+        for sample_section, filename, generator, kwargs in SAMPLES:
+            if sample_section != section:
+                section = sample_section
+                print()
+                print(f"🔈 {section}:")
+            
+            key = build_key(generator, kwargs, SAMPLE_RATE)
+            filepath = os.path.join(OUTPUT_DIR, filename)
+            if not args.force and manifest.is_current(filepath, key):
+                print(f"  ⏭️  Unchanged: {filename}")
+                continue
+            
+            # Seed per file so noise-based sounds are reproducible
+            np.random.seed(zlib.crc32(filename.encode()))
+            to_wav_bytes(generator(**kwargs), filename)
+            manifest.record(filepath, key)
+            built += 1
+    finally:
+        manifest.save()
     
     print()
-    print("✅ Done! Generated all drum samples.")
+    print(f"✅ Done! {built} drum samples generated, {len(SAMPLES) - built} unchanged.")
     
     # List files
-    files = os.listdir(OUTPUT_DIR)
+    files = [f for f in os.listdir(OUTPUT_DIR) if f.endswith('.wav')]
     print(f"📦 {len(files)} files in {OUTPUT_DIR}:")
     for f in sorted(files):
         size = os.path.getsize(os.path.join(OUTPUT_DIR, f)) // 1024
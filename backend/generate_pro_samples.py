@@ -8,6 +8,9 @@ Generates high-quality drum and synth samples with:
 - Different lengths (short, medium, long)
 - Effects: reverb, drive, saturation
 - Multiple sample rates: 44.1kHz, 96kHz, 192kHz
+- Parallel builds across CPU cores (ProcessPoolExecutor)
+- Incremental: only samples whose generator code, parameters or sample
+  rate changed are re-rendered (see build_manifest.py)
 
 Sound categories:
 - Kicks: 808, 909, punchy, deep, reverb, distorted, sub bass
@@ -16,35 +19,62 @@ Sound categories:
 - Bass: arpeggio, sub, growl, acid, reese
 - Synths: pads, leads, stabs, arps
 - FX: risers, impacts, sweeps
+
+Usage:
+    python generate_pro_samples.py                       # all rates, all cores
+    python generate_pro_samples.py --rates standard --jobs 4
+    python generate_pro_samples.py --force               # rebuild everything
 """
 
 import numpy as np
 from scipy import signal
-from scipy.io import wavfile
+import argparse
 import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+SYNTHESIS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'synthesis')
+if SYNTHESIS_DIR not in sys.path:
+    sys.path.insert(0, SYNTHESIS_DIR)
+
+from dsp_cache import butter  # noqa: E402
+from dsp_dtype import as_dsp, dsp_dtype, exp_decay, silence  # noqa: E402
+from filters import StreamingFilter  # noqa: E402
+from reverb import apply_reverb as convolution_reverb  # noqa: E402
+from wav_io import write_wav  # noqa: E402
+from build_manifest import BuildManifest, build_key  # noqa: E402
 
 # Configuration
 OUTPUT_DIR = "../mobile/assets/sounds"
+MANIFEST_NAME = "pro_samples_manifest.json"
 SAMPLE_RATES = {
     'standard': 44100,
     'hd': 96000,
     'ultra': 192000
 }
 
-def ensure_dirs():
+def rate_dir(rate_name, output_dir=OUTPUT_DIR):
+    """Output root for a sample rate ('standard' at the top, others in a subfolder)"""
+    return output_dir if rate_name == 'standard' else f"{output_dir}/{rate_name}"
+
+def ensure_dirs(rate_names=('standard',), output_dir=OUTPUT_DIR):
     """Create output directories"""
-    dirs = [
-        f"{OUTPUT_DIR}/drums",
-        f"{OUTPUT_DIR}/drums/kicks",
-        f"{OUTPUT_DIR}/drums/snares", 
-        f"{OUTPUT_DIR}/drums/hihats",
-        f"{OUTPUT_DIR}/drums/percussion",
-        f"{OUTPUT_DIR}/bass",
-        f"{OUTPUT_DIR}/synths",
-        f"{OUTPUT_DIR}/fx",
-    ]
-    for d in dirs:
-        os.makedirs(d, exist_ok=True)
+    for rate_name in rate_names:
+        root = rate_dir(rate_name, output_dir)
+        dirs = [
+            f"{root}/drums",
+            f"{root}/drums/kicks",
+            f"{root}/drums/snares",
+            f"{root}/drums/hihats",
+            f"{root}/drums/percussion",
+            f"{root}/bass",
+            f"{root}/synths",
+            f"{root}/fx",
+        ]
+        for d in dirs:
+            os.makedirs(d, exist_ok=True)
 
 # ============================================
 # ADSR ENVELOPE GENERATOR
@@ -61,7 +91,7 @@ def adsr_envelope(length, attack, decay, sustain_level, release, sample_rate=441
     if sustain_samples < 0:
         sustain_samples = 0
     
-    envelope = np.zeros(samples)
+    envelope = silence(samples)
     
     # Attack
     if attack_samples > 0:
@@ -89,48 +119,63 @@ def adsr_envelope(length, attack, decay, sustain_level, release, sample_rate=441
 
 # ============================================
 # EFFECTS PROCESSORS
+# Buffers are in the DSP dtype policy (see app/synthesis/dsp_dtype.py);
+# time bases and phases stay float64
 # ============================================
 
+def normalize(audio):
+    """Scale audio in place to just under full scale"""
+    audio /= np.max(np.abs(audio)) + 0.001
+    return audio
+
 def apply_drive(audio, drive_amount=2.0):
     """Apply soft clipping distortion"""
-    return np.tanh(audio * drive_amount) / np.tanh(drive_amount)
+    driven = np.multiply(audio, drive_amount)
+    np.tanh(driven, out=driven)
+    driven /= np.tanh(drive_amount)
+    return driven
 
 def apply_saturation(audio, saturation=1.5):
     """Apply warm tube-style saturation"""
-    return np.sign(audio) * (1 - np.exp(-np.abs(audio) * saturation))
+    saturated = np.abs(audio)
+    saturated *= -saturation
+    np.exp(saturated, out=saturated)
+    np.subtract(1, saturated, out=saturated)
+    saturated *= np.sign(audio)
+    return saturated
 
 def apply_reverb(audio, decay=0.3, mix=0.3, sample_rate=44100):
-    """Apply simple reverb effect"""
+    """Apply convolution reverb (generated room IR, see app/synthesis/reverb.py)"""
     reverb_samples = int(decay * sample_rate)
-    reverb = np.zeros(len(audio) + reverb_samples)
-    reverb[:len(audio)] = audio
-    
-    # Multiple delay taps for reverb
-    delays = [int(0.023 * sample_rate), int(0.037 * sample_rate), 
-              int(0.051 * sample_rate), int(0.071 * sample_rate)]
-    gains = [0.5, 0.3, 0.2, 0.1]
-    
-    for delay, gain in zip(delays, gains):
-        if delay < len(reverb):
-            reverb[delay:] += reverb[:-delay] * gain * mix
-    
-    # Normalize
-    reverb = reverb[:len(audio) + reverb_samples]
-    return reverb / np.max(np.abs(reverb) + 0.001)
+    wet = convolution_reverb(audio, decay, mix, sample_rate)
+
+    # Keep the output length at audio + decay, then normalize
+    reverb = silence(len(audio) + reverb_samples)
+    reverb[:len(wet)] = wet[:len(reverb)]
+    return normalize(reverb)
+
+def apply_filter(audio, cutoff, filter_type='lowpass', resonance=1.0, sample_rate=44100, zero_phase=False):
+    """
+    Apply filter with resonance
 
-def apply_filter(audio, cutoff, filter_type='lowpass', resonance=1.0, sample_rate=44100):
-    """Apply filter with resonance"""
+    Causal by default: the state is carried across fixed-size blocks, so
+    memory stays bounded however long the render. zero_phase=True runs
+    the filter forwards and backwards (filtfilt) on the whole signal.
+    """
     nyq = sample_rate / 2
     normalized_cutoff = min(cutoff / nyq, 0.99)
     
     if filter_type == 'lowpass':
-        b, a = signal.butter(2, normalized_cutoff, btype='low')
+        btype, wn = 'low', normalized_cutoff
     elif filter_type == 'highpass':
-        b, a = signal.butter(2, normalized_cutoff, btype='high')
+        btype, wn = 'high', normalized_cutoff
     elif filter_type == 'bandpass':
-        b, a = signal.butter(2, [normalized_cutoff * 0.8, min(normalized_cutoff * 1.2, 0.99)], btype='band')
+        btype, wn = 'band', [normalized_cutoff * 0.8, min(normalized_cutoff * 1.2, 0.99)]
     
-    return signal.filtfilt(b, a, audio)
+    if zero_phase:
+        b, a = butter(2, wn, btype=btype)
+        return as_dsp(signal.filtfilt(b, a, audio))
+    return StreamingFilter(butter(2, wn, btype=btype, output='sos')).filter(audio)
 
 def apply_compression(audio, threshold=0.5, ratio=4.0):
     """Apply dynamic compression"""
@@ -154,17 +199,17 @@ def generate_kick_808(pitch=55, length=0.5, attack=0.001, decay=0.3, drive=1.0,
     
     # Generate sine wave with pitch sweep
     phase = 2 * np.pi * np.cumsum(pitch_env) / sample_rate
-    kick = np.sin(phase)
+    kick = np.sin(phase, out=silence(len(t)))
     
     # Amplitude envelope
     env = adsr_envelope(length, attack, decay, 0.0, 0.1, sample_rate)
-    kick = kick * env[:len(kick)]
+    kick *= env[:len(kick)]
     
     # Apply drive if > 1
     if drive > 1.0:
         kick = apply_drive(kick, drive)
     
-    return kick / np.max(np.abs(kick) + 0.001)
+    return normalize(kick)
 
 def generate_kick_909(pitch=60, length=0.35, sample_rate=44100):
     """909-style punchy kick"""
@@ -175,17 +220,18 @@ def generate_kick_909(pitch=60, length=0.35, sample_rate=44100):
     phase = 2 * np.pi * np.cumsum(pitch_env) / sample_rate
     
     # Main tone
-    kick = np.sin(phase)
+    kick = np.sin(phase, out=silence(len(t)))
     
     # Add click
-    click = np.exp(-t * 200) * np.random.randn(len(t)) * 0.3
+    click = exp_decay(t, 200)
+    click *= np.random.randn(len(t))
+    click *= 0.3
     kick += click
     
     # Sharp envelope
-    env = np.exp(-t * 15)
-    kick = kick * env
+    kick *= exp_decay(t, 15)
     
-    return kick / np.max(np.abs(kick) + 0.001)
+    return normalize(kick)
 
 def generate_kick_sub(pitch=40, length=0.8, sample_rate=44100):
     """Deep sub bass kick"""
@@ -195,13 +241,12 @@ def generate_kick_sub(pitch=40, length=0.8, sample_rate=44100):
     pitch_env = pitch * (1 + 1.5 * np.exp(-t * 10))
     phase = 2 * np.pi * np.cumsum(pitch_env) / sample_rate
     
-    kick = np.sin(phase)
+    kick = np.sin(phase, out=silence(len(t)))
     
     # Long decay
-    env = np.exp(-t * 5)
-    kick = kick * env
+    kick *= exp_decay(t, 5)
     
-    return kick / np.max(np.abs(kick) + 0.001)
+    return normalize(kick)
 
 def generate_kick_distorted(pitch=55, length=0.4, drive=4.0, sample_rate=44100):
     """Heavy distorted kick"""
@@ -214,7 +259,7 @@ def generate_kick_distorted(pitch=55, length=0.4, drive=4.0, sample_rate=44100):
     # Filter to remove harsh frequencies
     kick = apply_filter(kick, 3000, 'lowpass', sample_rate=sample_rate)
     
-    return kick / np.max(np.abs(kick) + 0.001)
+    return normalize(kick)
 
 def generate_kick_reverb(pitch=55, length=0.5, reverb_decay=0.5, sample_rate=44100):
     """808 kick with reverb tail"""
@@ -231,31 +276,44 @@ def generate_snare_808(length=0.2, tone_pitch=180, sample_rate=44100):
     t = np.linspace(0, length, int(length * sample_rate))
     
     # Tone component
-    tone = np.sin(2 * np.pi * tone_pitch * t) * np.exp(-t * 20)
+    tone = np.sin(2 * np.pi * tone_pitch * t, out=silence(len(t)))
+    tone *= exp_decay(t, 20)
     
     # Noise component
-    noise = np.random.randn(len(t)) * np.exp(-t * 15)
+    noise = as_dsp(np.random.randn(len(t)))
+    noise *= exp_decay(t, 15)
     noise = apply_filter(noise, 8000, 'highpass', sample_rate=sample_rate)
     
-    snare = tone * 0.6 + noise * 0.4
+    snare = tone
+    snare *= 0.6
+    noise *= 0.4
+    snare += noise
     
-    return snare / np.max(np.abs(snare) + 0.001)
+    return normalize(snare)
 
 def generate_snare_909(length=0.25, sample_rate=44100):
     """Punchy 909 snare"""
     t = np.linspace(0, length, int(length * sample_rate))
     
     # Two tones
-    tone1 = np.sin(2 * np.pi * 180 * t) * np.exp(-t * 25)
-    tone2 = np.sin(2 * np.pi * 330 * t) * np.exp(-t * 30)
+    tone1 = np.sin(2 * np.pi * 180 * t, out=silence(len(t)))
+    tone1 *= exp_decay(t, 25)
+    tone2 = np.sin(2 * np.pi * 330 * t, out=silence(len(t)))
+    tone2 *= exp_decay(t, 30)
     
     # Snappy noise
-    noise = np.random.randn(len(t)) * np.exp(-t * 20)
+    noise = as_dsp(np.random.randn(len(t)))
+    noise *= exp_decay(t, 20)
     noise = apply_filter(noise, 5000, 'highpass', sample_rate=sample_rate)
     
-    snare = tone1 * 0.4 + tone2 * 0.2 + noise * 0.4
+    snare = tone1
+    snare *= 0.4
+    tone2 *= 0.2
+    snare += tone2
+    noise *= 0.4
+    snare += noise
     
-    return snare / np.max(np.abs(snare) + 0.001)
+    return normalize(snare)
 
 def generate_snare_clap_layer(length=0.3, sample_rate=44100):
     """Snare layered with clap"""
@@ -265,7 +323,7 @@ def generate_snare_clap_layer(length=0.3, sample_rate=44100):
     t = np.linspace(0, length, int(length * sample_rate))
     
     # Multiple micro-hits for clap
-    clap = np.zeros(len(t))
+    clap = silence(len(t))
     delays = [0, 0.01, 0.02, 0.025]
     for delay in delays:
         start = int(delay * sample_rate)
@@ -276,11 +334,12 @@ def generate_snare_clap_layer(length=0.3, sample_rate=44100):
     clap = apply_filter(clap, 2000, 'highpass', sample_rate=sample_rate)
     
     # Combine
-    result = np.zeros(len(t))
+    result = silence(len(t))
     result[:len(snare)] = snare
-    result += clap * 0.5
+    clap *= 0.5
+    result += clap
     
-    return result / np.max(np.abs(result) + 0.001)
+    return normalize(result)
 
 # ============================================
 # HI-HAT GENERATORS (WHITE NOISE BASED)
@@ -291,51 +350,52 @@ def generate_hihat_closed(length=0.05, sample_rate=44100):
     t = np.linspace(0, length, int(length * sample_rate))
     
     # White noise
-    noise = np.random.randn(len(t))
+    noise = as_dsp(np.random.randn(len(t)))
     
     # Bandpass filter for metallic sound
     noise = apply_filter(noise, 8000, 'highpass', sample_rate=sample_rate)
     
     # Sharp envelope
-    env = np.exp(-t * 100)
-    hihat = noise * env
+    hihat = noise
+    hihat *= exp_decay(t, 100)
     
-    return hihat / np.max(np.abs(hihat) + 0.001)
+    return normalize(hihat)
 
 def generate_hihat_open(length=0.3, sample_rate=44100):
     """Open hi-hat with longer decay"""
     t = np.linspace(0, length, int(length * sample_rate))
     
     # White noise
-    noise = np.random.randn(len(t))
+    noise = as_dsp(np.random.randn(len(t)))
     
     # Highpass for brightness
     noise = apply_filter(noise, 7000, 'highpass', sample_rate=sample_rate)
     
     # Longer envelope
-    env = np.exp(-t * 10)
-    hihat = noise * env
+    hihat = noise
+    hihat *= exp_decay(t, 10)
     
-    return hihat / np.max(np.abs(hihat) + 0.001)
+    return normalize(hihat)
 
 def generate_hihat_sizzle(length=0.4, sample_rate=44100):
     """Sizzly ride-like hi-hat"""
     t = np.linspace(0, length, int(length * sample_rate))
     
     # White noise with modulation
-    noise = np.random.randn(len(t))
+    noise = as_dsp(np.random.randn(len(t)))
     
     # Add some metallic ring
-    ring = np.sin(2 * np.pi * 12000 * t) * 0.3
+    ring = np.sin(2 * np.pi * 12000 * t, out=silence(len(t)))
+    ring *= 0.3
     noise += ring
     
     noise = apply_filter(noise, 6000, 'highpass', sample_rate=sample_rate)
     
     # Slow decay
-    env = np.exp(-t * 6)
-    hihat = noise * env
+    hihat = noise
+    hihat *= exp_decay(t, 6)
     
-    return hihat / np.max(np.abs(hihat) + 0.001)
+    return normalize(hihat)
 
 # ============================================
 # BASS GENERATORS
@@ -346,22 +406,24 @@ def generate_bass_sub(freq=55, length=0.5, sample_rate=44100):
     t = np.linspace(0, length, int(length * sample_rate))
     
     # Pure sine
-    bass = np.sin(2 * np.pi * freq * t)
+    bass = np.sin(2 * np.pi * freq * t, out=silence(len(t)))
     
     # Add subtle second harmonic
-    bass += np.sin(2 * np.pi * freq * 2 * t) * 0.2
+    harmonic = np.sin(2 * np.pi * freq * 2 * t, out=silence(len(t)))
+    harmonic *= 0.2
+    bass += harmonic
     
     env = adsr_envelope(length, 0.01, 0.1, 0.8, 0.2, sample_rate)
-    bass = bass * env[:len(bass)]
+    bass *= env[:len(bass)]
     
-    return bass / np.max(np.abs(bass) + 0.001)
+    return normalize(bass)
 
 def generate_bass_growl(freq=55, length=0.5, sample_rate=44100):
     """Growly bass with harmonics"""
     t = np.linspace(0, length, int(length * sample_rate))
     
     # Sawtooth base
-    bass = signal.sawtooth(2 * np.pi * freq * t)
+    bass = as_dsp(signal.sawtooth(2 * np.pi * freq * t))
     
     # Add distortion
     bass = apply_drive(bass, 2.5)
@@ -373,16 +435,16 @@ def generate_bass_growl(freq=55, length=0.5, sample_rate=44100):
     bass = apply_filter(bass, 1500, 'lowpass', sample_rate=sample_rate)
     
     env = adsr_envelope(length, 0.01, 0.1, 0.7, 0.2, sample_rate)
-    bass = bass * env[:len(bass)]
+    bass *= env[:len(bass)]
     
-    return bass / np.max(np.abs(bass) + 0.001)
+    return normalize(bass)
 
 def generate_bass_acid(freq=55, length=0.3, sample_rate=44100):
     """TB-303 style acid bass"""
     t = np.linspace(0, length, int(length * sample_rate))
     
     # Sawtooth
-    bass = signal.sawtooth(2 * np.pi * freq * t)
+    bass = as_dsp(signal.sawtooth(2 * np.pi * freq * t))
     
     # Resonant filter with envelope
     cutoff_env = 300 + 2000 * np.exp(-t * 15)
@@ -394,9 +456,9 @@ def generate_bass_acid(freq=55, length=0.3, sample_rate=44100):
     bass = apply_saturation(bass, 1.5)
     
     env = adsr_envelope(length, 0.005, 0.1, 0.5, 0.1, sample_rate)
-    bass = bass * env[:len(bass)]
+    bass *= env[:len(bass)]
     
-    return bass / np.max(np.abs(bass) + 0.001)
+    return normalize(bass)
 
 def generate_bass_arpeggio(base_freq=55, length=2.0, bpm=130, sample_rate=44100):
     """Bass arpeggio pattern"""
@@ -408,7 +470,7 @@ def generate_bass_arpeggio(base_freq=55, length=2.0, bpm=130, sample_rate=44100)
     step_duration = 60 / bpm / 2  # 8th notes
     samples_per_step = int(step_duration * sample_rate)
     
-    bass = np.zeros(len(t))
+    bass = silence(len(t))
     
     for i, ratio in enumerate(ratios * 4):  # 4 repetitions
         start = i * samples_per_step
@@ -420,14 +482,13 @@ def generate_bass_arpeggio(base_freq=55, length=2.0, bpm=130, sample_rate=44100)
         freq = base_freq * ratio
         t_step = np.linspace(0, step_duration, end - start)
         
-        note = np.sin(2 * np.pi * freq * t_step)
-        note *= np.exp(-t_step * 10)  # Quick decay
-        
-        bass[start:end] = note
+        # Written straight into its slot of the bass line
+        note = np.sin(2 * np.pi * freq * t_step, out=bass[start:end])
+        note *= exp_decay(t_step, 10)  # Quick decay
     
     bass = apply_filter(bass, 2000, 'lowpass', sample_rate=sample_rate)
     
-    return bass / np.max(np.abs(bass) + 0.001)
+    return normalize(bass)
 
 # ============================================
 # SYNTH GENERATORS
@@ -438,7 +499,7 @@ def generate_synth_pad(freq=220, length=2.0, sample_rate=44100):
     t = np.linspace(0, length, int(length * sample_rate))
     
     # Multiple detuned oscillators
-    pad = np.zeros(len(t))
+    pad = silence(len(t))
     detune_cents = [-12, -5, 0, 5, 12]
     
     for cents in detune_cents:
@@ -449,51 +510,53 @@ def generate_synth_pad(freq=220, length=2.0, sample_rate=44100):
     
     # Slow attack/release envelope
     env = adsr_envelope(length, 0.5, 0.2, 0.7, 0.8, sample_rate)
-    pad = pad * env[:len(pad)]
+    pad *= env[:len(pad)]
     
     # Lowpass for warmth
     pad = apply_filter(pad, 3000, 'lowpass', sample_rate=sample_rate)
     
-    return pad / np.max(np.abs(pad) + 0.001)
+    return normalize(pad)
 
 def generate_synth_lead(freq=440, length=0.5, sample_rate=44100):
     """Bright synth lead"""
     t = np.linspace(0, length, int(length * sample_rate))
     
     # Sawtooth
-    lead = signal.sawtooth(2 * np.pi * freq * t)
+    lead = as_dsp(signal.sawtooth(2 * np.pi * freq * t))
     
     # Add pulse wave
-    pulse = signal.square(2 * np.pi * freq * t, duty=0.3) * 0.5
-    lead = lead * 0.7 + pulse * 0.3
+    pulse = as_dsp(signal.square(2 * np.pi * freq * t, duty=0.3))
+    pulse *= 0.5
+    lead *= 0.7
+    pulse *= 0.3
+    lead += pulse
     
     # Filter with resonance effect
     lead = apply_filter(lead, 4000, 'lowpass', sample_rate=sample_rate)
     
     env = adsr_envelope(length, 0.01, 0.1, 0.8, 0.2, sample_rate)
-    lead = lead * env[:len(lead)]
+    lead *= env[:len(lead)]
     
-    return lead / np.max(np.abs(lead) + 0.001)
+    return normalize(lead)
 
 def generate_synth_stab(freq=440, length=0.15, sample_rate=44100):
     """Short synth stab/chord"""
     t = np.linspace(0, length, int(length * sample_rate))
     
     # Chord (major triad)
-    stab = np.zeros(len(t))
+    stab = silence(len(t))
     for ratio in [1, 1.26, 1.5]:  # Major triad
         stab += signal.sawtooth(2 * np.pi * freq * ratio * t)
     
     stab /= 3
     
     # Sharp envelope
-    env = np.exp(-t * 30)
-    stab = stab * env
+    stab *= exp_decay(t, 30)
     
     # Bandpass for punch
     stab = apply_filter(stab, 2000, 'lowpass', sample_rate=sample_rate)
     
-    return stab / np.max(np.abs(stab) + 0.001)
+    return normalize(stab)
 
 # ============================================
 # FX GENERATORS
@@ -504,33 +567,42 @@ def generate_riser(length=4.0, sample_rate=44100):
     t = np.linspace(0, length, int(length * sample_rate))
     
     # White noise with rising filter
-    noise = np.random.randn(len(t))
+    noise = as_dsp(np.random.randn(len(t)))
     
     # Rising pitch sine
     freq_env = 100 + 2000 * (t / length) ** 2
     phase = 2 * np.pi * np.cumsum(freq_env) / sample_rate
-    sine = np.sin(phase)
+    sine = np.sin(phase, out=silence(len(t)))
     
-    riser = noise * 0.5 + sine * 0.5
+    riser = noise
+    riser *= 0.5
+    sine *= 0.5
+    riser += sine
     
     # Rising amplitude
-    amp_env = (t / length) ** 2
-    riser = riser * amp_env
+    amp_env = np.divide(t, length, dtype=dsp_dtype())
+    np.square(amp_env, out=amp_env)
+    riser *= amp_env
     
-    return riser / np.max(np.abs(riser) + 0.001)
+    return normalize(riser)
 
 def generate_impact(length=1.0, sample_rate=44100):
     """Big impact/hit"""
     t = np.linspace(0, length, int(length * sample_rate))
     
     # Low boom
-    boom = np.sin(2 * np.pi * 40 * t) * np.exp(-t * 5)
+    boom = np.sin(2 * np.pi * 40 * t, out=silence(len(t)))
+    boom *= exp_decay(t, 5)
     
     # Noise layer
-    noise = np.random.randn(len(t)) * np.exp(-t * 20)
+    noise = as_dsp(np.random.randn(len(t)))
+    noise *= exp_decay(t, 20)
     
     # Combine with reverb
-    impact = boom * 0.7 + noise * 0.3
+    impact = boom
+    impact *= 0.7
+    noise *= 0.3
+    impact += noise
     impact = apply_reverb(impact, 0.8, 0.5, sample_rate)
     
     return impact
@@ -540,160 +612,171 @@ def generate_impact(length=1.0, sample_rate=44100):
 # ============================================
 
 def save_wav(audio, filename, sample_rate=44100):
-    """Save audio as WAV file"""
-    # Normalize to 16-bit range
-    audio = audio / (np.max(np.abs(audio)) + 0.001)
-    audio = (audio * 32767).astype(np.int16)
-    wavfile.write(filename, sample_rate, audio)
-    
-    size_kb = os.path.getsize(filename) // 1024
-    print(f"  ✅ Saved: {os.path.basename(filename)} ({size_kb}KB)")
+    """Save audio as WAV file, returning its size in bytes"""
+    # Normalize as part of the 16-bit conversion, streamed to the file
+    return write_wav(filename, audio, sample_rate, gain=1 / (np.max(np.abs(audio)) + 0.001))
+
+# ============================================
+# JOB TABLE
+# ============================================
+
+# (category folder, sample name, generator, generator kwargs). Generators
+# are module-level functions and kwargs plain values, so jobs pickle
+# cleanly into worker processes; sample_rate is added per build.
+JOBS = [
+    # Kicks
+    ('drums/kicks', 'kick_808_soft', generate_kick_808, {'pitch': 50, 'length': 0.5, 'drive': 1.0}),
+    ('drums/kicks', 'kick_808_hard', generate_kick_808, {'pitch': 55, 'length': 0.4, 'drive': 2.0}),
+    ('drums/kicks', 'kick_808_long', generate_kick_808, {'pitch': 45, 'length': 0.8, 'decay': 0.5}),
+    ('drums/kicks', 'kick_808_short', generate_kick_808, {'pitch': 60, 'length': 0.2, 'decay': 0.15}),
+    ('drums/kicks', 'kick_909_punchy', generate_kick_909, {'pitch': 65, 'length': 0.3}),
+    ('drums/kicks', 'kick_909_tight', generate_kick_909, {'pitch': 70, 'length': 0.2}),
+    ('drums/kicks', 'kick_sub_deep', generate_kick_sub, {'pitch': 35, 'length': 1.0}),
+    ('drums/kicks', 'kick_sub_rumble', generate_kick_sub, {'pitch': 30, 'length': 1.2}),
+    ('drums/kicks', 'kick_distorted_heavy', generate_kick_distorted, {'pitch': 55, 'length': 0.4, 'drive': 5.0}),
+    ('drums/kicks', 'kick_distorted_gritty', generate_kick_distorted, {'pitch': 50, 'length': 0.5, 'drive': 3.0}),
+    ('drums/kicks', 'kick_reverb_hall', generate_kick_reverb, {'pitch': 55, 'length': 0.5, 'reverb_decay': 0.7}),
+    ('drums/kicks', 'kick_reverb_room', generate_kick_reverb, {'pitch': 55, 'length': 0.4, 'reverb_decay': 0.3}),
+    # Snares
+    ('drums/snares', 'snare_808_tight', generate_snare_808, {'length': 0.15, 'tone_pitch': 180}),
+    ('drums/snares', 'snare_808_fat', generate_snare_808, {'length': 0.25, 'tone_pitch': 150}),
+    ('drums/snares', 'snare_808_bright', generate_snare_808, {'length': 0.18, 'tone_pitch': 220}),
+    ('drums/snares', 'snare_909_punchy', generate_snare_909, {'length': 0.2}),
+    ('drums/snares', 'snare_909_long', generate_snare_909, {'length': 0.35}),
+    ('drums/snares', 'snare_clap_layer', generate_snare_clap_layer, {'length': 0.3}),
+    ('drums/snares', 'snare_clap_tight', generate_snare_clap_layer, {'length': 0.2}),
+    ('drums/snares', 'snare_rimshot', generate_snare_808, {'length': 0.1, 'tone_pitch': 400}),
+    # Hi-hats (white noise based)
+    ('drums/hihats', 'hihat_closed_tight', generate_hihat_closed, {'length': 0.03}),
+    ('drums/hihats', 'hihat_closed_medium', generate_hihat_closed, {'length': 0.06}),
+    ('drums/hihats', 'hihat_closed_soft', generate_hihat_closed, {'length': 0.08}),
+    ('drums/hihats', 'hihat_open_short', generate_hihat_open, {'length': 0.2}),
+    ('drums/hihats', 'hihat_open_long', generate_hihat_open, {'length': 0.5}),
+    ('drums/hihats', 'hihat_pedal', generate_hihat_closed, {'length': 0.1}),
+    ('drums/hihats', 'hihat_sizzle', generate_hihat_sizzle, {'length': 0.4}),
+    ('drums/hihats', 'hihat_sizzle_long', generate_hihat_sizzle, {'length': 0.6}),
+    # Bass
+    ('bass', 'bass_sub_C1', generate_bass_sub, {'freq': 32.7, 'length': 0.5}),
+    ('bass', 'bass_sub_E1', generate_bass_sub, {'freq': 41.2, 'length': 0.5}),
+    ('bass', 'bass_sub_G1', generate_bass_sub, {'freq': 49.0, 'length': 0.5}),
+    ('bass', 'bass_growl_low', generate_bass_growl, {'freq': 55, 'length': 0.4}),
+    ('bass', 'bass_growl_mid', generate_bass_growl, {'freq': 82.4, 'length': 0.4}),
+    ('bass', 'bass_acid_C2', generate_bass_acid, {'freq': 65.4, 'length': 0.3}),
+    ('bass', 'bass_acid_E2', generate_bass_acid, {'freq': 82.4, 'length': 0.3}),
+    ('bass', 'bass_acid_G2', generate_bass_acid, {'freq': 98.0, 'length': 0.3}),
+    ('bass', 'bass_arpeggio_120bpm', generate_bass_arpeggio, {'base_freq': 55, 'length': 2.0, 'bpm': 120}),
+    ('bass', 'bass_arpeggio_140bpm', generate_bass_arpeggio, {'base_freq': 55, 'length': 2.0, 'bpm': 140}),
+    # Synths
+    ('synths', 'synth_pad_A3', generate_synth_pad, {'freq': 220, 'length': 2.0}),
+    ('synths', 'synth_pad_C4', generate_synth_pad, {'freq': 261.6, 'length': 2.0}),
+    ('synths', 'synth_pad_E4', generate_synth_pad, {'freq': 329.6, 'length': 2.0}),
+    ('synths', 'synth_lead_A4', generate_synth_lead, {'freq': 440, 'length': 0.5}),
+    ('synths', 'synth_lead_C5', generate_synth_lead, {'freq': 523.3, 'length': 0.5}),
+    ('synths', 'synth_stab_Am', generate_synth_stab, {'freq': 220, 'length': 0.15}),
+    ('synths', 'synth_stab_C', generate_synth_stab, {'freq': 261.6, 'length': 0.15}),
+    ('synths', 'synth_stab_F', generate_synth_stab, {'freq': 349.2, 'length': 0.15}),
+    # FX
+    ('fx', 'fx_riser_4bar', generate_riser, {'length': 4.0}),
+    ('fx', 'fx_riser_8bar', generate_riser, {'length': 8.0}),
+    ('fx', 'fx_impact_short', generate_impact, {'length': 0.5}),
+    ('fx', 'fx_impact_long', generate_impact, {'length': 1.5}),
+]
+
+def job_filename(job, rate_name, output_dir=OUTPUT_DIR):
+    category, name, _, _ = job
+    return f"{rate_dir(rate_name, output_dir)}/{category}/{name}.wav"
+
+def render_job(job, rate_name, output_dir=OUTPUT_DIR):
+    """Render one job at one sample rate and save it; runs in a worker process"""
+    _, name, generator, kwargs = job
+    sample_rate = SAMPLE_RATES[rate_name]
+    filename = job_filename(job, rate_name, output_dir)
+    
+    # Seed per sample so noise-based sounds are identical on every build,
+    # whichever worker renders them
+    np.random.seed(zlib.crc32(name.encode()))
+    
+    start = time.perf_counter()
+    audio = generator(**kwargs, sample_rate=sample_rate)
+    size = save_wav(audio, filename, sample_rate)
+    return filename, size, time.perf_counter() - start
 
 # ============================================
 # MAIN GENERATION
 # ============================================
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the HAOS.fm professional sample pack")
+    parser.add_argument('--rates', nargs='+', choices=list(SAMPLE_RATES), default=list(SAMPLE_RATES),
+                        help="sample rates to build (default: all)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: CPU count; 1 renders in-process)")
+    parser.add_argument('--output', default=OUTPUT_DIR,
+                        help=f"output directory (default: {OUTPUT_DIR})")
+    parser.add_argument('--force', action='store_true',
+                        help="re-render every sample, even if unchanged")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    
     print("🎹 HAOS.fm Professional Sample Generator")
     print("=" * 50)
     
-    ensure_dirs()
-    sample_rate = SAMPLE_RATES['standard']
+    ensure_dirs(args.rates, args.output)
+    manifest = BuildManifest(os.path.join(args.output, MANIFEST_NAME))
     
-    # ----------------------------------------
-    # KICKS - Multiple variations
-    # ----------------------------------------
-    print("\n🔈 KICKS (12 variations):")
-    
-    kicks = {
-        'kick_808_soft': lambda: generate_kick_808(50, 0.5, drive=1.0),
-        'kick_808_hard': lambda: generate_kick_808(55, 0.4, drive=2.0),
-        'kick_808_long': lambda: generate_kick_808(45, 0.8, decay=0.5),
-        'kick_808_short': lambda: generate_kick_808(60, 0.2, decay=0.15),
-        'kick_909_punchy': lambda: generate_kick_909(65, 0.3),
-        'kick_909_tight': lambda: generate_kick_909(70, 0.2),
-        'kick_sub_deep': lambda: generate_kick_sub(35, 1.0),
-        'kick_sub_rumble': lambda: generate_kick_sub(30, 1.2),
-        'kick_distorted_heavy': lambda: generate_kick_distorted(55, 0.4, drive=5.0),
-        'kick_distorted_gritty': lambda: generate_kick_distorted(50, 0.5, drive=3.0),
-        'kick_reverb_hall': lambda: generate_kick_reverb(55, 0.5, reverb_decay=0.7),
-        'kick_reverb_room': lambda: generate_kick_reverb(55, 0.4, reverb_decay=0.3),
-    }
-    
-    for name, gen_func in kicks.items():
-        save_wav(gen_func(), f"{OUTPUT_DIR}/drums/kicks/{name}.wav", sample_rate)
+    # Skip samples whose generator code, parameters, rate and DSP dtype
+    # (AUDIO_DSP_DTYPE) are unchanged
+    tasks = []
+    for rate_name in args.rates:
+        for job in JOBS:
+            key = build_key(job[2], dict(job[3], dtype=dsp_dtype().name), SAMPLE_RATES[rate_name])
+            if args.force or not manifest.is_current(job_filename(job, rate_name, args.output), key):
+                tasks.append((job, rate_name, key))
+    skipped = len(JOBS) * len(args.rates) - len(tasks)
     
-    # ----------------------------------------
-    # SNARES - Multiple variations
-    # ----------------------------------------
-    print("\n🔈 SNARES (8 variations):")
-    
-    snares = {
-        'snare_808_tight': lambda: generate_snare_808(0.15, 180),
-        'snare_808_fat': lambda: generate_snare_808(0.25, 150),
-        'snare_808_bright': lambda: generate_snare_808(0.18, 220),
-        'snare_909_punchy': lambda: generate_snare_909(0.2),
-        'snare_909_long': lambda: generate_snare_909(0.35),
-        'snare_clap_layer': lambda: generate_snare_clap_layer(0.3),
-        'snare_clap_tight': lambda: generate_snare_clap_layer(0.2),
-        'snare_rimshot': lambda: generate_snare_808(0.1, 400),
-    }
-    
-    for name, gen_func in snares.items():
-        save_wav(gen_func(), f"{OUTPUT_DIR}/drums/snares/{name}.wav", sample_rate)
+    print(f"🔧 {len(JOBS)} samples x {len(args.rates)} rates ({', '.join(args.rates)}) on {args.jobs} workers")
+    print(f"⏭️  {skipped} unchanged, {len(tasks)} to render\n")
     
-    # ----------------------------------------
-    # HI-HATS (WHITE NOISE BASED)
-    # ----------------------------------------
-    print("\n🔈 HI-HATS (8 variations):")
-    
-    hihats = {
-        'hihat_closed_tight': lambda: generate_hihat_closed(0.03),
-        'hihat_closed_medium': lambda: generate_hihat_closed(0.06),
-        'hihat_closed_soft': lambda: generate_hihat_closed(0.08),
-        'hihat_open_short': lambda: generate_hihat_open(0.2),
-        'hihat_open_long': lambda: generate_hihat_open(0.5),
-        'hihat_pedal': lambda: generate_hihat_closed(0.1),
-        'hihat_sizzle': lambda: generate_hihat_sizzle(0.4),
-        'hihat_sizzle_long': lambda: generate_hihat_sizzle(0.6),
-    }
-    
-    for name, gen_func in hihats.items():
-        save_wav(gen_func(), f"{OUTPUT_DIR}/drums/hihats/{name}.wav", sample_rate)
-    
-    # ----------------------------------------
-    # BASS
-    # ----------------------------------------
-    print("\n🔈 BASS (10 variations):")
-    
-    basses = {
-        'bass_sub_C1': lambda: generate_bass_sub(32.7, 0.5),
-        'bass_sub_E1': lambda: generate_bass_sub(41.2, 0.5),
-        'bass_sub_G1': lambda: generate_bass_sub(49.0, 0.5),
-        'bass_growl_low': lambda: generate_bass_growl(55, 0.4),
-        'bass_growl_mid': lambda: generate_bass_growl(82.4, 0.4),
-        'bass_acid_C2': lambda: generate_bass_acid(65.4, 0.3),
-        'bass_acid_E2': lambda: generate_bass_acid(82.4, 0.3),
-        'bass_acid_G2': lambda: generate_bass_acid(98.0, 0.3),
-        'bass_arpeggio_120bpm': lambda: generate_bass_arpeggio(55, 2.0, 120),
-        'bass_arpeggio_140bpm': lambda: generate_bass_arpeggio(55, 2.0, 140),
-    }
-    
-    for name, gen_func in basses.items():
-        save_wav(gen_func(), f"{OUTPUT_DIR}/bass/{name}.wav", sample_rate)
-    
-    # ----------------------------------------
-    # SYNTHS
-    # ----------------------------------------
-    print("\n🔈 SYNTHS (8 variations):")
-    
-    synths = {
-        'synth_pad_A3': lambda: generate_synth_pad(220, 2.0),
-        'synth_pad_C4': lambda: generate_synth_pad(261.6, 2.0),
-        'synth_pad_E4': lambda: generate_synth_pad(329.6, 2.0),
-        'synth_lead_A4': lambda: generate_synth_lead(440, 0.5),
-        'synth_lead_C5': lambda: generate_synth_lead(523.3, 0.5),
-        'synth_stab_Am': lambda: generate_synth_stab(220, 0.15),
-        'synth_stab_C': lambda: generate_synth_stab(261.6, 0.15),
-        'synth_stab_F': lambda: generate_synth_stab(349.2, 0.15),
-    }
-    
-    for name, gen_func in synths.items():
-        save_wav(gen_func(), f"{OUTPUT_DIR}/synths/{name}.wav", sample_rate)
-    
-    # ----------------------------------------
-    # FX
-    # ----------------------------------------
-    print("\n🔈 FX (4 variations):")
-    
-    fx = {
-        'fx_riser_4bar': lambda: generate_riser(4.0),
-        'fx_riser_8bar': lambda: generate_riser(8.0),
-        'fx_impact_short': lambda: generate_impact(0.5),
-        'fx_impact_long': lambda: generate_impact(1.5),
-    }
-    
-    for name, gen_func in fx.items():
-        save_wav(gen_func(), f"{OUTPUT_DIR}/fx/{name}.wav", sample_rate)
+    build_start = time.perf_counter()
+    total_size = 0
+    total_job_time = 0.0
+    
+    def finish(done, job, rate_name, key, result):
+        nonlocal total_size, total_job_time
+        filename, size, seconds = result
+        manifest.record(filename, key)
+        total_size += size
+        total_job_time += seconds
+        print(f"  ✅ [{done:3d}/{len(tasks)}] {rate_name:8s} {job[1]:24s} {seconds * 1000:7.1f} ms  ({size // 1024}KB)")
+    
+    try:
+        if args.jobs <= 1:
+            for done, (job, rate_name, key) in enumerate(tasks, 1):
+                finish(done, job, rate_name, key, render_job(job, rate_name, args.output))
+        else:
+            with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+                futures = {pool.submit(render_job, job, rate_name, args.output): (job, rate_name, key)
+                           for job, rate_name, key in tasks}
+                for done, future in enumerate(as_completed(futures), 1):
+                    finish(done, *futures[future], future.result())
+    finally:
+        # Keep what was built even if a job failed
+        manifest.save()
+    
+    elapsed = time.perf_counter() - build_start
     
     # ----------------------------------------
     # SUMMARY
     # ----------------------------------------
     print("\n" + "=" * 50)
     print("✅ Sample generation complete!")
-    
-    total_files = len(kicks) + len(snares) + len(hihats) + len(basses) + len(synths) + len(fx)
-    print(f"📦 Total samples generated: {total_files}")
-    print(f"📂 Output directory: {OUTPUT_DIR}")
-    
-    # Count total size
-    total_size = 0
-    for root, dirs, files in os.walk(OUTPUT_DIR):
-        for file in files:
-            if file.endswith('.wav'):
-                total_size += os.path.getsize(os.path.join(root, file))
-    
-    print(f"💾 Total size: {total_size // 1024}KB ({total_size // (1024*1024)}MB)")
+    print(f"📦 Samples generated: {len(tasks)} ({skipped} up to date)")
+    print(f"📂 Output directory: {args.output}")
+    print(f"💾 Written: {total_size // 1024}KB, pack total: {manifest.total_size() // 1024}KB")
+    if tasks:
+        print(f"⏱️  {elapsed:.2f}s wall, {total_job_time:.2f}s render ({total_job_time / elapsed:.1f}x parallel)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+HAOS.fm Load Test
+=================
+Drives the audio engine with a realistic request mix and reports:
+- Throughput (requests/s) over the run
+- p50/p95/p99 latency, overall and per request type
+- Error rate, with load shedding (429/503) counted separately
+- Server RSS (start and peak), cache hit ratio and executor rejections,
+  read from the engine's /metrics endpoint
+
+Targets:
+- In-process (default): the FastAPI app is driven through
+  httpx.ASGITransport in this process. Client and server share one event
+  loop, so latencies include client overhead; useful for comparing
+  executor and cache changes side by side.
+- --url: a running server, e.g. `uvicorn audio_engine:app --workers 4`;
+  the realistic setup for sizing worker counts. With several workers,
+  RSS and cache figures come from whichever worker answers /metrics.
+
+The mix is weighted like a live session: drum pads fire constantly with
+a handful of velocities (mostly cache hits), chords, brass and strings
+are occasional and slow, and a pattern render now and then. Load is
+closed-loop: each of --concurrency clients sends its next request as
+soon as the previous one returns.
+
+Usage:
+    python load_test.py                                   # in-process, 8 clients, 10 s
+    python load_test.py --concurrency 32 --duration 30
+    python load_test.py --url http://localhost:8000 --requests 2000
+    python load_test.py --binary --output load.json       # Accept: audio/wav
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import httpx
+import numpy as np
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DURATION = 10.0
+METRICS_INTERVAL = 0.5  # Seconds between /metrics samples (for peak RSS)
+
+PAD_VELOCITIES = (0.6, 0.8, 1.0)
+PAD_SEEDS = (1, 2, 3, 4)
+NOTE_FREQUENCIES = (220.0, 261.6, 329.6, 392.0, 440.0)
+
+
+def _kick(rng):
+    return 'POST', '/api/audio/play-kick', {'json': {'velocity': rng.choice(PAD_VELOCITIES)}}
+
+
+def _snare(rng):
+    return 'POST', f'/api/audio/play-snare?velocity={rng.choice(PAD_VELOCITIES)}&seed={rng.choice(PAD_SEEDS)}', {}
+
+
+def _hihat(rng):
+    open_hat = 'true' if rng.random() < 0.2 else 'false'
+    return 'POST', f'/api/audio/play-hihat?velocity={rng.choice(PAD_VELOCITIES)}&open={open_hat}&seed={rng.choice(PAD_SEEDS)}', {}
+
+
+def _clap(rng):
+    return 'POST', f'/api/audio/play-clap?velocity={rng.choice(PAD_VELOCITIES)}&seed={rng.choice(PAD_SEEDS)}', {}
+
+
+def _chord(rng):
+    return 'POST', '/api/audio/play-chord', {'json': {
+        'root_frequency': rng.choice(NOTE_FREQUENCIES),
+        'chord_type': rng.choice(('major', 'minor', 'major7', 'minor7')),
+        'duration': rng.choice((1.0, 2.0)),
+    }}
+
+
+def _brass(rng):
+    return 'POST', '/api/audio/play-brass', {'json': {'frequency': rng.choice(NOTE_FREQUENCIES), 'duration': 1.0}}
+
+
+def _strings(rng):
+    return 'POST', '/api/audio/play-strings', {'json': {
+        'frequency': rng.choice(NOTE_FREQUENCIES),
+        'duration': rng.choice((2.0, 4.0)),
+        'reverb': rng.choice((0.0, 0.3)),
+    }}
+
+
+def _pattern(rng):
+    return 'POST', '/api/render/pattern', {'json': {
+        'bpm': rng.choice((120, 128, 135)),
+        'bars': 2,
+        'drums': [
+            {'voice': 'kick', 'steps': [1, 0, 0, 0]},
+            {'voice': 'hat', 'variation': 'tight', 'steps': [0, 0, 1, 0]},
+            {'voice': 'clap', 'steps': [0, 0, 0, 0, 1, 0, 0, 0]},
+        ],
+    }}
+
+
+# name -> (weight, request builder(rng) -> (method, path, request kwargs))
+MIX = {
+    'kick': (30, _kick),
+    'hihat': (25, _hihat),
+    'snare': (20, _snare),
+    'clap': (10, _clap),
+    'chord': (6, _chord),
+    'brass': (3, _brass),
+    'strings': (4, _strings),
+    'pattern': (2, _pattern),
+}
+
+
+def parse_metrics(text):
+    """Unlabelled samples of a Prometheus text page, as {name: value}"""
+    values = {}
+    for line in text.splitlines():
+        if line.startswith('#') or '{' in line:
+            continue
+        name, _, value = line.partition(' ')
+        try:
+            values[name] = float(value)
+        except ValueError:
+            pass
+    return values
+
+
+class LoadTest:
+    """Closed-loop load generator with per-request latency records"""
+
+    def __init__(self, client, concurrency=DEFAULT_CONCURRENCY, duration=DEFAULT_DURATION,
+                 total_requests=None, binary=False, seed=0):
+        self.client = client
+        self.concurrency = concurrency
+        self.duration = duration
+        self.total_requests = total_requests
+        self.headers = {'Accept': 'audio/wav'} if binary else {}
+        self.rng = random.Random(seed)
+        self.names = list(MIX)
+        self.weights = [MIX[name][0] for name in self.names]
+        # (request type, latency in seconds, status code or None on a client error)
+        self.records = []
+        self.metric_samples = []
+        self._issued = 0
+        self._done = False
+
+    def _claim(self, deadline):
+        """Reserve the next request slot, or return False when the run is over"""
+        if self.total_requests is not None:
+            if self._issued >= self.total_requests:
+                return False
+        elif time.perf_counter() >= deadline:
+            return False
+        self._issued += 1
+        return True
+
+    async def _client_loop(self, deadline):
+        while self._claim(deadline):
+            name = self.rng.choices(self.names, self.weights)[0]
+            method, path, kwargs = MIX[name][1](self.rng)
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, path, headers=self.headers, **kwargs)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = None
+            self.records.append((name, time.perf_counter() - start, status))
+
+    async def _scrape_metrics(self):
+        """Sample /metrics until the run ends (peak RSS and final cache stats)"""
+        while True:
+            try:
+                response = await self.client.get('/metrics')
+                if response.status_code == 200:
+                    self.metric_samples.append(parse_metrics(response.text))
+            except httpx.HTTPError:
+                pass
+            if self._done:
+                return
+            await asyncio.sleep(METRICS_INTERVAL)
+
+    async def run(self):
+        scraper = asyncio.create_task(self._scrape_metrics())
+        start = time.perf_counter()
+        deadline = start + self.duration
+        await asyncio.gather(*(self._client_loop(deadline) for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - start
+        self._done = True
+        await scraper
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        """Summary of the run as a JSON-serialisable dict"""
+        def summarise(records):
+            latencies = np.array([latency for _, latency, _ in records]) * 1000
+            statuses = [status for _, _, status in records]
+            shed = sum(status in (429, 503) for status in statuses)
+            errors = sum(status is None or status >= 400 for status in statuses) - shed
+            p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) if len(latencies) else (0.0, 0.0, 0.0)
+            return {
+                "requests": len(records),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "error_rate": round(errors / len(records), 4) if records else 0.0,
+                "shed_rate": round(shed / len(records), 4) if records else 0.0,
+            }
+
+        overall = summarise(self.records)
+        overall["throughput_rps"] = round(len(self.records) / elapsed, 1) if elapsed > 0 else 0.0
+        overall["elapsed_s"] = round(elapsed, 2)
+
+        server = {}
+        rss = [sample['process_resident_memory_bytes'] for sample in self.metric_samples
+               if 'process_resident_memory_bytes' in sample]
+        if rss:
+            server["rss_start_mib"] = round(rss[0] / 2 ** 20, 1)
+            server["rss_peak_mib"] = round(max(rss) / 2 ** 20, 1)
+        if self.metric_samples:
+            last = self.metric_samples[-1]
+            for key, name in (("cache_hit_ratio", 'haos_render_cache_hit_ratio'),
+                              ("executor_rejected", 'haos_executor_rejected_total'),
+                              ("executor_timeouts", 'haos_executor_timeouts_total')):
+                if name in last:
+                    server[key] = last[name]
+
+        by_type = {}
+        for name in self.names:
+            records = [record for record in self.records if record[0] == name]
+            if records:
+                by_type[name] = summarise(records)
+
+        return {
+            "concurrency": self.concurrency,
+            "overall": overall,
+            "by_type": by_type,
+            "server": server,
+        }
+
+
+def print_report(report, target):
+    overall = report["overall"]
+    print(f"\n📈 {overall['requests']} requests in {overall['elapsed_s']}s against {target}"
+          f" ({report['concurrency']} clients)")
+    print(f"   Throughput: {overall['throughput_rps']} req/s")
+    print(f"   Latency:    p50 {overall['p50_ms']} ms  p95 {overall['p95_ms']} ms  p99 {overall['p99_ms']} ms")
+    print(f"   Errors:     {overall['error_rate']:.2%}  (shed with 429/503: {overall['shed_rate']:.2%})")
+
+    print("\n   Type        Requests     p50 ms     p95 ms     p99 ms   Errors")
+    for name, stats in report["by_type"].items():
+        print(f"   {name:10s}{stats['requests']:10d}{stats['p50_ms']:11.2f}{stats['p95_ms']:11.2f}"
+              f"{stats['p99_ms']:11.2f}{stats['error_rate']:9.2%}")
+
+    server = report["server"]
+    if server:
+        print("\n🖥️  Server")
+        if "rss_peak_mib" in server:
+            print(f"   RSS:        {server['rss_start_mib']} MiB at start, {server['rss_peak_mib']} MiB peak")
+        if "cache_hit_ratio" in server:
+            print(f"   Cache hits: {server['cache_hit_ratio']:.1%}")
+        if "executor_rejected" in server:
+            print(f"   Executor:   {server['executor_rejected']:.0f} rejected, "
+                  f"{server.get('executor_timeouts', 0):.0f} timed out")
+    else:
+        print("\n🖥️  Server metrics unavailable (no /metrics endpoint)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the HAOS.fm audio engine")
+    parser.add_argument('--url', help="base URL of a running server (default: drive the app in-process)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"concurrent clients (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION,
+                        help=f"seconds to run (default: {DEFAULT_DURATION:g})")
+    parser.add_argument('--requests', type=int, dest='total_requests',
+                        help="stop after this many requests instead of after --duration")
+    parser.add_argument('--binary', action='store_true',
+                        help="request audio/wav bodies instead of base64 JSON")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the request mix")
+    parser.add_argument('--output', help="write the report to this JSON file")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    return args
+
+
+async def _main(args):
+    if args.url:
+        target = args.url
+        transport = None
+    else:
+        import audio_engine
+        target = "in-process app"
+        transport = httpx.ASGITransport(app=audio_engine.app)
+
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.url or 'http://audio-engine', transport=transport,
+                                 limits=limits, timeout=60.0) as client:
+        test = LoadTest(client, args.concurrency, args.duration, args.total_requests, args.binary, args.seed)
+        report = await test.run()
+    return target, report
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("🔥 HAOS.fm Load Test")
+    print("=" * 50)
+    amount = f"{args.total_requests} requests" if args.total_requests else f"{args.duration:g}s"
+    print(f"🔧 {args.concurrency} clients, {amount}, mix: "
+          + ", ".join(f"{name} {weight}" for name, (weight, _) in MIX.items()))
+
+    target, report = asyncio.run(_main(args))
+    print_report(report, target)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+
+    if report["overall"]["error_rate"] > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
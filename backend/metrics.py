@@ -0,0 +1,231 @@
+"""
+HAOS.fm Metrics
+Prometheus text-format metrics for the audio engine
+
+A small in-process registry (counters, histograms and callback values
+read at scrape time) rendered in the Prometheus text exposition format,
+so /metrics can be scraped without adding a client library. Request
+counts and latencies are recorded by an ASGI middleware; render stages
+are fed in from stage_timing observers.
+
+Endpoint labels use the route template (/api/audio/play-kick), never the
+raw path, and unmatched paths are grouped under "other", so label
+cardinality stays bounded.
+"""
+
+import math
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Sequence, Tuple
+
+from starlette.routing import Match
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Request latency buckets in seconds (renders take milliseconds to seconds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stage buckets reach further down: an encode or a filter pass can be tens of microseconds
+STAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    """Base class: one metric family with a fixed set of label names"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {', '.join(self.labelnames) or '(none)'}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def samples(self):
+        """Yield (suffix, label values, extra label, value)"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing count per label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, value in items:
+            yield '', values, '', value
+
+
+class Histogram(Metric):
+    """Bucketed observations plus their sum and count per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((values, (list(counts), total)) for values, (counts, total) in self._series.items())
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield '_bucket', values, f'le="{bound}"', cumulative
+            yield '_sum', values, '', total
+            yield '_count', values, '', cumulative
+
+
+class Callback(Metric):
+    """A value read from the application when scraped (queue depth, cache hits)"""
+
+    def __init__(self, name, documentation, read: Callable[[], float], kind: str = 'gauge'):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.read = read
+
+    def samples(self):
+        yield '', (), '', float(self.read())
+
+
+class MetricsRegistry:
+    """Named metric families rendered together for /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, read) -> Callback:
+        return self.register(Callback(name, documentation, read, 'gauge'))
+
+    def counter_callback(self, name, documentation, read) -> Callback:
+        return self.register(Callback(name, documentation, read, 'counter'))
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+def resident_memory_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def route_template(scope) -> str:
+    """Path template of the route matching an ASGI scope, or 'other'"""
+    app = scope.get('app')
+    for route in getattr(app, 'routes', ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, 'path', 'other')
+    return 'other'
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting HTTP requests and timing them
+
+    Latency runs until the last body chunk has been sent, so streamed
+    responses are timed in full. Requests that raise are counted as 500.
+    """
+
+    def __init__(self, app, requests: Counter, latency: Histogram):
+        self.app = app
+        self.requests = requests
+        self.latency = latency
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            endpoint = route_template(scope)
+            method = scope['method']
+            self.requests.inc(method=method, endpoint=endpoint, status=str(status))
+            self.latency.observe(time.perf_counter() - start, method=method, endpoint=endpoint)
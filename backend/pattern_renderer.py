@@ -0,0 +1,237 @@
+"""
+HAOS.fm Pattern Renderer
+Mixes TB-303, TR-808 and ARP 2600 step sequences into one buffer
+
+The voice classes live in app/synthesis. Every hit and note is rendered
+once and kept in a per-process voice cache, so a four-bar beat built from
+a handful of distinct sounds costs a few renders plus buffer adds.
+TR-808 hits come from a memory-mapped sample bank shared by all worker
+processes (see tr808_bank.py); only unknown variations are rendered.
+
+Timeline: steps_per_bar steps to a 4/4 bar (16 = 16th notes, the
+default) at the requested BPM. Drum lanes and the 303
+line loop over their own length; ARP 2600 notes are placed at absolute
+step positions and rendered together by the polyphonic engine, so
+overlapping notes and chords share one pass.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+from render_cache import RenderCache, canonical_key
+
+SYNTHESIS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'synthesis')
+if SYNTHESIS_DIR not in sys.path:
+    sys.path.insert(0, SYNTHESIS_DIR)
+
+from arp2600 import ARP2600  # noqa: E402
+from arp2600_poly import ARP2600Poly  # noqa: E402
+from dsp_dtype import silence  # noqa: E402
+from stage_timing import stage  # noqa: E402
+from tb303 import TB303  # noqa: E402
+from tr808 import TR808  # noqa: E402
+from tr808_bank import TR808Bank  # noqa: E402
+
+# TR-808 lane voices mapped to their generator method names
+DRUM_VOICES = {
+    'kick': 'generate_kick',
+    'hat': 'generate_hat',
+    'clap': 'generate_clap',
+    'perc': 'generate_perc',
+    'ride': 'generate_ride',
+    'crash': 'generate_crash',
+}
+
+# Rendered float voices (808 hits, ARP notes, 303 loops) for this process
+VOICE_CACHE_MAX_BYTES = int(os.environ.get('AUDIO_VOICE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+voice_cache = RenderCache(max_bytes=VOICE_CACHE_MAX_BYTES)
+
+# On-disk TR-808 banks, one per sample rate, mapped on first use
+DRUM_BANK_DIR = os.environ.get('AUDIO_TR808_BANK_DIR', os.path.join(tempfile.gettempdir(), 'haos-tr808-bank'))
+_drum_banks = {}
+_drum_banks_lock = threading.Lock()
+
+
+def drum_bank(sample_rate):
+    """Return the TR-808 bank for sample_rate, loading or building it once"""
+    bank = _drum_banks.get(sample_rate)
+    if bank is None:
+        with _drum_banks_lock:
+            bank = _drum_banks.get(sample_rate)
+            if bank is None:
+                bank = TR808Bank.open(DRUM_BANK_DIR, sample_rate)
+                _drum_banks[sample_rate] = bank
+    return bank
+
+
+def drum_bank_stats():
+    """Bank sizes for the health endpoint"""
+    return {str(rate): bank.stats() for rate, bank in _drum_banks.items()}
+
+
+def step_seconds(bpm, steps_per_bar=16):
+    """Length of one step when a 4/4 bar is divided into steps_per_bar steps"""
+    return 60.0 * 4 / (bpm * steps_per_bar)
+
+
+def step_positions(total_steps, bpm, sample_rate, steps_per_bar=16):
+    """Sample offset of every step (rounded on an exact grid, no drift)"""
+    step_samples = sample_rate * step_seconds(bpm, steps_per_bar)
+    return np.round(np.arange(total_steps + 1) * step_samples).astype(np.int64)
+
+
+def _mix_at(buffer, audio, offset, gain=1.0):
+    """Add audio into buffer at offset, truncating at the end of the buffer"""
+    if offset >= len(buffer):
+        return
+    length = min(len(audio), len(buffer) - offset)
+    buffer[offset:offset + length] += audio[:length] * gain
+
+
+def lane_variation(lane):
+    """Variation of a drum lane; the voice's default (first listed) when not given"""
+    return lane.get('variation') or TR808.VARIATIONS[lane['voice']][0]
+
+
+def _render_drum(voice, variation, sample_rate):
+    hit = drum_bank(sample_rate).get(voice, variation)
+    if hit is not None:
+        return hit
+
+    key = canonical_key('tr808', {'voice': voice, 'variation': variation, 'sample_rate': sample_rate})
+
+    def render():
+        drums = TR808(sample_rate=sample_rate)
+        return getattr(drums, DRUM_VOICES[voice])(variation)
+
+    return voice_cache.get_or_render(key, render)
+
+
+def _render_arp_track(arp, step_length, total_steps, sample_rate):
+    notes = [
+        {
+            'frequency': note['frequency'],
+            'start': note['step'] * step_length,
+            'duration': note.get('length', 1) * step_length,
+            'velocity': note.get('velocity', 1.0),
+        }
+        for note in arp.get('notes') or []
+        if 0 <= note['step'] < total_steps
+    ]
+    key = canonical_key('arp2600', {
+        'preset': arp.get('preset'),
+        'notes': notes,
+        'sample_rate': sample_rate,
+    })
+
+    def render():
+        synth = ARP2600Poly(sample_rate=sample_rate)
+        if arp.get('preset'):
+            synth.load_preset(arp['preset'])
+        return synth.render(notes)
+
+    return voice_cache.get_or_render(key, render)
+
+
+def _render_tb303(track, bpm, sample_rate):
+    line = {'pattern': track['pattern'], 'params': track.get('params') or {}}
+    key = canonical_key('tb303', {'line': line, 'bpm': bpm, 'sample_rate': sample_rate})
+
+    def render():
+        synth = TB303(sample_rate=sample_rate)
+        pattern = synth.load_pattern_from_json(line)
+        return synth.render_pattern(pattern, bpm=bpm)
+
+    return voice_cache.get_or_render(key, render)
+
+
+def _validate_tb303_params(params):
+    """Raise ValueError for TB303 params that are unknown or of the wrong type"""
+    defaults = TB303().params
+    for name, value in params.items():
+        if name not in defaults:
+            raise ValueError(f"tb303.params: unknown param '{name}' "
+                             f"(expected one of {', '.join(defaults)})")
+        if isinstance(defaults[name], str):
+            if value not in TB303.WAVEFORMS:
+                raise ValueError(f"tb303.params: unknown {name} {value!r} "
+                                 f"(expected one of {', '.join(TB303.WAVEFORMS)})")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"tb303.params: {name} must be a number, got {value!r}")
+
+
+def validate_pattern(spec):
+    """Raise ValueError for voices, params or presets the renderer cannot produce"""
+    tb303 = spec.get('tb303')
+    if tb303 and tb303.get('params'):
+        _validate_tb303_params(tb303['params'])
+
+    for index, lane in enumerate(spec.get('drums') or []):
+        if lane['voice'] not in DRUM_VOICES:
+            raise ValueError(f"drums[{index}]: unknown voice '{lane['voice']}' "
+                             f"(expected one of {', '.join(DRUM_VOICES)})")
+        variations = TR808.VARIATIONS[lane['voice']]
+        variation = lane_variation(lane)
+        if variation not in variations:
+            raise ValueError(f"drums[{index}]: unknown {lane['voice']} variation '{variation}' "
+                             f"(expected one of {', '.join(variations)})")
+
+    arp = spec.get('arp2600')
+    if arp and arp.get('preset'):
+        if not ARP2600().load_preset(arp['preset']):
+            raise ValueError(f"arp2600: unknown preset '{arp['preset']}'")
+
+
+@stage('mixing')
+def render_pattern(spec, sample_rate=44100):
+    """
+    Render a multi-track pattern to a float mono buffer in [-1, 1]
+    (dtype per the DSP dtype policy, see dsp_dtype.py)
+
+    spec is a plain dict (see PatternRequest in audio_engine.py) so the
+    function can run in a process pool.
+    """
+    bpm = float(spec.get('bpm', 130.0))
+    steps_per_bar = int(spec.get('steps_per_bar', 16))
+    total_steps = int(spec.get('bars', 1)) * steps_per_bar
+    positions = step_positions(total_steps, bpm, sample_rate, steps_per_bar)
+    mix = silence(int(positions[-1]))
+
+    # TB-303: render one loop of the line and tile it along the timeline
+    tb303 = spec.get('tb303')
+    if tb303 and tb303.get('pattern'):
+        # TB303 steps are 16ths, so give it the tempo at which a 16th lasts one step
+        loop = _render_tb303(tb303, bpm * steps_per_bar / 16, sample_rate)
+        loop_steps = len(tb303['pattern'])
+        gain = tb303.get('level', 1.0)
+        for step in range(0, total_steps, loop_steps):
+            _mix_at(mix, loop, positions[step], gain)
+
+    # TR-808: one cached hit per lane, placed on every non-zero step
+    for lane in spec.get('drums') or []:
+        steps = lane.get('steps') or []
+        if not steps:
+            continue
+        hit = _render_drum(lane['voice'], lane_variation(lane), sample_rate)
+        level = lane.get('level', 1.0)
+        for step in range(total_steps):
+            velocity = steps[step % len(steps)]
+            if velocity:
+                _mix_at(mix, hit, positions[step], level * velocity)
+
+    # ARP 2600: all notes in one polyphonic render, starting at step 0
+    arp = spec.get('arp2600')
+    if arp and arp.get('notes'):
+        track = _render_arp_track(arp, step_seconds(bpm, steps_per_bar), total_steps, sample_rate)
+        _mix_at(mix, track, 0, arp.get('level', 1.0))
+
+    # Keep the summed voices inside full scale
+    peak = np.max(np.abs(mix)) if len(mix) else 0.0
+    if peak > 1.0:
+        mix /= peak
+
+    return mix
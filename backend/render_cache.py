@@ -0,0 +1,123 @@
+"""
+HAOS.fm Render Cache
+Bounded, byte-size-aware LRU cache for rendered audio
+
+Deterministic voices are pure functions of their parameter models, so the
+finished WAV bytes can be reused across requests. Entries are keyed on a
+canonical JSON form of the voice name plus parameters and evicted least
+recently used first once the byte budget is exceeded.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+def _canonicalise(value: Any) -> Any:
+    """Normalise parameter values so equal requests produce equal keys"""
+    if isinstance(value, float):
+        # 6 significant digits: 150.0 and 150.00000001 hit the same entry
+        return float(f"{value:.6g}")
+    if isinstance(value, dict):
+        return {str(k): _canonicalise(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonicalise(v) for v in value]
+    return value
+
+
+def params_to_dict(params: Any) -> dict:
+    """Convert a pydantic model (v1 or v2) or mapping to a plain dict"""
+    if params is None:
+        return {}
+    if hasattr(params, 'model_dump'):
+        return params.model_dump()
+    if hasattr(params, 'dict'):
+        return params.dict()
+    return dict(params)
+
+
+def canonical_key(voice: str, params: Any = None) -> str:
+    """Build a cache key from a voice name and its parameters"""
+    data = _canonicalise(params_to_dict(params))
+    return f"{voice}:{json.dumps(data, sort_keys=True, separators=(',', ':'))}"
+
+
+def _sizeof(value: Any) -> int:
+    """Byte size of a cached value (bytes-like or NumPy array)"""
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    return len(value)
+
+
+class RenderCache:
+    """Thread-safe LRU cache bounded by total payload size"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value and mark it as recently used"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a value, evicting least recently used entries to fit"""
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= _sizeof(previous)
+
+            self._entries[key] = value
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _sizeof(evicted)
+                self.evictions += 1
+
+    def get_or_render(self, key: str, render: Callable[[], Any]) -> Any:
+        """Return the cached value for key, rendering and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            # Rendered outside the lock: concurrent misses may render twice,
+            # but a slow render never blocks cache hits
+            value = render()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Counters for the health endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,111 @@
+"""
+HAOS.fm Render Executor
+Runs CPU-bound DSP off the asyncio event loop
+
+Renders are submitted to a thread pool (NumPy/SciPy release the GIL for
+most heavy work) or a process pool (pure-Python paths). The number of
+renders in flight is bounded: once every worker is busy and the queue is
+full, new work is rejected immediately so the server can shed load with
+429 instead of letting latency grow without limit. Each render also has a
+timeout after which the caller gets a 503.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class ExecutorSaturated(Exception):
+    """All workers busy and the queue is full"""
+
+
+class RenderTimeout(Exception):
+    """A render did not finish within the configured timeout"""
+
+
+class RenderExecutor:
+    """Bounded thread/process pool for synthesis jobs"""
+
+    def __init__(self, kind: str = 'thread', max_workers: int = None,
+                 max_queue: int = 64, timeout: float = 10.0):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor kind '{kind}' (expected 'thread' or 'process')")
+
+        self.kind = kind
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        pool_class = ThreadPoolExecutor if kind == 'thread' else ProcessPoolExecutor
+        self._pool = pool_class(max_workers=self.max_workers)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted but not yet picked up by a worker"""
+        return max(0, self._in_flight - self.max_workers)
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if not future.cancelled():
+                self.completed += 1
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) in the pool and await the result
+
+        Raises ExecutorSaturated when the queue is full and RenderTimeout
+        when the job takes longer than the configured timeout.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(
+                    f"Render queue full ({self.max_queue} waiting, {self.max_workers} running)"
+                )
+            self._in_flight += 1
+
+        # The slot is released when the job really finishes, not when the
+        # caller stops waiting, so timed-out renders still count as load
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            # Shut down or broken pool: the job never started, free its slot
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise RenderTimeout(f"Render exceeded {self.timeout:g}s")
+
+    def stats(self) -> dict:
+        """Counters for the health endpoint"""
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "timeout": self.timeout,
+                "in_flight": self._in_flight,
+                "queue_depth": self.queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release the pool"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
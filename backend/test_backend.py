@@ -54,6 +54,28 @@ def test_kick():
         print(f"❌ Error: {e}")
         return False
 
+def test_kick_binary():
+    """Test kick drum as a streamed audio/wav body"""
+    print("\n📦 Testing binary kick response...")
+    try:
+        response = requests.post(
+            f"{BASE_URL}/api/audio/play-kick",
+            json={"decay": 0.3, "pitch": 150, "velocity": 1.0},
+            headers={"Accept": "audio/wav"}
+        )
+        if response.status_code == 200:
+            print(f"✅ Binary kick received: {len(response.content)} bytes ({response.headers.get('content-type')})")
+            
+            with wave.open(io.BytesIO(response.content), 'rb') as wav:
+                print(f"   Duration: {wav.getnframes() / wav.getframerate():.3f}s")
+            return True
+        else:
+            print(f"❌ Binary kick failed: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
 def test_snare():
     """Test snare drum synthesis"""
     print("\n🪘 Testing snare drum...")
@@ -135,6 +157,7 @@ def test_synth():
                 "frequency": 440.0,
                 "duration": 0.5,
                 "velocity": 1.0,
+                "waveform": "sawtooth",
                 "detune": 0.02,
                 "attack": 0.01,
                 "decay": 0.1,
@@ -150,8 +173,12 @@ def test_synth():
             print(f"✅ ARP 2600 generated: {len(audio_bytes)} bytes")
             
             with wave.open(io.BytesIO(audio_bytes), 'rb') as wav:
+                duration = wav.getnframes() / wav.getframerate()
                 print(f"   Format: {wav.getnchannels()} ch, {wav.getframerate()} Hz")
-                print(f"   Duration: {wav.getnframes() / wav.getframerate():.3f}s")
+                print(f"   Duration: {duration:.3f}s")
+            if abs(duration - 0.5) > 0.01:
+                print("❌ Synth ignored the requested duration")
+                return False
             return True
         else:
             print(f"❌ Synth failed: {response.status_code}")
@@ -160,6 +187,159 @@ def test_synth():
         print(f"❌ Error: {e}")
         return False
 
+def test_batch():
+    """Test rendering a drum kit in one batch request"""
+    print("\n🧺 Testing batch render...")
+    try:
+        response = requests.post(
+            f"{BASE_URL}/api/audio/batch",
+            json={
+                "voices": [
+                    {"voice": "kick", "params": {"decay": 0.3}, "id": "kick"},
+                    {"voice": "snare", "params": {"seed": 1}, "id": "snare"},
+                    {"voice": "hihat", "params": {"open": True}, "id": "open_hat"},
+                    {"voice": "clap", "id": "clap"},
+                    {"voice": "synth", "params": {"frequency": 220.0}, "id": "synth"}
+                ]
+            }
+        )
+        if response.status_code == 200:
+            results = response.json()['results']
+            print(f"✅ Batch rendered: {len(results)} voices")
+            
+            for result in results:
+                audio_bytes = base64.b64decode(result['audio'])
+                with wave.open(io.BytesIO(audio_bytes), 'rb') as wav:
+                    print(f"   {result['id']}: {wav.getnframes() / wav.getframerate():.3f}s")
+            return True
+        else:
+            print(f"❌ Batch failed: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_pattern():
+    """Test server-side pattern rendering (303 + 808 + 2600)"""
+    print("\n🎼 Testing pattern render...")
+    try:
+        acid_line = [
+            {"active": step % 2 == 0, "note": ["C3", "D#3", "G3", "C3"][step % 4], "accent": step % 4 == 0}
+            for step in range(16)
+        ]
+        response = requests.post(
+            f"{BASE_URL}/api/render/pattern",
+            json={
+                "bpm": 130,
+                "bars": 2,
+                "tb303": {"pattern": acid_line},
+                "drums": [
+                    {"voice": "kick", "steps": [1, 0, 0, 0]},
+                    {"voice": "hat", "variation": "tight", "steps": [0, 0, 1, 0]},
+                    {"voice": "clap", "steps": [0, 0, 0, 0, 1, 0, 0, 0]}
+                ],
+                "arp2600": {"preset": "pad", "notes": [{"step": 0, "frequency": 220.0, "length": 16}]}
+            },
+            headers={"Accept": "audio/wav"}
+        )
+        if response.status_code == 200:
+            print(f"✅ Pattern rendered: {len(response.content)} bytes")
+            
+            with wave.open(io.BytesIO(response.content), 'rb') as wav:
+                print(f"   Duration: {wav.getnframes() / wav.getframerate():.3f}s")
+            return True
+        else:
+            print(f"❌ Pattern failed: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_websocket_bad_input():
+    """Test that malformed /ws/audio messages get an error reply and keep the socket open (in-process)"""
+    print("\n🔌 Testing WebSocket bad input...")
+    try:
+        from fastapi.testclient import TestClient
+        import audio_engine
+        
+        client = TestClient(audio_engine.app)
+        bad_messages = ['not json', '[1, 2]', '42', '"kick"']
+        for mode in ('ids', 'pcm'):
+            with client.websocket_connect(f"/ws/audio?mode={mode}") as ws:
+                for text in bad_messages:
+                    ws.send_text(text)
+                    reply = ws.receive_json()
+                    if reply['type'] != 'error':
+                        print(f"❌ {mode}: expected an error for {text!r}, got {reply}")
+                        return False
+                
+                # Ids that do not fit a uint32 are echoed, never packed into frames
+                for message_id in ('abc', -1, 2 ** 40):
+                    ws.send_json({"id": message_id, "voice": "kick", "params": {"decay": 0.1}})
+                    header = ws.receive_json()
+                    if header['type'] == 'error' or header['id'] != message_id:
+                        print(f"❌ {mode}: bad reply for id {message_id!r}: {header}")
+                        return False
+                    if header['type'] in ('sample', 'pcm'):
+                        for _ in range(-(-header['frames'] // 4096)):
+                            ws.receive_bytes()
+                    if header['type'] == 'sample':
+                        ws.receive_json()  # trigger
+                print(f"✅ {mode}: connection survived {len(bad_messages)} bad messages and odd ids")
+        return True
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_pattern_bad_input():
+    """Test that invalid pattern requests are rejected with 422 before rendering (in-process)"""
+    print("\n🚫 Testing pattern validation...")
+    try:
+        from fastapi.testclient import TestClient
+        import audio_engine
+        
+        client = TestClient(audio_engine.app)
+        bad_patterns = {
+            "negative note length": {"arp2600": {"notes": [{"step": 0, "length": -4}]}},
+            "negative note step": {"arp2600": {"notes": [{"step": -1}]}},
+            "note velocity above 1": {"arp2600": {"notes": [{"step": 0, "velocity": 2.0}]}},
+            "non-numeric 303 param": {"tb303": {"pattern": [{}], "params": {"cutoff": "abc"}}},
+            "unknown 303 param": {"tb303": {"pattern": [{}], "params": {"cutof": 900}}},
+            "unknown 303 waveform": {"tb303": {"pattern": [{}], "params": {"waveform": "noise"}}},
+            "unknown drum variation": {"drums": [{"voice": "kick", "variation": "nope", "steps": [1]}]},
+        }
+        for name, pattern in bad_patterns.items():
+            response = client.post("/api/render/pattern", json=pattern)
+            if response.status_code != 422:
+                print(f"❌ {name}: expected 422, got {response.status_code}")
+                return False
+        print(f"✅ {len(bad_patterns)} invalid patterns rejected with 422")
+        return True
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_metrics():
+    """Test the Prometheus metrics endpoint"""
+    print("\n📈 Testing metrics...")
+    try:
+        response = requests.get(f"{BASE_URL}/metrics")
+        if response.status_code == 200:
+            stages = sorted({
+                line.split('stage="')[1].split('"')[0]
+                for line in response.text.splitlines()
+                if line.startswith('haos_render_stage_seconds_count')
+            })
+            print(f"✅ Metrics exported: {len(response.text.splitlines())} lines")
+            print(f"   Stages timed: {', '.join(stages) or 'none'}")
+            return 'haos_http_requests_total' in response.text
+        else:
+            print(f"❌ Metrics failed: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
 def main():
     print("=" * 60)
     print("HAOS.fm Audio Engine - Test Suite")
@@ -175,10 +355,16 @@ def main():
         return
     
     results.append(("Kick Drum", test_kick()))
+    results.append(("Kick Drum (binary)", test_kick_binary()))
     results.append(("Snare Drum", test_snare()))
     results.append(("Hi-Hat", test_hihat()))
     results.append(("Clap", test_clap()))
     results.append(("ARP 2600 Synth", test_synth()))
+    results.append(("Batch Render", test_batch()))
+    results.append(("Pattern Render", test_pattern()))
+    results.append(("Metrics", test_metrics()))
+    results.append(("WebSocket Bad Input", test_websocket_bad_input()))
+    results.append(("Pattern Validation", test_pattern_bad_input()))
     
     # Print summary
     print("\n" + "=" * 60)
@@ -0,0 +1,82 @@
+"""
+HAOS.fm Voice Stream
+Per-connection state for the /ws/audio real-time trigger channel
+
+Two delivery modes:
+- 'ids': every distinct sound is sent once as unity-gain PCM with a
+  sample id; later triggers of the same sound only send the id, gain
+  and timestamp, and the client plays its local copy.
+- 'pcm': every trigger is answered with velocity-scaled PCM frames,
+  scaled into buffers preallocated per connection.
+
+Binary frames are [uint32 stream id][uint32 frame offset][int16 PCM...],
+little-endian, at most FRAME_SAMPLES samples each. Each binary run is
+preceded by a JSON header message describing it.
+"""
+
+import struct
+
+import numpy as np
+
+FRAME_SAMPLES = 4096
+FRAME_HEADER = struct.Struct('<II')
+STREAM_MODES = ('ids', 'pcm')
+
+
+class VoiceStream:
+    """Sample-id bookkeeping and reusable PCM buffers for one connection"""
+
+    def __init__(self, mode: str = 'ids', capacity: int = 44100 * 2):
+        if mode not in STREAM_MODES:
+            raise ValueError(f"Unknown stream mode '{mode}' (expected one of {', '.join(STREAM_MODES)})")
+        self.mode = mode
+        self._sample_ids = {}
+        self._next_id = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        self._scratch = np.empty(capacity, dtype=np.float32)
+        self._out = np.empty(capacity, dtype=np.int16)
+
+    def sample_id(self, key):
+        """
+        Return (id, is_new) for a rendered sound on this connection
+
+        key=None marks a one-off sound (e.g. unseeded noise): it gets a
+        fresh id that is never reused.
+        """
+        sample_id = self._sample_ids.get(key) if key is not None else None
+        if sample_id is not None:
+            return sample_id, False
+        sample_id = self._next_id
+        self._next_id += 1
+        if key is not None:
+            self._sample_ids[key] = sample_id
+        return sample_id, True
+
+    def scale(self, pcm: np.ndarray, gain: float) -> np.ndarray:
+        """
+        Apply gain to int16 PCM using the preallocated buffers
+
+        Returns a view into the connection's output buffer; it is only
+        valid until the next call.
+        """
+        n = len(pcm)
+        if n > len(self._out):
+            # Grow geometrically so long voices do not reallocate every hit
+            self._allocate(max(n, 2 * len(self._out)))
+
+        scratch = self._scratch[:n]
+        np.multiply(pcm, gain, out=scratch)
+        np.clip(scratch, -32768, 32767, out=scratch)
+        out = self._out[:n]
+        np.copyto(out, scratch, casting='unsafe')
+        return out
+
+    @staticmethod
+    def frames(stream_id: int, pcm: np.ndarray):
+        """Yield binary frames for int16 PCM"""
+        view = memoryview(pcm).cast('B')
+        frame_bytes = FRAME_SAMPLES * 2
+        for offset in range(0, len(view), frame_bytes):
+            yield FRAME_HEADER.pack(stream_id, offset // 2) + view[offset:offset + frame_bytes]